@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Generador de carga asíncrono que reproduce el tráfico real del dashboard.
+
+Cada usuario virtual es un navegador con el dashboard abierto: ejecuta los
+pasos de un escenario (benchmarks/escenarios/*.json, derivados de las
+secuencias de llamadas del frontend), espera un tiempo de lectura y vuelve
+a empezar, mientras sus sondeos periódicos (/health, /ready) siguen
+corriendo en paralelo. Al final reporta throughput, latencias p50/p95/p99
+y tasa de errores por ruta, tiempo de carga completa por escenario y el
+consumo de CPU/RSS del servidor (proceso y sus workers, vía /proc).
+
+Formato de un escenario:
+    {"pausa_s": [min, max], "sondeos": [{"get": "/health", "cada_s": 30}],
+     "pasos": [{"get": "/summary"},
+               {"paralelo": [{"get": ...}, {"secuencia": [...]}]},
+               {"get": "/filter/{columna}/{valor}", "valores": {"columna": [...], "valor": [...]}}]}
+
+Uso:
+    python benchmarks/carga.py --iniciar [--workers 4] --usuarios 20 --duracion 60
+    python benchmarks/carga.py --url http://localhost:8000 --pid 1234 --escenario dashboard=3 graficos=1
+"""
+import argparse
+import asyncio
+import datetime
+import glob
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from suite import base_dir, commit_actual, resultados_dir
+
+escenarios_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'escenarios')
+
+# Mismo timeout que el cliente de apiEnhanced.ts
+TIMEOUT_S = 30.0
+# Conexiones simultáneas por host de un navegador
+CONEXIONES_POR_USUARIO = 6
+
+
+def cargar_escenarios(especificacion):
+    """Lee 'nombre=peso' (o solo 'nombre') y retorna {nombre: (peso, escenario)}"""
+    disponibles = {os.path.splitext(os.path.basename(r))[0]: r
+                   for r in glob.glob(os.path.join(escenarios_dir, '*.json'))}
+    escenarios = {}
+    for item in especificacion or sorted(disponibles):
+        nombre, _, peso = item.partition('=')
+        ruta = disponibles.get(nombre, nombre)
+        with open(ruta, encoding='utf-8') as f:
+            escenarios[os.path.splitext(os.path.basename(ruta))[0]] = (float(peso or 1), json.load(f))
+    return escenarios
+
+
+# --- Registro de resultados -----------------------------------------------
+
+class Registro:
+    """Latencias y errores por ruta; las rutas con plantilla se agrupan por plantilla"""
+    def __init__(self):
+        self.rutas = {}
+        self.paginas = {}
+        self.activo = True
+
+    def peticion(self, ruta, segundos, estado, tamano):
+        r = self.rutas.setdefault(ruta, {"latencias": [], "estados": {}, "bytes": 0})
+        r["latencias"].append(segundos)
+        r["estados"][estado] = r["estados"].get(estado, 0) + 1
+        r["bytes"] += tamano
+
+    def pagina(self, escenario, segundos):
+        self.paginas.setdefault(escenario, []).append(segundos)
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return None
+    k = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[k]
+
+
+def resumen_latencias(latencias):
+    ordenados = sorted(latencias)
+    return {
+        "p50_ms": round(percentil(ordenados, 50) * 1000, 1),
+        "p95_ms": round(percentil(ordenados, 95) * 1000, 1),
+        "p99_ms": round(percentil(ordenados, 99) * 1000, 1),
+        "max_ms": round(ordenados[-1] * 1000, 1),
+    }
+
+
+# --- Usuarios virtuales ---------------------------------------------------
+
+async def ejecutar_paso(cliente, paso, registro, rng):
+    if "paralelo" in paso:
+        await asyncio.gather(*(ejecutar_paso(cliente, p, registro, rng) for p in paso["paralelo"]))
+    elif "secuencia" in paso:
+        for p in paso["secuencia"]:
+            await ejecutar_paso(cliente, p, registro, rng)
+    else:
+        plantilla = paso["get"]
+        ruta = plantilla.format(**{k: rng.choice(v) for k, v in paso.get("valores", {}).items()})
+        inicio = time.perf_counter()
+        try:
+            respuesta = await cliente.get(ruta)
+            estado, tamano = respuesta.status_code, len(respuesta.content)
+        except httpx.TimeoutException:
+            estado, tamano = "timeout", 0
+        except httpx.HTTPError as e:
+            estado, tamano = type(e).__name__, 0
+        if registro.activo:
+            registro.peticion(plantilla, time.perf_counter() - inicio, estado, tamano)
+
+
+async def sondear(cliente, sondeo, registro, rng):
+    # El primer sondeo ocurre en la carga de la página (paso del escenario)
+    while True:
+        await asyncio.sleep(sondeo["cada_s"])
+        await ejecutar_paso(cliente, sondeo, registro, rng)
+
+
+async def usuario(numero, cliente, escenarios, registro, args):
+    rng = random.Random(args.semilla * 100_003 + numero)
+    # Rampa de subida: los usuarios se conectan de forma escalonada
+    await asyncio.sleep(args.rampa * numero / max(1, args.usuarios))
+    nombres = list(escenarios)
+    pesos = [escenarios[n][0] for n in nombres]
+    sondeos = []
+    try:
+        while True:
+            nombre = rng.choices(nombres, pesos)[0]
+            escenario = escenarios[nombre][1]
+            for s in sondeos:
+                s.cancel()
+            sondeos = [asyncio.ensure_future(sondear(cliente, s, registro, rng))
+                       for s in escenario.get("sondeos", [])]
+            inicio = time.perf_counter()
+            for paso in escenario["pasos"]:
+                await ejecutar_paso(cliente, paso, registro, rng)
+            if registro.activo:
+                registro.pagina(nombre, time.perf_counter() - inicio)
+            await asyncio.sleep(rng.uniform(*escenario.get("pausa_s", [0, 0])) * args.factor_pausa)
+    finally:
+        for s in sondeos:
+            s.cancel()
+
+
+# --- Servidor -------------------------------------------------------------
+
+def procesos_del_arbol(pid):
+    """pid y todos sus descendientes (workers de gunicorn, pool de procesos)"""
+    hijos = {}
+    for stat in glob.glob('/proc/[0-9]*/stat'):
+        try:
+            with open(stat) as f:
+                campos = f.read().rsplit(')', 1)[1].split()
+            hijos.setdefault(int(campos[1]), []).append(int(stat.split('/')[2]))
+        except (OSError, IndexError, ValueError):
+            continue
+    arbol, pendientes = [], [pid]
+    while pendientes:
+        p = pendientes.pop()
+        arbol.append(p)
+        pendientes.extend(hijos.get(p, []))
+    return arbol
+
+
+def uso_servidor(pid):
+    """(segundos de CPU acumulados, bytes RSS) del árbol de procesos; None fuera de Linux"""
+    if not os.path.exists('/proc'):
+        return None
+    tick = os.sysconf('SC_CLK_TCK')
+    pagina = os.sysconf('SC_PAGE_SIZE')
+    cpu = rss = 0
+    for p in procesos_del_arbol(pid):
+        try:
+            with open(f'/proc/{p}/stat') as f:
+                campos = f.read().rsplit(')', 1)[1].split()
+            with open(f'/proc/{p}/statm') as f:
+                rss += int(f.read().split()[1]) * pagina
+            # utime, stime (incluye los hijos ya terminados: cutime, cstime)
+            cpu += sum(int(c) for c in campos[11:15]) / tick
+        except (OSError, IndexError, ValueError):
+            continue
+    return cpu, rss
+
+
+async def muestrear_servidor(pid, muestras):
+    anterior = uso_servidor(pid)
+    t_anterior = time.perf_counter()
+    if anterior is None:
+        return
+    while True:
+        await asyncio.sleep(1)
+        actual = uso_servidor(pid)
+        ahora = time.perf_counter()
+        muestras.append({
+            "cpu_pct": round(100 * (actual[0] - anterior[0]) / (ahora - t_anterior), 1),
+            "rss_mb": round(actual[1] / 2**20, 1),
+        })
+        anterior, t_anterior = actual, ahora
+
+
+def iniciar_servidor(args):
+    """Arranca la API localmente y espera a que /ready responda 200"""
+    entorno = dict(os.environ, PORT=str(args.puerto))
+    if args.workers > 1:
+        entorno["WEB_WORKERS"] = str(args.workers)
+        comando = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "api:app"]
+    else:
+        comando = [sys.executable, "-m", "uvicorn", "api:app", "--port", str(args.puerto), "--log-level", "warning"]
+    print(f"🚀 Iniciando servidor: {' '.join(comando[2:])}")
+    proceso = subprocess.Popen(comando, cwd=base_dir, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.time() + args.espera_inicio
+    while time.time() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al iniciar (código {proceso.returncode})")
+        try:
+            if httpx.get(f"{args.url}/ready", timeout=2).status_code == 200:
+                return proceso
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    proceso.terminate()
+    raise RuntimeError("El servidor no estuvo listo a tiempo")
+
+
+# --- Ejecución ------------------------------------------------------------
+
+async def ejecutar_carga(args, escenarios, pid):
+    registro = Registro()
+    muestras = []
+    limites = httpx.Limits(max_connections=args.usuarios * CONEXIONES_POR_USUARIO,
+                           max_keepalive_connections=args.usuarios * CONEXIONES_POR_USUARIO)
+    async with httpx.AsyncClient(base_url=args.url, timeout=TIMEOUT_S, limits=limites) as cliente:
+        muestreo = asyncio.ensure_future(muestrear_servidor(pid, muestras)) if pid else None
+        usuarios = [asyncio.ensure_future(usuario(i, cliente, escenarios, registro, args))
+                    for i in range(args.usuarios)]
+        inicio = time.perf_counter()
+        await asyncio.sleep(args.duracion)
+        duracion = time.perf_counter() - inicio
+        # Las peticiones que terminan después de la ventana no se cuentan
+        registro.activo = False
+        for u in usuarios:
+            u.cancel()
+        await asyncio.gather(*usuarios, return_exceptions=True)
+        if muestreo:
+            muestreo.cancel()
+    return registro, muestras, duracion
+
+
+def construir_reporte(args, registro, muestras, duracion):
+    rutas = {}
+    total = errores = 0
+    for ruta, r in sorted(registro.rutas.items()):
+        n = len(r["latencias"])
+        fallidas = sum(c for e, c in r["estados"].items() if not (isinstance(e, int) and e < 400))
+        total += n
+        errores += fallidas
+        rutas[ruta] = {
+            "peticiones": n,
+            "rps": round(n / duracion, 2),
+            "tasa_error": round(fallidas / n, 4),
+            "estados": {str(e): c for e, c in r["estados"].items()},
+            "bytes_medio": round(r["bytes"] / n),
+            **resumen_latencias(r["latencias"]),
+        }
+    reporte = {
+        "meta": {
+            "fecha": datetime.datetime.now().isoformat(timespec='seconds'),
+            "commit": commit_actual(),
+            "url": args.url,
+            "usuarios": args.usuarios,
+            "duracion_s": round(duracion, 1),
+            "workers": args.workers if args.iniciar else None,
+            "escenarios": args.escenario,
+            "factor_pausa": args.factor_pausa,
+        },
+        "total": {
+            "peticiones": total,
+            "rps": round(total / duracion, 2),
+            "tasa_error": round(errores / total, 4) if total else 0.0,
+        },
+        "rutas": rutas,
+        "paginas": {n: {"cargas": len(l), **resumen_latencias(l)} for n, l in registro.paginas.items()},
+        "servidor": None,
+    }
+    if muestras:
+        cpu = [m["cpu_pct"] for m in muestras]
+        rss = [m["rss_mb"] for m in muestras]
+        reporte["servidor"] = {
+            "cpu_pct_medio": round(sum(cpu) / len(cpu), 1),
+            "cpu_pct_max": max(cpu),
+            "rss_mb_max": max(rss),
+            "rss_mb_final": rss[-1],
+            "muestras": muestras,
+        }
+    return reporte
+
+
+def imprimir(reporte):
+    t = reporte["total"]
+    print("\n" + "=" * 100)
+    print(f"{reporte['meta']['usuarios']} usuarios, {reporte['meta']['duracion_s']} s: "
+          f"{t['peticiones']} peticiones, {t['rps']} req/s, errores {t['tasa_error']:.2%}")
+    print("=" * 100)
+    print(f"{'ruta':<52} {'n':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'error':>7}")
+    for ruta, r in reporte["rutas"].items():
+        print(f"{ruta[:52]:<52} {r['peticiones']:>6} {r['rps']:>7} {r['p50_ms']:>8} "
+              f"{r['p95_ms']:>8} {r['p99_ms']:>8} {r['tasa_error']:>7.2%}")
+    print("\nCarga completa por escenario:")
+    for nombre, p in reporte["paginas"].items():
+        print(f"   {nombre:<20} {p['cargas']:>5} cargas  p50 {p['p50_ms']} ms  p95 {p['p95_ms']} ms  p99 {p['p99_ms']} ms")
+    s = reporte["servidor"]
+    if s:
+        print(f"\nServidor: CPU media {s['cpu_pct_medio']}% (máx {s['cpu_pct_max']}%), "
+              f"RSS máx {s['rss_mb_max']} MB, final {s['rss_mb_final']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="API ya en ejecución (por defecto http://localhost:PUERTO)")
+    parser.add_argument("--iniciar", action="store_true", help="Arranca la API localmente durante la prueba")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de gunicorn con --iniciar (1 = uvicorn)")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--pid", type=int, help="PID del servidor para medir CPU/RSS si no se usa --iniciar")
+    parser.add_argument("--escenario", nargs="+", help="nombre[=peso] o ruta a un JSON (por defecto todos)")
+    parser.add_argument("--usuarios", type=int, default=10, help="Dashboards concurrentes")
+    parser.add_argument("--duracion", type=float, default=60, help="Segundos de medición")
+    parser.add_argument("--rampa", type=float, default=5, help="Segundos para conectar a todos los usuarios")
+    parser.add_argument("--factor-pausa", type=float, default=1.0,
+                        help="Multiplica el tiempo de lectura entre cargas (0 = sin pausas)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--espera-inicio", type=float, default=300, help="Segundos máximos de arranque con --iniciar")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto benchmarks/resultados/)")
+    args = parser.parse_args()
+    args.url = (args.url or f"http://localhost:{args.puerto}").rstrip('/')
+
+    escenarios = cargar_escenarios(args.escenario)
+    args.escenario = {n: p for n, (p, _) in escenarios.items()}
+
+    servidor = iniciar_servidor(args) if args.iniciar else None
+    pid = servidor.pid if servidor else args.pid
+    try:
+        print(f"📈 {args.usuarios} usuarios durante {args.duracion:.0f} s contra {args.url} "
+              f"(escenarios: {', '.join(f'{n}={p:g}' for n, p in args.escenario.items())})")
+        registro, muestras, duracion = asyncio.run(ejecutar_carga(args, escenarios, pid))
+    finally:
+        if servidor:
+            servidor.send_signal(signal.SIGTERM)
+            servidor.wait(timeout=60)
+
+    reporte = construir_reporte(args, registro, muestras, duracion)
+    salida = args.salida
+    if salida is None:
+        os.makedirs(resultados_dir, exist_ok=True)
+        marca = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        salida = os.path.join(resultados_dir, f"carga_{marca}_{reporte['meta']['commit'] or 'local'}.json")
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+    imprimir(reporte)
+    print(f"\n💾 Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Generador de encuestas sintéticas con el mismo esquema que data/raw/2023.csv.
+
+Aprende del export original:
+  - la distribución conjunta de tipo de empresa, provincia, género y CIIU,
+  - la edad condicionada al género,
+  - los bloques de respuestas por tipo de empresa (se toma una fila donante
+    del mismo tipo, así se conservan las ramas del formulario y la
+    correlación entre preguntas) con una fracción de las preguntas Si/No
+    re-muestreadas según la probabilidad de "Si" del tipo,
+  - la relación entre respuestas "Si" y la Puntuación (regresión lineal),
+    que se usa para ajustar la puntuación de la fila donante.
+
+La salida conserva cabeceras, BOM, acentos y valores literales ("N/A") del
+original; los datos personales se reemplazan por valores ficticios. Se
+escribe por bloques (memoria constante) y es determinista para una semilla.
+
+Uso:
+    python benchmarks/sintetico.py --filas 1000000 --salida /tmp/encuesta_1M.csv [--semilla 42]
+"""
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RAW_PATH = os.path.join(base_dir, 'data', 'raw', '2023.csv')
+
+# El tamaño de bloque forma parte de la secuencia aleatoria: cambiarlo
+# cambia la salida para una misma semilla
+BLOQUE = 10_000
+
+# Fracción de preguntas Si/No que se re-muestrean respecto a la fila donante
+TASA_VARIACION = 0.10
+
+COL_ID = 'ID del envío'
+COL_FECHA = 'Fecha y hora del envío'
+COL_TIPO = 'Registre su tipo de empresa / organización / ciudadano:'
+COL_PROVINCIA = 'Provincia:'
+COL_GENERO = 'Género:'
+COL_CIIU = 'Seleccione su actividad económica de acuerdo a la clasificación CIIU *'
+COL_EDAD = 'Edad:'
+COL_PUNTUACION = 'Puntuación'
+DEMOGRAFICAS = [COL_TIPO, COL_PROVINCIA, COL_GENERO, COL_CIIU]
+
+# Datos personales: si la fila donante tiene valor se genera uno ficticio
+PERSONALES = {
+    'Registre su RUC*': lambda rng, ids: [f"{n:013d}" for n in rng.integers(10**12, 10**13, len(ids))],
+    'Registre su nombre': lambda rng, ids: [f"Encuestado {i}" for i in ids],
+    'Registre su correo': lambda rng, ids: [f"encuestado{i}@example.com" for i in ids],
+    'Registre su número de teléfono': lambda rng, ids: [f"09{n:08d}" for n in rng.integers(0, 10**8, len(ids))],
+    'Registre el RUC de la institución': lambda rng, ids: [f"{n:013d}" for n in rng.integers(10**12, 10**13, len(ids))],
+    'Registre un correo de contacto': lambda rng, ids: [f"contacto{i}@example.gob.ec" for i in ids],
+    'Registre un número de contacto': lambda rng, ids: [f"0{n:08d}" for n in rng.integers(2 * 10**7, 8 * 10**7, len(ids))],
+    '¿Cuál es su página web?': lambda rng, ids: [f"www.empresa{i}.com.ec" for i in ids],
+}
+VACIOS = ('', 'N/A', 'NN')
+
+
+class Modelo:
+    """Distribuciones aprendidas del CSV raw"""
+    def __init__(self, ruta=RAW_PATH):
+        # dtype=str y sin NA por defecto: "N/A" y los números se conservan literalmente
+        raw = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+        self.columnas = list(raw.columns)
+        # Cabecera literal: pandas renombra las preguntas repetidas ("...?.1")
+        with open(ruta, encoding='utf-8-sig', newline='') as f:
+            self.cabecera = next(csv.reader(f))
+        self.valores = raw.to_numpy(dtype=object)
+        self.indice = {c: i for i, c in enumerate(self.columnas)}
+
+        # Conjunta de las demográficas
+        conjunta = raw.groupby(DEMOGRAFICAS, sort=True).size()
+        self.combinaciones = list(conjunta.index)
+        self.prob_combinaciones = (conjunta / conjunta.sum()).to_numpy()
+
+        # Filas donantes por tipo de empresa
+        self.donantes = {tipo: np.flatnonzero(raw[COL_TIPO].to_numpy() == tipo)
+                         for tipo in raw[COL_TIPO].unique()}
+
+        # Edad por género; las edades numéricas reciben un pequeño ruido
+        self.edades = {g: grupo[COL_EDAD].to_numpy() for g, grupo in raw.groupby(COL_GENERO)}
+        edades_num = pd.to_numeric(raw[COL_EDAD], errors='coerce').dropna()
+        self.edad_min, self.edad_max = int(edades_num.min()), int(edades_num.max())
+
+        # Preguntas Si/No y probabilidad de "Si" por tipo de empresa
+        self.si_no = [c for c in self.columnas
+                      if set(raw[c].unique()) <= {'Si', 'No', 'N/A'} and 'Si' in set(raw[c].unique())]
+        self.prob_si = {}
+        for tipo, grupo in raw.groupby(COL_TIPO):
+            respondidas = grupo[self.si_no].where(grupo[self.si_no] != 'N/A')
+            self.prob_si[tipo] = (respondidas == 'Si').sum() / respondidas.notna().sum().clip(lower=1)
+
+        # Puntuación ~ a + b * (respuestas "Si")
+        puntuacion = raw[COL_PUNTUACION].astype(int)
+        self.peso_si = float(np.polyfit((raw[self.si_no] == 'Si').sum(axis=1), puntuacion, 1)[0])
+        self.puntuacion_min, self.puntuacion_max = int(puntuacion.min()), int(puntuacion.max())
+
+        fechas = pd.to_datetime(raw[COL_FECHA], format='%m/%d/%Y %H:%M')
+        self.fecha_min, self.fecha_max = fechas.min().value, fechas.max().value
+        self.primer_id = int(raw[COL_ID].astype(int).max()) + 1
+
+    def generar_bloque(self, rng, n, primer_id):
+        """Genera n filas como matriz de texto con el orden de columnas original"""
+        idx = self.indice
+        combinaciones = rng.choice(len(self.combinaciones), size=n, p=self.prob_combinaciones)
+        demograficas = np.array(self.combinaciones, dtype=object)[combinaciones]
+        tipos = demograficas[:, 0]
+
+        # Fila donante del mismo tipo de empresa
+        donantes = np.empty(n, dtype=np.int64)
+        for tipo, filas in self.donantes.items():
+            mascara = tipos == tipo
+            donantes[mascara] = filas[rng.integers(0, len(filas), mascara.sum())]
+        bloque = self.valores[donantes].copy()
+
+        for j, columna in enumerate(DEMOGRAFICAS):
+            bloque[:, idx[columna]] = demograficas[:, j]
+
+        # Re-muestreo parcial de las preguntas Si/No
+        cols = [idx[c] for c in self.si_no]
+        respuestas = bloque[:, cols]
+        antes = (respuestas == 'Si').sum(axis=1)
+        prob = np.vstack([self.prob_si[t].to_numpy() for t in tipos])
+        cambiar = (rng.random(respuestas.shape) < TASA_VARIACION) & (respuestas != 'N/A')
+        nuevas = np.where(rng.random(respuestas.shape) < prob, 'Si', 'No')
+        respuestas = np.where(cambiar, nuevas, respuestas)
+        bloque[:, cols] = respuestas
+        delta = ((respuestas == 'Si').sum(axis=1) - antes) * self.peso_si
+        puntuacion = bloque[:, idx[COL_PUNTUACION]].astype(int) + np.rint(delta).astype(int)
+        bloque[:, idx[COL_PUNTUACION]] = np.clip(puntuacion, self.puntuacion_min, self.puntuacion_max).astype(str)
+
+        # Edad condicionada al género
+        edades = bloque[:, idx[COL_EDAD]]
+        for genero, valores in self.edades.items():
+            mascara = demograficas[:, 2] == genero
+            edades[mascara] = valores[rng.integers(0, len(valores), mascara.sum())]
+        numericas = np.char.isdigit(edades.astype(str))
+        ruido = rng.integers(-2, 3, n)
+        edades[numericas] = np.clip(edades[numericas].astype(int) + ruido[numericas],
+                                    self.edad_min, self.edad_max).astype(str)
+        bloque[:, idx[COL_EDAD]] = edades
+
+        ids = np.arange(primer_id, primer_id + n)
+        bloque[:, idx[COL_ID]] = ids.astype(str)
+        fechas = pd.to_datetime(rng.integers(self.fecha_min, self.fecha_max, n))
+        bloque[:, idx[COL_FECHA]] = [f"{f.month}/{f.day}/{f.year} {f.hour}:{f.minute:02d}" for f in fechas]
+
+        for columna, generar in PERSONALES.items():
+            if columna not in idx:
+                continue
+            c = idx[columna]
+            con_valor = ~np.isin(bloque[:, c], VACIOS)
+            if con_valor.any():
+                bloque[con_valor, c] = generar(rng, ids[con_valor])
+        return bloque
+
+
+def generar(modelo, filas, salida, semilla=42, primer_id=None):
+    """Escribe `filas` respuestas sintéticas en `salida` por bloques de BLOQUE filas"""
+    primer_id = modelo.primer_id if primer_id is None else primer_id
+    # utf-8-sig y fin de línea "\n": mismo formato que el export original
+    with open(salida, 'w', encoding='utf-8-sig', newline='') as f:
+        escritor = csv.writer(f, lineterminator='\n')
+        escritor.writerow(modelo.cabecera)
+        for numero, inicio in enumerate(range(0, filas, BLOQUE)):
+            # Un generador por bloque: la salida no depende de cuántos bloques se escriban antes
+            rng = np.random.default_rng([semilla, numero])
+            n = min(BLOQUE, filas - inicio)
+            escritor.writerows(modelo.generar_bloque(rng, n, primer_id + inicio))
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, required=True)
+    parser.add_argument("--salida", required=True)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--origen", default=RAW_PATH, help="CSV raw del que se aprenden las distribuciones")
+    parser.add_argument("--primer-id", type=int, help="Primer 'ID del envío' (por defecto, el siguiente al máximo del origen)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    modelo = Modelo(args.origen)
+    generar(modelo, args.filas, args.salida, args.semilla, args.primer_id)
+    duracion = time.perf_counter() - inicio
+    tamano_mb = os.path.getsize(args.salida) / 2**20
+    print(f"✅ {args.filas} filas sintéticas en {args.salida} ({tamano_mb:.1f} MB, {duracion:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
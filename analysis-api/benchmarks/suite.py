@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de la API de análisis.
+
+Mide las etapas de la limpieza, cada método de Data, cada gráfico de
+Graphics y cada endpoint GET (con el TestClient de FastAPI, en proceso)
+sobre la encuesta 2023 escalada a 1x, 10x, 100x y 1000x filas. Por cada
+caso reporta tiempo de pared, pico de memoria (tracemalloc) y tamaño del
+resultado, y guarda un JSON que puede compararse con otra ejecución.
+
+Cada combinación escala/grupo se ejecuta en un proceso aparte, así el pico
+de RSS es propio del grupo y un fallo (p. ej. falta de memoria a 1000x)
+queda registrado sin detener la suite.
+
+Uso:
+    python benchmarks/suite.py medir [--escalas 1 10 100 1000] [--grupos limpieza data graficos endpoints]
+                                     [--repeticiones 3] [--sin-memoria] [--sintetico] [--salida resultados.json]
+    python benchmarks/suite.py comparar base.json nuevo.json [--umbral 0.10]
+"""
+import argparse
+import contextlib
+import datetime
+import inspect
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+resultados_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+GRUPOS = ["limpieza", "data", "graficos", "endpoints"]
+ESCALAS = [1, 10, 100, 1000]
+
+# Endpoints con parámetros de ruta: se miden con un valor representativo
+ENDPOINTS_PARAMETRIZADOS = ["/filter/Provincia/Pichincha"]
+
+# Filas de la encuesta 2023 (escala 1x) para el modo sintético
+FILAS_BASE = 1291
+
+
+# --- Medición -------------------------------------------------------------
+
+def tamano(resultado):
+    """Tamaño en bytes del resultado de un caso"""
+    import pandas as pd
+    if resultado is None:
+        return 0
+    if isinstance(resultado, (bytes, bytearray)):
+        return len(resultado)
+    if isinstance(resultado, str) and os.path.exists(resultado):
+        return os.path.getsize(resultado)
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        uso = resultado.memory_usage(index=True, deep=True)
+        return int(uso.sum() if isinstance(uso, pd.Series) else uso)
+    if hasattr(resultado, 'content'):
+        return len(resultado.content)
+    return len(json.dumps(resultado, default=str, ensure_ascii=False).encode('utf-8'))
+
+
+def medir(funcion, repeticiones, memoria, preparar=None):
+    """Ejecuta funcion() y retorna tiempos, pico de memoria y tamaño del resultado.
+
+    Los tiempos se toman sin tracemalloc activo; el pico de memoria se mide en
+    una ejecución adicional para no distorsionar los tiempos.
+    """
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    medicion = {
+        "tiempo_s": round(min(tiempos), 6),
+        "tiempo_mediana_s": round(statistics.median(tiempos), 6),
+        "tamano_bytes": tamano(resultado),
+        "memoria_pico_mb": None,
+    }
+    del resultado
+
+    if memoria:
+        if preparar:
+            preparar()
+        tracemalloc.start()
+        try:
+            funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        medicion["memoria_pico_mb"] = round(pico / 2**20, 2)
+    return medicion
+
+
+def medir_caso(nombre, filas, funcion, args, preparar=None):
+    """medir() como registro de resultados; un caso que falla queda con su error"""
+    try:
+        return {"caso": nombre, "filas": filas, **medir(funcion, args.repeticiones, args.memoria, preparar)}
+    except Exception as e:
+        return {"caso": nombre, "filas": filas, "error": f"{type(e).__name__}: {e}"}
+
+
+# --- Datos escalados ------------------------------------------------------
+
+def escalar_csv(origen, destino, factor, columna_id, **lectura):
+    """Replica las filas de origen `factor` veces con IDs únicos, escribiendo por bloques"""
+    import pandas as pd
+    base = pd.read_csv(origen, **lectura)
+    desplazamiento = int(pd.to_numeric(base[columna_id]).max()) + 1
+    ids = pd.to_numeric(base[columna_id])
+    # utf-8-sig conserva el BOM del export original
+    with open(destino, 'w', encoding='utf-8-sig', newline='') as f:
+        for k in range(factor):
+            bloque = base.copy()
+            bloque[columna_id] = ids + k * desplazamiento
+            bloque.to_csv(f, header=(k == 0), index=False)
+    return len(base) * factor
+
+
+# --- Grupos de casos ------------------------------------------------------
+
+def casos_limpieza(escala, tmp, args):
+    """Lectura del CSV raw, cada etapa de limpieza, escritura del procesado y limpieza por bloques"""
+    import pandas as pd
+    from src import cleaning
+
+    raw = os.path.join(tmp, 'raw.csv')
+    if args.sintetico:
+        # Respuestas sintéticas en lugar de filas replicadas (ver sintetico.py)
+        import sintetico
+        filas = sintetico.generar(sintetico.Modelo(cleaning.RAW_PATH), escala * FILAS_BASE, raw)
+    else:
+        filas = escalar_csv(cleaning.RAW_PATH, raw, escala, 'ID del envío')
+    salida = os.path.join(tmp, 'procesado.csv')
+
+    etapas = [("leer_csv", lambda _: pd.read_csv(raw))]
+    etapas += [(nombre, etapa) for nombre, etapa in cleaning.ETAPAS]
+    etapas += [("guardar_csv", lambda df: (df.to_csv(salida, index=True), df)[1])]
+
+    tiempos = {nombre: [] for nombre, _ in etapas}
+    picos = {}
+    tamanos = {}
+    for i in range(args.repeticiones + (1 if args.memoria else 0)):
+        con_memoria = i == args.repeticiones
+        if con_memoria:
+            tracemalloc.start()
+        df = None
+        for nombre, etapa in etapas:
+            inicio = time.perf_counter()
+            df = etapa(df)
+            if con_memoria:
+                picos[nombre] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+                tracemalloc.reset_peak()
+            else:
+                tiempos[nombre].append(time.perf_counter() - inicio)
+                tamanos[nombre] = os.path.getsize(salida) if nombre == "guardar_csv" else tamano(df)
+        if con_memoria:
+            tracemalloc.stop()
+        del df
+
+    casos = [
+        {
+            "caso": nombre,
+            "filas": filas,
+            "tiempo_s": round(min(tiempos[nombre]), 6),
+            "tiempo_mediana_s": round(statistics.median(tiempos[nombre]), 6),
+            "memoria_pico_mb": picos.get(nombre),
+            "tamano_bytes": tamanos[nombre],
+        }
+        for nombre, _ in etapas
+    ]
+
+    # Limpieza completa por bloques: el pico de memoria no debe crecer con la escala
+    salida_bloques = os.path.join(tmp, 'procesado_bloques.csv')
+    casos.append(medir_caso("limpiar_por_bloques", filas,
+                            lambda: (cleaning.limpiar_por_bloques(raw, salida_bloques), salida_bloques)[1], args))
+    return casos
+
+
+def cargar_escalado(escala, tmp):
+    """Dataset procesado escalado (la limpieza es fila a fila, equivale a limpiar el raw escalado)"""
+    from src import cleaning, dataset
+
+    ruta = os.path.join(tmp, 'procesado_escalado.csv')
+    if not os.path.exists(cleaning.PROCESSED_PATH):
+        cleaning.realizar_limpieza()
+    filas = escalar_csv(cleaning.PROCESSED_PATH, ruta, escala, 'ID del envio',
+                        dtype=str, keep_default_na=False)
+    return ruta, filas, dataset.cargar(ruta)
+
+
+def casos_data(escala, tmp, args):
+    """Cada método público de Data sobre el dataset escalado"""
+    from src import dataset
+    from src.processing_data import Data
+
+    ruta, filas, ds = cargar_escalado(escala, tmp)
+    casos = [medir_caso("cargar_dataset", filas, lambda: dataset.cargar(ruta).df, args)]
+    for nombre, _ in inspect.getmembers(Data, inspect.isfunction):
+        if nombre.startswith('_') or nombre == 'show_dataframe':
+            continue
+        casos.append(medir_caso(nombre, filas, getattr(ds.data, nombre), args))
+    return casos
+
+
+def casos_graficos(escala, tmp, args):
+    """Cada gráfico de Graphics, renderizado en un directorio temporal"""
+    from src.graphics import Graphics
+
+    _, filas, ds = cargar_escalado(escala, tmp)
+    casos = []
+    for nombre, _ in inspect.getmembers(Graphics, inspect.isfunction):
+        if nombre.startswith('_') or nombre == 'generar_direccion':
+            continue
+        casos.append(medir_caso(nombre, filas, getattr(ds.graphics, nombre), args))
+    return casos
+
+
+def casos_endpoints(escala, tmp, args):
+    """Cada endpoint GET con el TestClient, sobre el dataset escalado ya activo.
+
+    Los endpoints /graphics/* se miden en frío: el PNG se borra antes de cada
+    ejecución para que la petición incluya la regeneración.
+    """
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+
+    import api
+    from src import dataset
+
+    _, filas, ds = cargar_escalado(escala, tmp)
+    dataset.activar(ds)
+    api.df = ds.df
+
+    rutas = [
+        r.path for r in api.app.routes
+        if isinstance(r, APIRoute) and 'GET' in r.methods and '{' not in r.path
+    ] + ENDPOINTS_PARAMETRIZADOS
+
+    def borrar_graficos():
+        # GRAFICOS_DIR apunta al directorio temporal del benchmark
+        for archivo in os.listdir(api.graphics_path):
+            os.remove(os.path.join(api.graphics_path, archivo))
+
+    casos = []
+    # El lifespan ve el dataset ya activo: no limpia ni genera gráficos
+    with TestClient(api.app) as cliente:
+        for ruta in rutas:
+            preparar = borrar_graficos if ruta.startswith('/graphics/') else None
+            estados = set()
+
+            def peticion(ruta=ruta):
+                respuesta = cliente.get(ruta)
+                estados.add(respuesta.status_code)
+                return respuesta
+
+            casos.append({**medir_caso(ruta, filas, peticion, args, preparar), "status": sorted(estados)})
+    return casos
+
+
+CASOS = {
+    "limpieza": casos_limpieza,
+    "data": casos_data,
+    "graficos": casos_graficos,
+    "endpoints": casos_endpoints,
+}
+
+
+# --- Ejecución ------------------------------------------------------------
+
+def ejecutar_grupo(args):
+    """Proceso hijo: ejecuta un grupo a una escala y escribe sus casos en JSON"""
+    sys.path.insert(0, base_dir)
+    from src.processing_data import activar_copy_on_write
+    activar_copy_on_write()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{args.grupo}_{args.escala}x_") as tmp:
+        # Los gráficos se escriben fuera del repositorio y el pool usa hilos
+        # para que los análisis vean el dataset escalado activo en este proceso
+        os.environ['GRAFICOS_DIR'] = os.path.join(tmp, 'graficos')
+        os.environ['POOL_MODO'] = 'thread'
+        os.environ.setdefault('POOL_TIMEOUT', '3600')
+        os.environ.setdefault('API_MODO', 'completo')
+        os.makedirs(os.environ['GRAFICOS_DIR'])
+
+        # Los métodos imprimen DataFrames: se descarta esa salida
+        with contextlib.redirect_stdout(io.StringIO()):
+            casos = CASOS[args.grupo](args.escala, tmp, args)
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss //= 1024
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump({"casos": casos, "rss_max_mb": round(rss / 1024, 1)}, f, ensure_ascii=False)
+
+
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=base_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def medir_todo(args):
+    import pandas as pd
+    import numpy as np
+
+    reporte = {
+        "meta": {
+            "fecha": datetime.datetime.now().isoformat(timespec='seconds'),
+            "commit": commit_actual(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "filas_base": None,
+            "escalas": args.escalas,
+            "grupos": args.grupos,
+            "repeticiones": args.repeticiones,
+            "sintetico": args.sintetico,
+        },
+        "casos": []
+    }
+
+    for escala in args.escalas:
+        for grupo in args.grupos:
+            print(f"⏱️ {grupo} a {escala}x...", flush=True)
+            with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+                salida_hijo = f.name
+            comando = [sys.executable, os.path.abspath(__file__), "_grupo", grupo, str(escala),
+                       "--repeticiones", str(args.repeticiones), "--salida", salida_hijo]
+            if not args.memoria:
+                comando.append("--sin-memoria")
+            if args.sintetico:
+                comando.append("--sintetico")
+            inicio = time.perf_counter()
+            proceso = subprocess.run(comando, cwd=base_dir, capture_output=True, text=True)
+            duracion = time.perf_counter() - inicio
+            try:
+                if proceso.returncode != 0:
+                    error = (proceso.stderr.strip().splitlines() or [f"código {proceso.returncode}"])[-1]
+                    print(f"   ❌ {error}")
+                    reporte["casos"].append({"grupo": grupo, "escala": escala, "caso": "*", "error": error})
+                    continue
+                with open(salida_hijo, encoding='utf-8') as f:
+                    resultado = json.load(f)
+            finally:
+                os.remove(salida_hijo)
+
+            for caso in resultado["casos"]:
+                reporte["casos"].append({"grupo": grupo, "escala": escala, **caso,
+                                         "rss_max_grupo_mb": resultado["rss_max_mb"]})
+                if escala == 1 and reporte["meta"]["filas_base"] is None:
+                    reporte["meta"]["filas_base"] = caso.get("filas")
+            print(f"   ✅ {len(resultado['casos'])} casos en {duracion:.1f} s, "
+                  f"RSS máx {resultado['rss_max_mb']} MB")
+
+    salida = args.salida
+    if salida is None:
+        os.makedirs(resultados_dir, exist_ok=True)
+        marca = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        salida = os.path.join(resultados_dir, f"bench_{marca}_{reporte['meta']['commit'] or 'local'}.json")
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+    imprimir(reporte)
+    print(f"\n💾 Resultados guardados en {salida}")
+
+
+def imprimir(reporte):
+    print("\n" + "=" * 100)
+    print(f"{'grupo':<10} {'escala':>6} {'caso':<45} {'tiempo s':>10} {'pico MB':>9} {'bytes':>12}")
+    print("=" * 100)
+    for c in reporte["casos"]:
+        if "error" in c:
+            print(f"{c['grupo']:<10} {c['escala']:>5}x {c['caso'][:45]:<45} ❌ {c['error'][:60]}")
+            continue
+        pico = '-' if c['memoria_pico_mb'] is None else f"{c['memoria_pico_mb']:.1f}"
+        print(f"{c['grupo']:<10} {c['escala']:>5}x {c['caso'][:45]:<45} "
+              f"{c['tiempo_s']:>10.4f} {pico:>9} {c['tamano_bytes']:>12}")
+
+
+def comparar(args):
+    """Compara dos ejecuciones caso a caso y marca las regresiones de tiempo"""
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding='utf-8') as f:
+        nuevo = json.load(f)
+
+    def indice(reporte):
+        return {(c["grupo"], c["escala"], c["caso"]): c for c in reporte["casos"] if "error" not in c}
+
+    casos_base, casos_nuevo = indice(base), indice(nuevo)
+    print(f"Base:  {base['meta']['fecha']} ({base['meta']['commit']})")
+    print(f"Nuevo: {nuevo['meta']['fecha']} ({nuevo['meta']['commit']})")
+    print("=" * 100)
+    print(f"{'grupo':<10} {'escala':>6} {'caso':<45} {'base s':>9} {'nuevo s':>9} {'cambio':>8} {'Δ pico MB':>10}")
+    print("=" * 100)
+    regresiones = 0
+    for llave in sorted(casos_base.keys() & casos_nuevo.keys()):
+        b, n = casos_base[llave], casos_nuevo[llave]
+        cambio = n["tiempo_s"] / b["tiempo_s"] - 1 if b["tiempo_s"] else 0.0
+        marca = ""
+        if cambio > args.umbral:
+            marca = " ⚠️"
+            regresiones += 1
+        elif cambio < -args.umbral:
+            marca = " 🚀"
+        pico = "-"
+        if b.get("memoria_pico_mb") is not None and n.get("memoria_pico_mb") is not None:
+            pico = f"{n['memoria_pico_mb'] - b['memoria_pico_mb']:+.1f}"
+        grupo, escala, caso = llave
+        print(f"{grupo:<10} {escala:>5}x {caso[:45]:<45} {b['tiempo_s']:>9.4f} {n['tiempo_s']:>9.4f} "
+              f"{cambio:>+7.0%} {pico:>10}{marca}")
+
+    solo_base = casos_base.keys() - casos_nuevo.keys()
+    solo_nuevo = casos_nuevo.keys() - casos_base.keys()
+    if solo_base or solo_nuevo:
+        print(f"\nCasos sin pareja: {len(solo_base)} solo en base, {len(solo_nuevo)} solo en nuevo")
+    print(f"\n{regresiones} regresiones por encima de {args.umbral:.0%}")
+    return 1 if regresiones else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_medir = sub.add_parser("medir", help="Ejecuta la suite y guarda los resultados")
+    p_medir.add_argument("--escalas", type=int, nargs="+", default=ESCALAS)
+    p_medir.add_argument("--grupos", nargs="+", choices=GRUPOS, default=GRUPOS)
+    p_medir.add_argument("--repeticiones", type=int, default=3)
+    p_medir.add_argument("--sin-memoria", dest="memoria", action="store_false",
+                         help="No medir el pico de memoria (evita la ejecución extra con tracemalloc)")
+    p_medir.add_argument("--sintetico", action="store_true",
+                         help="La limpieza se mide sobre respuestas sintéticas en lugar de filas replicadas")
+    p_medir.add_argument("--salida", help="Archivo JSON de resultados (por defecto benchmarks/resultados/)")
+
+    p_comparar = sub.add_parser("comparar", help="Compara dos archivos de resultados")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("nuevo")
+    p_comparar.add_argument("--umbral", type=float, default=0.10,
+                            help="Cambio relativo de tiempo a partir del cual se marca una regresión")
+
+    # Uso interno: un grupo a una escala en un proceso aislado
+    p_grupo = sub.add_parser("_grupo")
+    p_grupo.add_argument("grupo", choices=GRUPOS)
+    p_grupo.add_argument("escala", type=int)
+    p_grupo.add_argument("--repeticiones", type=int, default=3)
+    p_grupo.add_argument("--sin-memoria", dest="memoria", action="store_false")
+    p_grupo.add_argument("--sintetico", action="store_true")
+    p_grupo.add_argument("--salida", required=True)
+
+    args = parser.parse_args()
+    if args.comando == "medir":
+        medir_todo(args)
+    elif args.comando == "comparar":
+        sys.exit(comparar(args))
+    else:
+        ejecutar_grupo(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Configuración de producción: gunicorn como gestor de procesos con workers de uvicorn.
+
+El proceso maestro importa la app (preload_app), limpia y carga el dataset y
+genera los gráficos una sola vez antes de hacer fork de los workers, que
+comparten esa memoria copy-on-write. Uso:
+
+    gunicorn -c gunicorn.conf.py api:app
+    python start_server.py --produccion --workers 4
+"""
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+
+# uvicorn usa uvloop y httptools automáticamente cuando están instalados
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_WORKERS", str(multiprocessing.cpu_count())))
+preload_app = True
+reload = False
+
+# Reciclado gradual de workers: cada uno se reemplaza tras N peticiones
+# (con jitter para no reciclarlos todos a la vez) y termina las que tiene en curso
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "500"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+keepalive = 5
+
+accesslog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+# Cada worker web tiene su propio pool de ejecución; se reduce por defecto
+# para no multiplicar procesos por encima de los núcleos disponibles
+os.environ.setdefault("POOL_WORKERS", "2")
+
+
+def when_ready(server):
+    # Se ejecuta en el maestro, con la app ya importada y antes del fork de los workers
+    import api
+    api.precargar()
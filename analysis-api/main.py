@@ -1,6 +1,8 @@
 from src.graphics import Graphics
+from src.processing_data import activar_copy_on_write
 
 if __name__ == '__main__':
+    activar_copy_on_write()
     graphics = Graphics()
     graphics.grafico_participacion_innovacion_ciiu_genero()
 
@@ -0,0 +1,34 @@
+import hmac
+import os
+
+from fastapi import Header, HTTPException
+
+# Control de acceso de las herramientas de diagnóstico (/admin/*).
+#
+# Sin ADMIN_TOKEN las herramientas quedan deshabilitadas: los endpoints
+# responden 404 y no se instala ningún middleware adicional.
+#
+# Variables de entorno:
+#   ADMIN_TOKEN   secreto compartido; se envía en la cabecera X-Admin-Token
+#                 o en el parámetro ?token= de la URL
+
+TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def habilitado():
+    return bool(TOKEN)
+
+
+def autorizado(valor):
+    """Compara en tiempo constante el valor recibido con ADMIN_TOKEN"""
+    if not TOKEN or not valor:
+        return False
+    return hmac.compare_digest(valor.encode("utf-8"), TOKEN.encode("utf-8"))
+
+
+def verificar(x_admin_token: str | None = Header(None), token: str | None = None):
+    """Dependencia de FastAPI para los endpoints /admin/*"""
+    if not TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not autorizado(x_admin_token or token):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
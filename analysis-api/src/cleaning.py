@@ -1,7 +1,22 @@
 import pandas as pd
+import hashlib
+import io
+import json
 import re
+import sqlite3
+import time
+import tracemalloc
 import unicodedata
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: la limpieza no se serializa entre procesos
+    fcntl = None
+
+from src.status import huella_archivo, version_particiones
 
 df = None
 # Funciones
@@ -20,32 +35,90 @@ def limpiar_df_texto(df):
         df[c] = df[c].map(limpiar_texto)
     return df
 
-def realizar_limpieza():
-    script_dir = os.path.dirname(__file__)
+# Selección de columnas deseadas
+COLUMNAS_DESEADAS = [
+    "ID del envio",
+    "Registre su tipo de empresa organizacion ciudadano",
+    "Provincia",
+    "Genero",
+    "CIIU",
+    "Tiene conocimientos de computacion y navegacion en internet",
+    "Conoce las oportunidades que el IOT (Internet de las cosas) puede aportar en su trabajo y empresa",
+    "Conoce las oportunidades que el IA (Inteligencia artificial) puede aportar en su trabajo y empresa",
+    "Conoce como utilizar herramientas de busqueda avanzada en Internet para mejorar los resultados en funcion de sus necesidades",
+    "Identifica parametros que deben cumplir las paginas web y la informacion online para considerar su confiabilidad y calidad",
+    "Clasifica la informacion mediante archivos y carpetas para facilitar su localizacion posterior",
+    "Conoce o ha utilizado servicios de alojamiento de archivos en la nube",
+    "Ha participado en consultas ciudadanas o encuestas a traves de internet (online) a propuestas de organizaciones publicas o sociales",
+    "Usted sabe como generar un perfil publico, personal o profesional en las Redes Sociales, controlando los detalles de la imagen que quiere transmitir",
+    "Es capaz de utilizar los diferentes medios digitales para exponer de manera creativa esquemas graficos, mapas conceptuales, infografias",
+    "Sabe editar y modificar con herramientas digitales, el formato de diferentes tipos de archivo textos, fotografias, videos",
+    "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion",
+    "Conoce y actua con prudencia cuando recibe mensajes cuyo remitente, contenido o archivo adjunto sea desconocido (SPAM)",
+    "Se interesa en conocer las politicas de privacidad de las plataformas que utiliza en Internet, asi como el tratamiento que hacen de sus datos personales",
+    "Se mantiene informado y actualizado sobre habitos saludables y seguros en el uso de la tecnologia, y los fomenta y los difunde",
+    "Es capaz de evaluar y elegir de manera adecuada un dispositivo, software, aplicacion o servicio para realizar sus tareas",
+    "Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias",
+    "Conoce su nivel de competencia digital e identifica claramente sus carencias con respecto a los requisitos de su entorno laboral",
+    "Edad",
+    "Puntuacion"
+]
 
-    # Crear directorios si no existen
-    new_path = os.path.join(script_dir, '..', 'data','processed')
-    new_path = os.path.abspath(new_path)
+script_dir = os.path.dirname(__file__)
+RAW_DIR = os.path.abspath(os.path.join(script_dir, '..', 'data', 'raw'))
+PROCESSED_DIR = os.path.abspath(os.path.join(script_dir, '..', 'data', 'processed'))
+RAW_PATH = os.path.join(RAW_DIR, '2023.csv')
+PROCESSED_PATH = os.path.join(PROCESSED_DIR, '2023_filtrado_limpio.csv')
 
-    if not os.path.exists(new_path):
-        os.makedirs(new_path, exist_ok=True)
+# Dataset particionado por año: cada export data/raw/<año>.csv se limpia en
+# data/processed/<año>_filtrado_limpio.csv. El manifiesto guarda la huella del
+# raw de cada partición, así solo se vuelve a limpiar lo que cambió; si el raw
+# solo creció al final (envíos nuevos) se limpian y anexan solo esas filas.
+#
+# Un anexo cuesta lo que las filas nuevas, no lo que la historia: un raw con
+# el mismo tamaño y fecha no se lee; que solo creció se reconoce por la cola
+# del tramo ya limpiado (COLA_RAW bytes) y no releyéndolo entero; las huellas
+# del raw y del procesado se encadenan con la de lo anexado; las filas se
+# agregan al final del procesado y los IDs ya vistos se buscan en un índice
+# SQLite junto al CSV (<procesado>.ids). Una edición en medio de un export
+# que además crece no se detecta: /admin/recargar?forzar=true limpia completo.
+#
+# Variables de entorno:
+#   LIMPIEZA_WORKERS   procesos para limpiar varios años en paralelo (por defecto, CPUs)
+PATRON_RAW = re.compile(r'^(\d{4})\.csv$')
+SUFIJO_PROCESADO = '_filtrado_limpio.csv'
+MANIFIESTO = 'manifiesto.json'
+SUFIJO_IDS = '.ids'
+COLA_RAW = 64 * 1024
+WORKERS = int(os.getenv("LIMPIEZA_WORKERS", str(os.cpu_count() or 1)))
 
-    # Cargar el archivo CSV original
-    csv_path = os.path.join(script_dir, '..', 'data', 'raw', '2023.csv')
-    csv_path = os.path.abspath(csv_path)
-    df = pd.read_csv(csv_path)
+# Limpieza por bloques para exports que no caben en memoria: los raw más
+# grandes que LIMPIEZA_BLOQUES_MB se leen y limpian de a LIMPIEZA_FILAS_BLOQUE
+# filas y cada bloque se agrega al procesado, así el pico de memoria depende
+# del tamaño del bloque y no del archivo. Los IDs ya escritos se consultan en
+# el índice SQLite de la partición (<procesado>.ids), no en un set en memoria.
+# El procesado sigue siendo CSV, como el de la limpieza en memoria: es el
+# formato que leen dataset, la ingesta y el anexo, y no hay dependencia de
+# Parquet (pyarrow) en el proyecto.
+#
+# Variables de entorno:
+#   LIMPIEZA_BLOQUES_MB     tamaño del raw desde el que se limpia por bloques (por defecto 256)
+#   LIMPIEZA_FILAS_BLOQUE   filas por bloque (por defecto 50000)
+UMBRAL_BLOQUES = float(os.getenv("LIMPIEZA_BLOQUES_MB", "256")) * 2**20
+FILAS_BLOQUE = int(os.getenv("LIMPIEZA_FILAS_BLOQUE", "50000"))
 
+# Etapas de la limpieza: cada una recibe y retorna el DataFrame
+def normalizar_tipos(df):
     # Convertir todas las columnas a tipo string para un manejo uniforme
     for column in df.columns:
         df[column] = df[column].astype(str)
+    return df
 
-    # Limpiar las cabeceras
+def limpiar_cabeceras(df):
     df.columns = [limpiar_texto(c) for c in df.columns]
+    return df
 
-    # Limpiar el contenido textual
-    df = limpiar_df_texto(df)
-
-    # Estandarizar cabeceras
+def estandarizar_cabeceras(df):
     for c in df.columns:
         if "actividad economica" in c and "CIIU" in c:
             df = df.rename(columns={c: "CIIU"})
@@ -53,49 +126,643 @@ def realizar_limpieza():
     for col in ["Provincia", "Genero", "Edad", "Puntuacion", "ID del envio"]:
         if col in df.columns:
             df = df.rename(columns={col: col})
+    return df
 
-    # # Selección de columnas deseadas
-    columnas_deseadas = [
-        "ID del envio",
-        "Registre su tipo de empresa organizacion ciudadano",
-        "Provincia",
-        "Genero",
-        "CIIU",
-        "Tiene conocimientos de computacion y navegacion en internet",
-        "Conoce las oportunidades que el IOT (Internet de las cosas) puede aportar en su trabajo y empresa",
-        "Conoce las oportunidades que el IA (Inteligencia artificial) puede aportar en su trabajo y empresa",
-        "Conoce como utilizar herramientas de busqueda avanzada en Internet para mejorar los resultados en funcion de sus necesidades",
-        "Identifica parametros que deben cumplir las paginas web y la informacion online para considerar su confiabilidad y calidad",
-        "Clasifica la informacion mediante archivos y carpetas para facilitar su localizacion posterior",
-        "Conoce o ha utilizado servicios de alojamiento de archivos en la nube",
-        "Ha participado en consultas ciudadanas o encuestas a traves de internet (online) a propuestas de organizaciones publicas o sociales",
-        "Usted sabe como generar un perfil publico, personal o profesional en las Redes Sociales, controlando los detalles de la imagen que quiere transmitir",
-        "Es capaz de utilizar los diferentes medios digitales para exponer de manera creativa esquemas graficos, mapas conceptuales, infografias",
-        "Sabe editar y modificar con herramientas digitales, el formato de diferentes tipos de archivo textos, fotografias, videos",
-        "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion",
-        "Conoce y actua con prudencia cuando recibe mensajes cuyo remitente, contenido o archivo adjunto sea desconocido (SPAM)",
-        "Se interesa en conocer las politicas de privacidad de las plataformas que utiliza en Internet, asi como el tratamiento que hacen de sus datos personales",
-        "Se mantiene informado y actualizado sobre habitos saludables y seguros en el uso de la tecnologia, y los fomenta y los difunde",
-        "Es capaz de evaluar y elegir de manera adecuada un dispositivo, software, aplicacion o servicio para realizar sus tareas",
-        "Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias",
-        "Conoce su nivel de competencia digital e identifica claramente sus carencias con respecto a los requisitos de su entorno laboral",
-        "Edad",
-        "Puntuacion"
-    ]
-
-    df = df[[c for c in columnas_deseadas if c in df.columns]]
+def seleccionar_columnas(df):
+    df = df[[c for c in COLUMNAS_DESEADAS if c in df.columns]]
 
     # Establecer índice
     if "ID del envio" in df.columns:
         df = df.set_index("ID del envio")
 
     # Reemplazar todos los NaN con cadena vacía y asegurar tipos consistentes
-    df = df.astype(str).fillna("")
+    return df.astype(str).fillna("")
+
+def deduplicar_envios(df):
+    # Un envío repetido en el export cuenta una sola vez: se conserva el primero
+    return df[~df.index.duplicated()]
+
+ETAPAS = [
+    ("normalizar_tipos", normalizar_tipos),
+    ("limpiar_cabeceras", limpiar_cabeceras),
+    ("limpiar_contenido", limpiar_df_texto),
+    ("estandarizar_cabeceras", estandarizar_cabeceras),
+    ("seleccionar_columnas", seleccionar_columnas),
+    ("deduplicar", deduplicar_envios),
+]
 
-    # Guardar el archivo procesado
-    df.to_csv(f'{new_path}/2023_filtrado_limpio.csv', index=True)
+# Medición de memoria por etapa con tracemalloc (ralentiza la limpieza, por eso es opcional)
+MEDIR_MEMORIA = os.getenv("LIMPIEZA_MEMORIA", "0") == "1"
+
+
+def _medir(informe, nombre, etapa, df, memoria):
+    """Ejecuta una etapa y agrega al informe su tiempo real y de CPU, filas, columnas y pico de memoria"""
+    entrada = df.shape if isinstance(df, pd.DataFrame) else (0, 0)
+    if memoria:
+        tracemalloc.reset_peak()
+    cpu = time.process_time()
+    inicio = time.perf_counter()
+    df = etapa(df)
+    wall = time.perf_counter() - inicio
+    cpu = time.process_time() - cpu
+    salida = df.shape if isinstance(df, pd.DataFrame) else (0, 0)
+    informe["etapas"].append({
+        "etapa": nombre,
+        "wall_s": round(wall, 6),
+        "cpu_s": round(cpu, 6),
+        "filas_entrada": entrada[0],
+        "filas_salida": salida[0],
+        "columnas_entrada": entrada[1],
+        "columnas_salida": salida[1],
+        "memoria_pico_mb": round(tracemalloc.get_traced_memory()[1] / 2**20, 3) if memoria else None,
+    })
+    return df
+
+
+def _guardar(salida):
+    def guardar_csv(df):
+        # Escritura atómica: el procesado puede estar leyéndose (recarga en caliente)
+        df.to_csv(f"{salida}.tmp", index=True)
+        os.replace(f"{salida}.tmp", salida)
+        return df
+    return guardar_csv
+
+
+def limpiar_con_informe(csv_path=None, salida=None, memoria=None):
+    """Como realizar_limpieza, pero retorna (df, informe) con la medición de cada etapa
+
+    El informe incluye lectura, las etapas de ETAPAS y escritura, con tiempo real,
+    tiempo de CPU, filas y columnas de entrada y salida y, si memoria es True (o
+    LIMPIEZA_MEMORIA=1), el pico de memoria asignada por pandas/Python en la etapa.
+    """
+    csv_path = csv_path or RAW_PATH
+    salida = salida or PROCESSED_PATH
+    memoria = MEDIR_MEMORIA if memoria is None else memoria
+    informe = {"origen": csv_path, "salida": salida, "modo": "memoria", "memoria_medida": memoria, "etapas": []}
+
+    # Crear directorios si no existen
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+
+    # Si ya hay una traza activa (p. ej. los benchmarks) se reutiliza y no se detiene
+    iniciar_traza = memoria and not tracemalloc.is_tracing()
+    if iniciar_traza:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        # Cargar el archivo CSV original
+        df = _medir(informe, "leer_csv", lambda _: pd.read_csv(csv_path), None, memoria)
+        informe["tipos"] = _tipos_conservados(df)
+
+        for nombre, etapa in ETAPAS:
+            df = _medir(informe, nombre, etapa, df, memoria)
+
+        # Guardar el archivo procesado
+        df = _medir(informe, "guardar_csv", _guardar(salida), df, memoria)
+    finally:
+        if iniciar_traza:
+            tracemalloc.stop()
+
+    etapas = informe["etapas"]
+    informe.update(
+        filas_entrada=etapas[0]["filas_salida"],
+        filas_salida=len(df),
+        wall_s=round(time.perf_counter() - inicio, 6),
+        cpu_s=round(time.process_time() - cpu, 6),
+        etapa_dominante=max(etapas, key=lambda e: e["wall_s"])["etapa"],
+    )
+    return df, informe
+
+def realizar_limpieza(csv_path=None, salida=None):
+    """Limpia el CSV raw (por defecto data/raw/2023.csv) y guarda el procesado"""
+    df, _ = limpiar_con_informe(csv_path, salida)
     return df
 
 def retornar_dataframe():
     df = realizar_limpieza()
-    return df
\ No newline at end of file
+    return df
+
+
+def _columnas_conservadas(cabecera):
+    """Posiciones de las columnas del raw que sobreviven a la limpieza
+
+    Se aplican las etapas de cabeceras a un DataFrame vacío con la cabecera del
+    archivo, así la selección es la misma que en la limpieza en memoria.
+    """
+    columnas = estandarizar_cabeceras(limpiar_cabeceras(cabecera.iloc[:0].copy())).columns
+    return [i for i, c in enumerate(columnas) if c in COLUMNAS_DESEADAS]
+
+def _tipos_conservados(df):
+    """Tipo inferido por read_csv de cada columna del raw que sobrevive a la limpieza
+
+    Se guarda en el manifiesto para leer después las filas anexadas con los mismos tipos.
+    """
+    return {columna: df[columna].dtype.name for columna in df.columns[_columnas_conservadas(df)]}
+
+def _unificar_tipos(tipos):
+    # Mismo tipo que read_csv infiere con el archivo completo: si los bloques
+    # no coinciden, los numéricos se unifican en float y el resto queda como texto
+    if len(tipos) == 1:
+        return tipos.pop()
+    if all(t.kind in 'iuf' for t in tipos):
+        return 'float64'
+    return object
+
+def _inferir_tipos(csv_path, posiciones, filas_bloque):
+    """Primera pasada por bloques: tipo de cada columna conservada en todo el archivo
+
+    La limpieza convierte los valores a texto según su tipo (113 frente a 113.0),
+    por eso los bloques deben leerse con el tipo del archivo completo.
+    """
+    tipos = {}
+    for bloque in pd.read_csv(csv_path, usecols=posiciones, chunksize=filas_bloque):
+        for columna, tipo in bloque.dtypes.items():
+            tipos.setdefault(columna, set()).add(tipo)
+    return {columna: _unificar_tipos(t) for columna, t in tipos.items()}
+
+def _acumular(etapas, parciales):
+    """Suma a etapas ({nombre: medición}) las mediciones de un bloque"""
+    for parcial in parciales:
+        total = etapas.get(parcial["etapa"])
+        if total is None:
+            etapas[parcial["etapa"]] = dict(parcial)
+            continue
+        for campo in ("wall_s", "cpu_s"):
+            total[campo] = round(total[campo] + parcial[campo], 6)
+        for campo in ("filas_entrada", "filas_salida"):
+            total[campo] += parcial[campo]
+        if parcial["memoria_pico_mb"] is not None:
+            total["memoria_pico_mb"] = max(total["memoria_pico_mb"], parcial["memoria_pico_mb"])
+
+def limpiar_por_bloques(csv_path=None, salida=None, filas_bloque=None, memoria=None):
+    """Limpieza en memoria constante: lee el raw por bloques y agrega cada bloque limpio al procesado
+
+    Produce el mismo archivo que limpiar_con_informe, pero no retorna el
+    DataFrame (no cabe en memoria): retorna solo el informe, con las etapas
+    sumadas sobre todos los bloques y el pico de memoria del peor bloque.
+    Solo se leen las columnas que sobreviven a la selección. Deja además el
+    índice de IDs de la partición, listo para el próximo anexo.
+    """
+    csv_path = csv_path or RAW_PATH
+    salida = salida or PROCESSED_PATH
+    filas_bloque = filas_bloque or FILAS_BLOQUE
+    memoria = MEDIR_MEMORIA if memoria is None else memoria
+    informe = {"origen": csv_path, "salida": salida, "modo": "bloques", "filas_bloque": filas_bloque,
+               "memoria_medida": memoria, "etapas": []}
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+
+    iniciar_traza = memoria and not tracemalloc.is_tracing()
+    if iniciar_traza:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    cpu = time.process_time()
+    etapas = {}
+    bloques = 0
+    filas_salida = 0
+    # Se escribe a un temporal: quien lea el procesado nunca ve un archivo a medias.
+    # IDs ya escritos, en disco: un envío repetido en otro bloque también se descarta
+    temporal = f"{salida}.tmp"
+    indice_temporal = f"{salida}{SUFIJO_IDS}.tmp"
+    if os.path.exists(indice_temporal):
+        os.remove(indice_temporal)
+    indice = sqlite3.connect(indice_temporal, isolation_level=None)
+    try:
+        indice.execute("PRAGMA journal_mode=OFF")
+        indice.execute("CREATE TABLE ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+        indice.execute("CREATE TABLE estado (bytes INTEGER NOT NULL)")
+
+        def descartar_escritos(d):
+            d = d[~d.index.isin(_ids_registrados(indice, d.index))]
+            indice.execute("BEGIN")
+            indice.executemany("INSERT INTO ids VALUES (?)", ((i,) for i in d.index))
+            indice.execute("COMMIT")
+            return d
+
+        posiciones = _columnas_conservadas(pd.read_csv(csv_path, nrows=0))
+        parcial = {"etapas": []}
+        tipos = _medir(parcial, "inferir_tipos",
+                       lambda _: _inferir_tipos(csv_path, posiciones, filas_bloque), None, memoria)
+        _acumular(etapas, parcial["etapas"])
+        informe["tipos"] = {c: pd.api.types.pandas_dtype(t).name for c, t in tipos.items()}
+
+        lector = pd.read_csv(csv_path, usecols=posiciones, dtype=tipos, chunksize=filas_bloque)
+        with open(temporal, 'w', encoding='utf-8', newline='') as archivo:
+            while True:
+                parcial = {"etapas": []}
+                df = _medir(parcial, "leer_csv", lambda _: next(lector, None), None, memoria)
+                if df is None:
+                    _acumular(etapas, parcial["etapas"])
+                    break
+                for nombre, etapa in ETAPAS:
+                    df = _medir(parcial, nombre, etapa, df, memoria)
+                df = _medir(parcial, "deduplicar_bloques", descartar_escritos, df, memoria)
+                primero = bloques == 0
+                df = _medir(parcial, "guardar_csv",
+                            lambda d: (d.to_csv(archivo, header=primero, index=True), d)[1], df, memoria)
+                _acumular(etapas, parcial["etapas"])
+                bloques += 1
+                filas_salida += len(df)
+                del df
+            if bloques == 0:
+                # Raw sin filas: solo la cabecera del procesado
+                df = pd.read_csv(csv_path, usecols=posiciones, nrows=0)
+                for _, etapa in ETAPAS:
+                    df = etapa(df)
+                df.to_csv(archivo, index=True)
+        indice.execute("INSERT INTO estado VALUES (?)", (os.path.getsize(temporal),))
+        indice.close()
+        os.replace(temporal, salida)
+        os.replace(indice_temporal, f"{salida}{SUFIJO_IDS}")
+    finally:
+        indice.close()
+        for archivo in (temporal, indice_temporal):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+        if iniciar_traza:
+            tracemalloc.stop()
+
+    informe["etapas"] = list(etapas.values())
+    informe.update(
+        bloques=bloques,
+        filas_entrada=etapas["leer_csv"]["filas_salida"],
+        filas_salida=filas_salida,
+        wall_s=round(time.perf_counter() - inicio, 6),
+        cpu_s=round(time.process_time() - cpu, 6),
+        etapa_dominante=max(informe["etapas"], key=lambda e: e["wall_s"])["etapa"],
+    )
+    return informe
+
+
+def ruta_particion(anio, processed_dir=None):
+    return os.path.join(processed_dir or PROCESSED_DIR, f"{anio}{SUFIJO_PROCESADO}")
+
+def descubrir_raw(raw_dir=None):
+    """Exports de la encuesta en data/raw: {año: ruta} para los archivos <año>.csv"""
+    raw_dir = raw_dir or RAW_DIR
+    encontrados = {}
+    for nombre in sorted(os.listdir(raw_dir)):
+        coincidencia = PATRON_RAW.match(nombre)
+        if coincidencia:
+            encontrados[int(coincidencia.group(1))] = os.path.join(raw_dir, nombre)
+    return encontrados
+
+def firma_raw(raw_dir=None):
+    """Tamaño y fecha de modificación de cada export de data/raw (solo stat, sin leerlos)"""
+    firma = []
+    for anio, ruta in descubrir_raw(raw_dir).items():
+        info = os.stat(ruta)
+        firma.append((anio, info.st_size, info.st_mtime_ns))
+    return tuple(firma)
+
+def firma_manifiesto(processed_dir=None):
+    """firma_raw de los exports tal como estaban en la última limpieza registrada"""
+    particiones = leer_manifiesto(processed_dir)["particiones"]
+    return tuple(sorted((int(anio), entrada.get("bytes_raw"), entrada.get("mtime_raw"))
+                        for anio, entrada in particiones.items()))
+
+def version_manifiesto(processed_dir=None):
+    """Versión de las particiones registradas en el manifiesto (la que cargaría cualquier worker)"""
+    processed_dir = processed_dir or PROCESSED_DIR
+    return _version(leer_manifiesto(processed_dir)["particiones"], processed_dir)
+
+def leer_manifiesto(processed_dir=None):
+    ruta = os.path.join(processed_dir or PROCESSED_DIR, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {"particiones": {}}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+def _escribir_manifiesto(manifiesto, processed_dir):
+    # Escritura atómica: un proceso que lea el manifiesto nunca ve un archivo a medias
+    ruta = os.path.join(processed_dir, MANIFIESTO)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporal, ruta)
+
+@contextmanager
+def _bloqueo(processed_dir, compartido=False):
+    """Serializa la limpieza entre procesos (p. ej. varios workers web recargando a la vez)"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(processed_dir, '.limpieza.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_SH if compartido else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def lectura(processed_dir=None):
+    """Bloqueo compartido para leer las particiones: un anexo no las modifica mientras se leen"""
+    return _bloqueo(processed_dir or PROCESSED_DIR, compartido=True)
+
+def _huella_cola(ruta, hasta):
+    # Huella de los últimos COLA_RAW bytes antes de hasta
+    desde = max(0, hasta - COLA_RAW)
+    return huella_archivo(ruta, limite=hasta - desde, desde=desde)
+
+def _encadenar(huella, anexo):
+    """Huella de un archivo tras anexarle bytes: la anterior encadenada con la de lo anexado"""
+    return hashlib.sha1(f"{huella}+{anexo}".encode()).hexdigest()[:12]
+
+def solo_anexo(csv_path, salida, previa, tamano=None):
+    """True si desde la última limpieza el raw solo creció al final
+
+    Las primeras bytes_raw bytes deben terminar en un fin de línea, así lo que
+    sigue son filas completas nuevas, y su cola debe tener la huella
+    registrada (cola_raw); sin ella se compara el prefijo completo.
+    """
+    bytes_previos = previa.get("bytes_raw")
+    if not bytes_previos or "tipos" not in previa or not os.path.exists(salida):
+        return False
+    if (tamano or os.path.getsize(csv_path)) <= bytes_previos:
+        return False
+    with open(csv_path, 'rb') as f:
+        f.seek(bytes_previos - 1)
+        if f.read(1) != b'\n':
+            return False
+    if "cola_raw" in previa:
+        return _huella_cola(csv_path, bytes_previos) == previa["cola_raw"]
+    return huella_archivo(csv_path, limite=bytes_previos) == previa["huella_raw"]
+
+def _indice_ids(salida, bytes_procesado):
+    """Conexión al índice de IDs del envio del procesado (<procesado>.ids)
+
+    El índice registra el tamaño del procesado que refleja; si no coincide
+    con bytes_procesado (no existe, o un anexo quedó a medias) se reconstruye
+    leyendo solo la columna de IDs, de a FILAS_BLOQUE filas.
+    """
+    conexion = sqlite3.connect(f"{salida}{SUFIJO_IDS}", isolation_level=None)
+    conexion.execute("CREATE TABLE IF NOT EXISTS ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+    conexion.execute("CREATE TABLE IF NOT EXISTS estado (bytes INTEGER NOT NULL)")
+    fila = conexion.execute("SELECT bytes FROM estado").fetchone()
+    if fila is None or fila[0] != bytes_procesado:
+        conexion.execute("BEGIN")
+        conexion.execute("DELETE FROM ids")
+        conexion.execute("DELETE FROM estado")
+        for bloque in pd.read_csv(salida, usecols=['ID del envio'], dtype=str, keep_default_na=False,
+                                  chunksize=FILAS_BLOQUE):
+            conexion.executemany("INSERT OR IGNORE INTO ids VALUES (?)", ((i,) for i in bloque['ID del envio']))
+        conexion.execute("INSERT INTO estado VALUES (?)", (bytes_procesado,))
+        conexion.execute("COMMIT")
+    return conexion
+
+def _ids_registrados(conexion, ids):
+    """Los ids que ya están en el índice"""
+    ids = list(ids)
+    registrados = set()
+    for i in range(0, len(ids), 500):
+        bloque = ids[i:i + 500]
+        consulta = f"SELECT id FROM ids WHERE id IN ({','.join('?' * len(bloque))})"
+        registrados.update(fila[0] for fila in conexion.execute(consulta, bloque))
+    return registrados
+
+def _leer_anexadas(csv_path, desde, tipos, hasta=None):
+    """Filas del raw entre los bytes desde y hasta, con los tipos que read_csv infirió para el archivo completo
+
+    Retorna None si las filas nuevas cambiarían el tipo de alguna columna
+    (p. ej. texto en una columna numérica): el texto limpio de las filas ya
+    procesadas cambiaría y hay que limpiar completo.
+    """
+    cabecera = pd.read_csv(csv_path, nrows=0)
+    with open(csv_path, 'rb') as f:
+        f.seek(desde)
+        # Solo el tramo registrado: lo que se anexe mientras tanto queda para el próximo anexo
+        tramo = io.BytesIO(f.read() if hasta is None else f.read(hasta - desde))
+        df = pd.read_csv(tramo, header=None, names=list(cabecera.columns),
+                         usecols=_columnas_conservadas(cabecera),
+                         dtype={c: object for c, t in tipos.items() if t == 'object'})
+    for columna, tipo in tipos.items():
+        actual = df[columna].dtype
+        if actual.name == tipo:
+            continue
+        if tipo == 'float64' and actual.kind in 'iuf':
+            df[columna] = df[columna].astype('float64')
+        else:
+            return None
+    return df
+
+def anexar_particion(csv_path, salida, previa, hasta=None, memoria=None):
+    """Limpia solo las filas agregadas al final del raw y las anexa al procesado
+
+    previa es la entrada del manifiesto de la partición (bytes_raw, tipos y
+    tamaño y huella del procesado de la última limpieza). Como en la limpieza
+    completa, cada ID del envio se conserva una sola vez: se descartan las
+    filas cuyo ID ya está en el índice del procesado. El informe trae el
+    tamaño y la huella encadenada del procesado tras el anexo.
+    Retorna (informe, filas anexadas) o None si hay que limpiar completo.
+    """
+    bytes_procesado = previa.get("bytes_procesado", os.path.getsize(salida))
+    if os.path.getsize(salida) != bytes_procesado:
+        # Un anexo anterior quedó a medias
+        return None
+    memoria = MEDIR_MEMORIA if memoria is None else memoria
+    informe = {"origen": csv_path, "salida": salida, "modo": "anexo", "memoria_medida": memoria,
+               "tipos": previa["tipos"], "etapas": []}
+    iniciar_traza = memoria and not tracemalloc.is_tracing()
+    if iniciar_traza:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        try:
+            df = _medir(informe, "leer_csv",
+                        lambda _: _leer_anexadas(csv_path, previa["bytes_raw"], previa["tipos"], hasta), None, memoria)
+        except pd.errors.EmptyDataError:
+            return None
+        if df is None:
+            return None
+        filas_entrada = len(df)
+
+        for nombre, etapa in ETAPAS:
+            df = _medir(informe, nombre, etapa, df, memoria)
+
+        indice = _indice_ids(salida, bytes_procesado)
+        try:
+            df = _medir(informe, "descartar_existentes",
+                        lambda d: d[~d.index.isin(_ids_registrados(indice, d.index))], df, memoria)
+
+            def anexar_csv(d):
+                # Al final del procesado, bajo el bloqueo de la limpieza: los lectores
+                # toman el bloqueo compartido (lectura) y no ven un anexo a medias
+                contenido = d.to_csv(header=False, index=True).encode('utf-8') if len(d) else b''
+                if contenido:
+                    with open(salida, 'ab') as f:
+                        f.write(contenido)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    indice.execute("BEGIN")
+                    indice.executemany("INSERT OR IGNORE INTO ids VALUES (?)", ((i,) for i in d.index))
+                    indice.execute("UPDATE estado SET bytes = ?", (bytes_procesado + len(contenido),))
+                    indice.execute("COMMIT")
+                huella = previa.get("huella_procesado") or huella_archivo(salida, limite=bytes_procesado)
+                informe["bytes_procesado"] = bytes_procesado + len(contenido)
+                informe["huella_procesado"] = (
+                    _encadenar(huella, hashlib.sha1(contenido).hexdigest()[:12]) if contenido else huella)
+                return d
+            df = _medir(informe, "anexar_csv", anexar_csv, df, memoria)
+        finally:
+            indice.close()
+    finally:
+        if iniciar_traza:
+            tracemalloc.stop()
+
+    informe.update(
+        filas_entrada=filas_entrada,
+        filas_salida=len(df),
+        duplicadas=filas_entrada - len(df),
+        wall_s=round(time.perf_counter() - inicio, 6),
+        cpu_s=round(time.process_time() - cpu, 6),
+        etapa_dominante=max(informe["etapas"], key=lambda e: e["wall_s"])["etapa"],
+    )
+    return informe, df
+
+def _limpiar_particion(csv_path, salida, previa=None, hasta=None):
+    # En el pool solo vuelven el informe y, al anexar, las filas nuevas: el resto se lee del CSV procesado.
+    # Con previa el raw ya se reconoció como anexo (solo_anexo) hasta el byte hasta
+    if previa is not None:
+        anexo = anexar_particion(csv_path, salida, previa, hasta)
+        if anexo is not None:
+            return anexo
+    if os.path.getsize(csv_path) > UMBRAL_BLOQUES:
+        return limpiar_por_bloques(csv_path, salida), None
+    _, informe = limpiar_con_informe(csv_path, salida)
+    return informe, None
+
+def _version(particiones, processed_dir):
+    # Misma versión que dataset.cargar_particiones, a partir de las huellas del manifiesto
+    huellas = {}
+    for anio, entrada in particiones.items():
+        if "huella_procesado" not in entrada:
+            entrada["huella_procesado"] = huella_archivo(os.path.join(processed_dir, entrada["procesado"]))
+        huellas[int(anio)] = entrada["huella_procesado"]
+    return version_particiones(huellas) if huellas else None
+
+def limpiar_particiones(raw_dir=None, processed_dir=None, workers=None, forzar=False):
+    """Limpia los años nuevos o modificados de data/raw y actualiza el manifiesto
+
+    Retorna {"limpiados": {año: informe}, "reutilizados": [años], "eliminados": [años],
+    "anexados": {año: filas anexadas}, "version_previa": v, "version": v,
+    "huellas": {año: huella del procesado}}; las versiones son las que
+    dataset.cargar_particiones calcularía antes y después.
+    Si el raw de un año solo creció al final, se limpian y anexan solo las filas
+    nuevas (informe con modo "anexo"); con forzar siempre se limpia completo.
+    Con más de un año pendiente la limpieza se reparte en un pool de procesos.
+    Un solo proceso limpia a la vez; los demás esperan y reutilizan su resultado.
+    """
+    processed_dir = processed_dir or PROCESSED_DIR
+    workers = workers or WORKERS
+    os.makedirs(processed_dir, exist_ok=True)
+    with _bloqueo(processed_dir):
+        return _limpiar_particiones(raw_dir, processed_dir, workers, forzar)
+
+def _limpiar_particiones(raw_dir, processed_dir, workers, forzar):
+    raws = descubrir_raw(raw_dir)
+    manifiesto = leer_manifiesto(processed_dir)
+    particiones = manifiesto["particiones"]
+
+    version_previa = _version(particiones, processed_dir)
+    # Se limpia hasta el tamaño tomado aquí: lo que se anexe mientras tanto
+    # queda para la próxima limpieza
+    estados = {anio: os.stat(ruta) for anio, ruta in raws.items()}
+    tamanos = {anio: info.st_size for anio, info in estados.items()}
+    huellas = {}
+    pendientes = []
+    anexos = set()
+    for anio, ruta in raws.items():
+        entrada = particiones.get(str(anio))
+        procesado = ruta_particion(anio, processed_dir)
+        if forzar or entrada is None or not os.path.exists(procesado):
+            pendientes.append(anio)
+        elif (entrada.get("bytes_raw"), entrada.get("mtime_raw")) == (tamanos[anio], estados[anio].st_mtime_ns):
+            # Mismo tamaño y fecha que en la última limpieza: ni se lee
+            continue
+        elif solo_anexo(ruta, procesado, entrada, tamanos[anio]):
+            pendientes.append(anio)
+            anexos.add(anio)
+        else:
+            huellas[anio] = huella_archivo(ruta, limite=tamanos[anio])
+            if huellas[anio] != entrada.get("huella_raw"):
+                pendientes.append(anio)
+
+    trabajos = [
+        (raws[anio], ruta_particion(anio, processed_dir), particiones[str(anio)] if anio in anexos else None,
+         tamanos[anio])
+        for anio in pendientes
+    ]
+    if len(trabajos) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(trabajos))) as pool:
+            salidas = list(pool.map(_limpiar_particion, *zip(*trabajos)))
+    else:
+        salidas = [_limpiar_particion(*trabajo) for trabajo in trabajos]
+
+    limpiados = {}
+    anexados = {}
+    for anio, (informe, nuevas) in zip(pendientes, salidas):
+        limpiados[anio] = informe
+        filas = informe["filas_salida"]
+        procesado = ruta_particion(anio, processed_dir)
+        if informe["modo"] == "anexo":
+            previa = particiones[str(anio)]
+            anexados[anio] = nuevas
+            filas += previa["filas"]
+            # Huellas encadenadas: solo se leen los bytes anexados
+            huella_raw = _encadenar(previa["huella_raw"], huella_archivo(
+                raws[anio], limite=tamanos[anio] - previa["bytes_raw"], desde=previa["bytes_raw"]))
+            huella_procesado, bytes_procesado = informe["huella_procesado"], informe["bytes_procesado"]
+        else:
+            huella_raw = huellas.get(anio) or huella_archivo(raws[anio], limite=tamanos[anio])
+            huella_procesado, bytes_procesado = huella_archivo(procesado), os.path.getsize(procesado)
+            # La limpieza por bloques deja su índice de IDs; el de la limpieza en
+            # memoria se reconstruye en el próximo anexo
+            if informe["modo"] != "bloques" and os.path.exists(f"{procesado}{SUFIJO_IDS}"):
+                os.remove(f"{procesado}{SUFIJO_IDS}")
+        particiones[str(anio)] = {
+            "raw": os.path.basename(raws[anio]),
+            "huella_raw": huella_raw,
+            "cola_raw": _huella_cola(raws[anio], tamanos[anio]),
+            "bytes_raw": tamanos[anio],
+            "mtime_raw": estados[anio].st_mtime_ns,
+            "tipos": informe["tipos"],
+            "procesado": os.path.basename(procesado),
+            "huella_procesado": huella_procesado,
+            "bytes_procesado": bytes_procesado,
+            "filas": filas,
+            "limpiado": time.time(),
+        }
+
+    # Particiones generadas desde un raw que ya no existe
+    eliminados = sorted(int(anio) for anio in particiones if int(anio) not in raws)
+    for anio in eliminados:
+        ruta = ruta_particion(anio, processed_dir)
+        for archivo in (ruta, f"{ruta}{SUFIJO_IDS}"):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+        del particiones[str(anio)]
+
+    # Un raw reutilizado con otra fecha (p. ej. copiado de nuevo sin cambios) registra
+    # su stat actual: firma_manifiesto vuelve a coincidir con firma_raw. Un
+    # manifiesto anterior sin cola_raw ni bytes_procesado los completa aquí
+    tocados = False
+    for anio in set(raws) - set(pendientes):
+        entrada = particiones[str(anio)]
+        if (entrada.get("bytes_raw"), entrada.get("mtime_raw")) != (tamanos[anio], estados[anio].st_mtime_ns):
+            entrada["bytes_raw"], entrada["mtime_raw"] = tamanos[anio], estados[anio].st_mtime_ns
+            tocados = True
+        if "cola_raw" not in entrada or "bytes_procesado" not in entrada:
+            entrada["cola_raw"] = _huella_cola(raws[anio], tamanos[anio])
+            entrada.setdefault("bytes_procesado", os.path.getsize(ruta_particion(anio, processed_dir)))
+            tocados = True
+
+    if limpiados or eliminados or tocados:
+        _escribir_manifiesto(manifiesto, processed_dir)
+    return {
+        "limpiados": limpiados,
+        "reutilizados": sorted(set(raws) - set(pendientes)),
+        "eliminados": eliminados,
+        "anexados": anexados,
+        "version_previa": version_previa,
+        "version": _version(particiones, processed_dir),
+        "huellas": {int(anio): entrada["huella_procesado"] for anio, entrada in particiones.items()},
+    }
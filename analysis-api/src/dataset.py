@@ -0,0 +1,272 @@
+import os
+import re
+from collections import OrderedDict
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from src import almacen, memory, sharedmem, sqlstore
+from src.cleaning import leer_manifiesto
+from src.processing_data import Data
+from src.status import huella_archivo, version_particiones
+
+# Patrón de las particiones anuales escritas por cleaning.limpiar_particiones
+PATRON_PARTICION = re.compile(r'^(\d{4})_filtrado_limpio\.csv$')
+
+# Selecciones de años que se conservan por Dataset (?year=...)
+MAX_SELECCIONES = 4
+
+
+class Dataset:
+    """Versión cargada del dataset procesado junto a sus instancias de análisis"""
+    def __init__(self, df, df_texto, version=None, tipos=None, directorio=None, data=None, huellas=None):
+        # df conserva los tipos inferidos por read_csv (lo usan los análisis profundos),
+        # df_texto es la salida de la limpieza con todas las columnas como texto.
+        # Con particiones anuales el índice es (Anio, ID del envio).
+        # tipos: {año: {columna: tipo inferido antes del fillna}}, para anexar filas
+        # data: un Data ya construido (se ignora df_texto)
+        # huellas: {año: huella de la partición}, para versionar por año (version_de)
+        self.df = df
+        self.data = data if data is not None else Data(df_texto)
+        self.version = version
+        self.tipos = tipos or {}
+        self.huellas = huellas or {}
+        # Directorio procesado de origen: ahí se publica la versión para el motor SQL
+        self.directorio = directorio
+        self._consultas = None
+        self.anios = sorted(df.index.unique('Anio')) if 'Anio' in df.index.names else []
+        self._graphics = None
+        self._selecciones = OrderedDict()
+
+    @property
+    def graphics(self):
+        # matplotlib y seaborn se importan solo al generar el primer gráfico
+        if self._graphics is None:
+            from src.graphics import Graphics
+            self._graphics = Graphics(self.data)
+        return self._graphics
+
+    @property
+    def analisis(self):
+        """Motor de los análisis de Data: el propio Data (pandas) o, con ANALISIS_MOTOR, consultas SQL"""
+        if self._consultas is None:
+            if sqlstore.MOTOR == "almacen":
+                self._consultas = almacen.consultas(self.version)
+            elif sqlstore.MOTOR == "polars":
+                # polars es opcional: solo se importa con este motor
+                from src import polarsdata
+                self._consultas = polarsdata.motor(self.data)
+            elif sqlstore.habilitado() and self.directorio is not None:
+                self._consultas = sqlstore.Consultas(
+                    sqlstore.Archivo(lambda: sqlstore.publicar(self, self.directorio)))
+        return self._consultas if self._consultas is not None else self.data
+
+    def version_de(self, anios):
+        """Versión de los años pedidos: un resultado filtrado por año no cambia al anexar envíos a otro año"""
+        if anios and all(anio in self.huellas for anio in anios):
+            return version_particiones({anio: self.huellas[anio] for anio in anios})
+        return self.version
+
+    def seleccionar(self, anios):
+        """Dataset con solo las particiones de los años pedidos (poda por partición)
+
+        Las selecciones recientes se conservan para que las peticiones repetidas
+        con el mismo filtro no vuelvan a copiar filas.
+        """
+        anios = tuple(sorted(set(anios)))
+        if not anios or list(anios) == self.anios:
+            return self
+        seleccion = self._selecciones.get(anios)
+        if seleccion is None:
+            mascara = self.df.index.get_level_values('Anio').isin(anios)
+            seleccion = Dataset(self.df[mascara], self.data.df[mascara], self.version)
+            if self.analisis is not self.data:
+                seleccion._consultas = self.analisis.seleccionar(anios)
+            self._selecciones[anios] = seleccion
+            if len(self._selecciones) > MAX_SELECCIONES:
+                self._selecciones.popitem(last=False)
+        else:
+            self._selecciones.move_to_end(anios)
+        return seleccion
+
+
+def _con_anio(df, anio):
+    # Nivel de índice con el año de la partición: invisible en las respuestas
+    # (to_dict no incluye el índice) y usado para podar por año
+    df.index = pd.MultiIndex.from_arrays(
+        [pd.Index([anio] * len(df), name='Anio'), df.index])
+    return df
+
+
+def _anio_de(ruta):
+    coincidencia = PATRON_PARTICION.match(os.path.basename(ruta))
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def _leer(ruta, anio):
+    df = pd.read_csv(ruta, index_col='ID del envio')
+    tipos = {columna: tipo.name for columna, tipo in df.dtypes.items()}
+    df = df.fillna("")
+    df_texto = pd.read_csv(ruta, index_col='ID del envio', dtype=str, keep_default_na=False)
+    if anio is not None:
+        _con_anio(df, anio)
+        _con_anio(df_texto, anio)
+    return df, df_texto, tipos
+
+
+def cargar(ruta, huella=None):
+    """Carga un CSV procesado; si su nombre es <año>_filtrado_limpio.csv se indexa por año"""
+    anio = _anio_de(ruta)
+    df, df_texto, tipos = _leer(ruta, anio)
+    huella = huella or huella_archivo(ruta)
+    return Dataset(df, df_texto, huella, {anio: tipos} if anio is not None else None,
+                   os.path.dirname(ruta), huellas={anio: huella} if anio is not None else None)
+
+
+def particiones(directorio):
+    """Particiones anuales del directorio procesado: {año: ruta}"""
+    encontradas = {}
+    for nombre in sorted(os.listdir(directorio)):
+        anio = _anio_de(nombre)
+        if anio is not None:
+            encontradas[anio] = os.path.join(directorio, nombre)
+    return encontradas
+
+
+def _huellas(directorio, rutas):
+    """{año: huella} de las particiones
+
+    La del manifiesto de la limpieza si sigue describiendo el archivo (mismo
+    tamaño): tras un anexo es una huella encadenada y releer el archivo
+    entero daría otra. Si no, la del contenido.
+    """
+    registradas = leer_manifiesto(directorio)["particiones"]
+    huellas = {}
+    for anio, ruta in rutas.items():
+        entrada = registradas.get(str(anio), {})
+        if entrada.get("huella_procesado") and entrada.get("bytes_procesado") == os.path.getsize(ruta):
+            huellas[anio] = entrada["huella_procesado"]
+        else:
+            huellas[anio] = huella_archivo(ruta)
+    return huellas
+
+
+def cargar_particiones(directorio):
+    """Carga todas las particiones anuales del directorio en un único Dataset"""
+    rutas = particiones(directorio)
+    if not rutas:
+        raise FileNotFoundError(f"No hay particiones procesadas en {directorio}")
+    huellas = _huellas(directorio, rutas)
+    if len(rutas) == 1:
+        anio, ruta = next(iter(rutas.items()))
+        return cargar(ruta, huellas[anio])
+
+    leidas = {anio: _leer(ruta, anio) for anio, ruta in rutas.items()}
+    df = pd.concat([d for d, _, _ in leidas.values()])
+    df_texto = pd.concat([t for _, t, _ in leidas.values()])
+    # Versión: huella combinada de las particiones
+    return Dataset(df, df_texto, version_particiones(huellas),
+                   {anio: tipos for anio, (_, _, tipos) in leidas.items()}, directorio, huellas=huellas)
+
+
+def cargar_almacen(version=None):
+    """Carga una versión (por defecto la última) desde el almacén compartido, sin limpiar ni leer CSV"""
+    version, tabla, tipos = almacen.leer(version)
+    indice = [c for c in ('Anio', 'ID del envio') if c in tabla.columns]
+    df_texto = tabla.set_index(indice)
+    tipados = []
+    for anio, filas in (tabla.groupby('Anio', sort=True) if 'Anio' in tabla.columns else [(None, tabla)]):
+        filas = filas.drop(columns=['Anio'], errors='ignore').set_index('ID del envio')
+        # Los tipos de cada partición, como si se leyera su CSV procesado
+        tipado = _leer_nuevas(filas, tipos[anio]) if anio in tipos else None
+        if tipado is None:
+            tipado = pd.read_csv(StringIO(filas.to_csv()), index_col='ID del envio').fillna("")
+        tipados.append(_con_anio(tipado, anio) if anio is not None else tipado)
+    return Dataset(pd.concat(tipados), df_texto, version, tipos)
+
+
+def adjuntar(carpeta):
+    """Dataset de una instantánea de sharedmem; las columnas de texto quedan como copia privada del worker"""
+    version, df, df_texto, tipos, directorio = sharedmem.adjuntar(carpeta)
+    # La instantánea guarda el DataFrame de Data, con Puntuacion ya numérica:
+    # Data(df_texto) lo volvería a copiar entero
+    data = Data.__new__(Data)
+    data.df = df_texto
+    return Dataset(df, None, version, tipos, directorio, data=data)
+
+
+def _leer_nuevas(texto, tipos):
+    """Filas nuevas con los tipos que read_csv infiere para la partición completa
+
+    Retorna None si las filas cambiarían el tipo de alguna columna: en ese
+    caso hay que leer la partición de nuevo.
+    """
+    df = pd.read_csv(StringIO(texto.to_csv()), index_col='ID del envio',
+                     dtype={c: object for c, t in tipos.items() if t == 'object'})
+    for columna, tipo in tipos.items():
+        actual = df[columna].dtype
+        if actual.name == tipo:
+            continue
+        if tipo == 'float64' and actual.kind in 'iuf':
+            df[columna] = df[columna].astype('float64')
+        else:
+            return None
+    return df.fillna("")
+
+
+def anexar(ds, nuevas, version, huellas=None):
+    """Dataset con las filas anexadas por la limpieza incremental, sin releer las particiones
+
+    nuevas: {año: filas limpias anexadas al CSV procesado}; huellas: {año:
+    huella} de las particiones tras el anexo. El resultado es el mismo que
+    cargar_particiones sobre los archivos actualizados; retorna None si no se
+    puede garantizar (año nuevo o un tipo de columna que cambia).
+    """
+    tipados, textos = [ds.df], [ds.data.df]
+    for anio, filas in nuevas.items():
+        if anio not in ds.tipos:
+            return None
+        if not len(filas):
+            continue
+        # Ida y vuelta por CSV: los valores quedan exactamente como al leer el archivo
+        texto = pd.read_csv(StringIO(filas.to_csv()), index_col='ID del envio', dtype=str, keep_default_na=False)
+        tipado = _leer_nuevas(filas, ds.tipos[anio])
+        if tipado is None:
+            return None
+        tipados.append(_con_anio(tipado, anio))
+        textos.append(_con_anio(texto, anio))
+
+    df = pd.concat(tipados)
+    df_texto = pd.concat(textos)
+    anios = df.index.get_level_values('Anio')
+    if not anios.is_monotonic_increasing:
+        # Las particiones van en orden de año y las filas nuevas al final de la suya
+        orden = np.argsort(anios, kind='stable')
+        df, df_texto = df.take(orden), df_texto.take(orden)
+    return Dataset(df, df_texto, version, ds.tipos, ds.directorio, huellas=huellas)
+
+
+_activo = None
+# Dataset que se está preparando para una generación nueva del pool: los
+# workers creados con fork lo heredan y no tienen que leerlo del disco
+_pendiente = None
+
+
+def activo():
+    return _activo
+
+
+def pendiente():
+    return _pendiente
+
+
+def preparar(ds):
+    global _pendiente
+    _pendiente = ds
+
+
+def activar(ds):
+    global _activo
+    _activo = ds
+    memory.registrar_dataset(ds)
@@ -0,0 +1,381 @@
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from src import almacen, cleaning, dataset, logs, metrics, profiler, recorder, sharedmem, status
+from src.processing_data import activar_copy_on_write
+
+logger = logging.getLogger(__name__)
+
+# Capa de ejecución para los cálculos de pandas y el renderizado de gráficos.
+# El trabajo pesado se envía a un pool de procesos (o de hilos) fuera del
+# threadpool de Starlette; cada ruta tiene su propio límite de concurrencia y
+# una cola acotada: cuando la cola se llena se responde 503 con Retry-After.
+#
+# Variables de entorno:
+#   POOL_MODO          "process" (por defecto) o "thread"
+#   POOL_WORKERS       número de workers del pool
+#   POOL_TIMEOUT       segundos máximos por petición (cola + ejecución)
+#   POOL_CONCURRENCIA  tareas simultáneas por ruta
+#   POOL_COLA          peticiones en espera por ruta antes de responder 503
+#   POOL_LIMITES       JSON con límites por ruta, p. ej. {"/analysis/geografico/deep_analysis": [1, 4]}
+#   POOL_INICIO        cómo arrancan los workers: "fork" (por defecto en Linux), "spawn" o "forkserver"
+#
+# Cada versión del dataset tiene su propio pool (una Generacion). Al recargar
+# el dataset se prepara la generación nueva con los workers ya cargados y se
+# activa de golpe: las peticiones que ya habían entrado terminan en la
+# generación anterior, que cierra su pool cuando no le queda ninguna.
+#
+# Con fork los workers heredan el dataset del proceso web. Con spawn o
+# forkserver no heredan nada: la generación publica su versión en memoria
+# compartida (src/sharedmem.py) y los workers la abren sin volver a leer el
+# CSV ni recibirla serializada; la instantánea se borra al cerrarse la generación.
+# Eso acelera el arranque pero no ahorra memoria: cada worker termina con su
+# propia copia de las columnas de texto. Solo fork comparte el dataset.
+
+MODO = os.getenv("POOL_MODO", "process")
+WORKERS = int(os.getenv("POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+TIMEOUT = float(os.getenv("POOL_TIMEOUT", "60"))
+CONCURRENCIA = int(os.getenv("POOL_CONCURRENCIA", "2"))
+COLA = int(os.getenv("POOL_COLA", "8"))
+LIMITES = json.loads(os.getenv("POOL_LIMITES", "{}"))
+# El primer método de la lista es el de la plataforma
+INICIO = os.getenv("POOL_INICIO") or multiprocessing.get_all_start_methods()[0]
+
+_actual = None
+_generaciones = []
+_limites = {}
+_activos = 0
+
+
+class LimiteRuta:
+    """Semáforo por ruta con cola acotada y estimación del tiempo de espera"""
+    def __init__(self, concurrencia, cola):
+        self.concurrencia = concurrencia
+        self.cola = cola
+        self.pendientes = 0
+        self.duracion_media = 1.0
+        self.semaforo = asyncio.Semaphore(concurrencia)
+
+    def retry_after(self):
+        espera = self.duracion_media * self.pendientes / self.concurrencia
+        return str(max(1, math.ceil(espera)))
+
+    def registrar_duracion(self, segundos):
+        self.duracion_media = 0.8 * self.duracion_media + 0.2 * segundos
+
+
+def _limite(ruta):
+    limite = _limites.get(ruta)
+    if limite is None:
+        concurrencia, cola = LIMITES.get(ruta, (CONCURRENCIA, COLA))
+        limite = _limites[ruta] = LimiteRuta(concurrencia, cola)
+    return limite
+
+
+class Generacion:
+    """Pool de ejecución ligado a una versión del dataset"""
+    def __init__(self, directorio_procesado, ds):
+        self.version = ds.version
+        self.directorio_procesado = directorio_procesado
+        # En modo hilos cada tarea recibe el dataset de su generación;
+        # en modo procesos cada worker carga el suyo al iniciar
+        self.ds = ds if MODO == "thread" else None
+        # Instantánea en memoria compartida para los workers que no heredan el dataset
+        self.compartido = None
+        if MODO != "thread" and INICIO != "fork":
+            self.compartido = sharedmem.publicar(ds)
+        self.pool = self._crear_pool()
+        self.pendientes = 0
+        self.retirada = False
+        self.cerrada = asyncio.Event()
+
+    def _crear_pool(self):
+        if MODO == "thread":
+            return ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="analisis")
+        return ProcessPoolExecutor(
+            max_workers=WORKERS,
+            mp_context=multiprocessing.get_context(INICIO),
+            initializer=_inicializar_worker,
+            initargs=(self.directorio_procesado, self.version, self.compartido)
+        )
+
+    def reconstruir(self, pool):
+        """Reemplaza un pool roto (un worker murió) por uno nuevo con la misma versión
+
+        Recibe el pool en que falló la tarea: si otra petición ya lo reemplazó
+        no se vuelve a crear.
+        """
+        if self.pool is not pool or self.cerrada.is_set():
+            return
+        logger.warning("♻️ Pool de la versión %s roto (un worker terminó inesperadamente): se recrea", self.version)
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = self._crear_pool()
+        metrics.pool_reconstrucciones.inc()
+
+    def entrar(self):
+        self.pendientes += 1
+
+    def salir(self):
+        self.pendientes -= 1
+        self._cerrar_si_libre()
+
+    def retirar(self):
+        """Deja de recibir peticiones; el pool se cierra al terminar las que ya tenía"""
+        self.retirada = True
+        self._cerrar_si_libre()
+
+    def _cerrar_si_libre(self):
+        if self.retirada and self.pendientes == 0 and not self.cerrada.is_set():
+            # Sin esperar: las tareas ya enviadas (p. ej. de peticiones expiradas) terminan igual
+            self.pool.shutdown(wait=False)
+            self.ds = None
+            self._liberar_compartido()
+            self.cerrada.set()
+            _generaciones.remove(self)
+            _actualizar_estado()
+
+    def _liberar_compartido(self):
+        if self.compartido is not None:
+            sharedmem.liberar(self.compartido)
+            self.compartido = None
+
+
+def _inicializar_worker(directorio_procesado, version, compartido=None):
+    # Con fork el worker hereda el dataset y el logging del proceso padre (durante
+    # una recarga, el dataset que se está preparando); con spawn o forkserver abre
+    # la instantánea en memoria compartida de su generación
+    logs.configurar()
+    activar_copy_on_write()
+    ds = dataset.activo()
+    if ds is None or ds.version != version:
+        pendiente = dataset.pendiente()
+        if pendiente is not None and pendiente.version == version:
+            dataset.activar(pendiente)
+        elif compartido is not None:
+            dataset.activar(dataset.adjuntar(compartido))
+        elif almacen.replica():
+            dataset.activar(dataset.cargar_almacen(version))
+        else:
+            with cleaning.lectura(directorio_procesado):
+                dataset.activar(dataset.cargar_particiones(directorio_procesado))
+
+
+def _version(ds):
+    return ds.version
+
+
+def _tarea(funcion, args, serializar, anios=None, ds=None):
+    """Ejecuta funcion(dataset, *args) dentro del worker; retorna (resultado, cálculo, serialización)
+
+    ds es el dataset de la generación en modo hilos; en un proceso del pool se
+    usa el dataset activo del worker. Con anios el cálculo recibe solo las
+    particiones de esos años.
+    """
+    inicio = time.perf_counter()
+    ds = ds or dataset.activo()
+    if anios:
+        ds = ds.seleccionar(anios)
+    resultado = funcion(ds, *args)
+    duracion = time.perf_counter() - inicio
+    if serializar:
+        # Misma codificación que JSONResponse, pero fuera del event loop
+        resultado = json.dumps(
+            jsonable_encoder(resultado),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":")
+        ).encode("utf-8")
+    return resultado, duracion, time.perf_counter() - inicio - duracion
+
+
+def _actualizar_estado():
+    status.actualizar(render_pool={
+        "modo": MODO,
+        "inicio": INICIO if MODO != "thread" else None,
+        "workers": WORKERS,
+        "activos": _activos,
+        "version": _actual.version if _actual is not None else None,
+        "generaciones": len(_generaciones),
+    })
+
+
+def iniciar(directorio_procesado):
+    """Crea el pool de ejecución; se llama desde el lifespan con el dataset ya activo"""
+    global _actual
+    if MODO != "thread" and INICIO != "fork":
+        sharedmem.depurar()
+    _actual = Generacion(directorio_procesado, dataset.activo())
+    _generaciones.append(_actual)
+    _actualizar_estado()
+
+
+async def preparar(directorio_procesado, ds):
+    """Crea la generación de una versión nueva del dataset con sus workers ya cargados
+
+    Se envía una tarea por worker para que todos arranquen y carguen el
+    dataset antes de activar la generación; si alguno cargó otra versión (los
+    archivos cambiaron de nuevo) la generación se descarta.
+    """
+    dataset.preparar(ds)
+    # Fuera del event loop: con spawn o forkserver la generación escribe la instantánea compartida
+    try:
+        generacion = await asyncio.to_thread(Generacion, directorio_procesado, ds)
+    except BaseException:
+        dataset.preparar(None)
+        raise
+    _generaciones.append(generacion)
+    bucle = asyncio.get_running_loop()
+    try:
+        salidas = await asyncio.gather(*(
+            bucle.run_in_executor(generacion.pool, _tarea, _version, (), False, None, generacion.ds)
+            for _ in range(1 if MODO == "thread" else WORKERS)
+        ))
+        cargadas = {resultado for resultado, _, _ in salidas}
+        if cargadas != {ds.version}:
+            raise RuntimeError(f"Los workers cargaron {sorted(cargadas)} en lugar de {ds.version}")
+    except BaseException:
+        generacion.retirar()
+        raise
+    finally:
+        dataset.preparar(None)
+    _actualizar_estado()
+    return generacion
+
+
+def activar(generacion):
+    """Envía las peticiones nuevas a la generación indicada; retorna la anterior, ya retirada"""
+    global _actual
+    anterior, _actual = _actual, generacion
+    if anterior is not None:
+        anterior.retirar()
+    _actualizar_estado()
+    return anterior
+
+
+def detener(esperar=False):
+    global _actual, _limites
+    for generacion in list(_generaciones):
+        generacion.pool.shutdown(wait=esperar, cancel_futures=not esperar)
+        generacion._liberar_compartido()
+    _generaciones.clear()
+    _actual = None
+    # Los semáforos quedan ligados al event loop en que se usaron
+    _limites = {}
+
+
+async def ejecutar(ruta, funcion, *args, serializar=False, anios=None, generacion=None):
+    """Ejecuta funcion(dataset, *args) en el pool respetando los límites de la ruta
+
+    Por defecto usa la generación activa al llegar la petición, aunque el
+    dataset se recargue mientras espera; generacion permite calentar una
+    versión que aún no está activa.
+    """
+    generacion = generacion or _actual
+    limite = _limite(ruta)
+    if limite.pendientes >= limite.concurrencia + limite.cola:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Servidor ocupado procesando {ruta}, intente más tarde",
+            headers={"Retry-After": limite.retry_after()}
+        )
+
+    limite.pendientes += 1
+    generacion.entrar()
+    try:
+        return await asyncio.wait_for(
+            _ejecutar_con_limite(limite, generacion, funcion, args, serializar, anios), TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Tiempo de espera agotado procesando {ruta}"
+        )
+    finally:
+        limite.pendientes -= 1
+        generacion.salir()
+
+
+async def _ejecutar_con_limite(limite, generacion, funcion, args, serializar, anios):
+    llegada = time.perf_counter()
+    await limite.semaforo.acquire()
+    inicio = time.perf_counter()
+    perfil = profiler.actual()
+    pool = generacion.pool
+    try:
+        if perfil is None:
+            futuro = asyncio.get_running_loop().run_in_executor(
+                pool, _tarea, funcion, args, serializar, anios, generacion.ds)
+        else:
+            # Petición perfilada: el worker muestrea su propio hilo durante la tarea
+            futuro = asyncio.get_running_loop().run_in_executor(
+                pool, profiler.perfilar, profiler.INTERVALO, _tarea, funcion, args, serializar, anios,
+                generacion.ds)
+    except BaseException as e:
+        # Sin futuro no hay callback que libere el hueco
+        limite.semaforo.release()
+        if isinstance(e, BrokenProcessPool):
+            generacion.reconstruir(pool)
+            raise _pool_roto() from e
+        raise
+    _cambiar_activos(1)
+
+    def _terminar(_):
+        # El hueco se libera cuando el worker termina, aunque la petición ya haya expirado
+        _cambiar_activos(-1)
+        limite.semaforo.release()
+
+    futuro.add_done_callback(_terminar)
+    try:
+        salida = await asyncio.shield(futuro)
+    except BrokenProcessPool as e:
+        generacion.reconstruir(pool)
+        raise _pool_roto() from e
+    if perfil is not None:
+        salida, pilas = salida
+        perfil.agregar(pilas, f"pool;{funcion.__name__}")
+    resultado, duracion, serializacion = salida
+    total = time.perf_counter() - inicio
+    limite.registrar_duracion(total)
+    metrics.registrar_tarea(funcion, args, duracion)
+    traza = recorder.actual()
+    if traza is not None:
+        traza.tramo("cola_pool", inicio - llegada)
+        traza.tramo("render" if funcion.__name__ == "grafico" else "calculo", duracion)
+        if serializar:
+            traza.tramo("serializacion", serializacion)
+        # Envío de argumentos y resultado entre procesos y espera del worker
+        traza.tramo("transferencia_pool", max(0.0, total - duracion - serializacion))
+    return resultado
+
+
+def _pool_roto():
+    return HTTPException(
+        status_code=503,
+        detail="Un worker del pool terminó inesperadamente; reintente",
+        headers={"Retry-After": "1"}
+    )
+
+
+def activos():
+    return _activos
+
+
+def procesos():
+    """Pids de los workers de los pools de procesos, incluidas las generaciones que terminan (vacío en modo hilos)"""
+    return [pid for generacion in _generaciones if isinstance(generacion.pool, ProcessPoolExecutor)
+            for pid in (generacion.pool._processes or {})]
+
+
+def _cambiar_activos(delta):
+    global _activos
+    _activos += delta
+    _actualizar_estado()
@@ -3,19 +3,42 @@ matplotlib.use('Agg')  # Backend no interactivo
 
 import matplotlib.pyplot as plt
 import os
+import threading
 import seaborn as sns
 import pandas as pd
 
 from src.processing_data import Data
 from matplotlib.colors import LinearSegmentedColormap
 
+# pyplot guarda la figura actual en un estado global del proceso: con
+# POOL_MODO=thread varios hilos del pool renderizan a la vez, así que cada
+# gráfico se dibuja con este lock tomado (en un worker de procesos no hay espera)
+PYPLOT = threading.Lock()
+
+
+def _guardar(ruta):
+    """Guarda la figura actual con escritura atómica: quien sirve el PNG nunca lee uno a medias"""
+    # Temporal en el mismo directorio, así os.replace es un rename
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        plt.savefig(temporal, format='png', dpi=300, bbox_inches='tight')
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
 class Graphics:
-    def __init__(self):
-        self.data = Data()
+    def __init__(self, data=None, directorio=None):
+        self.data = Data() if data is None else data
+        # Directorio de salida; por defecto GRAFICOS_DIR (p. ej. otro al calentar una recarga)
+        self.directorio = directorio
     
     def generar_direccion(self):
+        if self.directorio:
+            # No se crea: si la recarga ya publicó y borró el directorio, un render tardío falla
+            return self.directorio
         script_dir = os.path.dirname(__file__)
-        new_path = os.path.join(script_dir, '..', 'graphics')
+        new_path = os.getenv('GRAFICOS_DIR') or os.path.join(script_dir, '..', 'graphics')
         new_path = os.path.abspath(new_path)
 
         if not os.path.exists(new_path):
@@ -46,7 +69,7 @@ class Graphics:
         plt.tight_layout()
 
         ruta_guardado = os.path.join(self.generar_direccion(), 'grafico_provincia.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
 
@@ -78,7 +101,7 @@ class Graphics:
         plt.tight_layout()
         
         ruta_guardado = os.path.join(self.generar_direccion(), 'grafico_edad.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
 
@@ -111,7 +134,7 @@ class Graphics:
         plt.tight_layout()
 
         ruta_guardado = os.path.join(self.generar_direccion(), 'grafico_empresa.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
 
@@ -156,7 +179,7 @@ class Graphics:
         plt.tight_layout()
         
         ruta_guardado = os.path.join(self.generar_direccion(), 'grafico_tecnologias_si_no.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
 
@@ -176,7 +199,7 @@ class Graphics:
         plt.tight_layout()
         
         ruta_guardado = os.path.join(self.generar_direccion(), 'grafico_participacion_innovacion_ciiu_genero.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
 
@@ -221,7 +244,7 @@ class Graphics:
         plt.suptitle("Conocimientos y oportunidades digitales por sector (CIIU)", fontsize=16, y=1.02)
         
         ruta_guardado = os.path.join(self.generar_direccion(), 'dashboard_competencia_digital_ciiu.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
                 
@@ -262,7 +285,7 @@ class Graphics:
         plt.tight_layout()
 
         ruta_guardado = os.path.join(self.generar_direccion(), 'correlacion_competencias.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
 
@@ -295,7 +318,7 @@ class Graphics:
         plt.tight_layout()
         
         ruta_guardado = os.path.join(self.generar_direccion(), 'boxplot_edad_por_respuesta.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
 
@@ -340,6 +363,6 @@ class Graphics:
         plt.tight_layout()
         
         ruta_guardado = os.path.join(self.generar_direccion(), 'radar_deficiencias_edad.png')
-        plt.savefig(ruta_guardado, format='png', dpi=300, bbox_inches='tight')
+        _guardar(ruta_guardado)
         plt.close()
         return ruta_guardado
\ No newline at end of file
@@ -0,0 +1,303 @@
+import hmac
+import io
+import json
+import os
+import tempfile
+
+import pandas as pd
+from fastapi import Header, HTTPException
+
+from src.cleaning import (COLUMNAS_DESEADAS, PATRON_RAW, PROCESSED_DIR, _bloqueo, _columnas_conservadas, _ids_registrados,
+                          _indice_ids, estandarizar_cabeceras, leer_manifiesto, limpiar_cabeceras, limpiar_texto,
+                          ruta_particion)
+
+# Ingesta de envíos por lotes (POST /envios).
+#
+# Un lote llega como JSON (lista de objetos), JSON por líneas o CSV; el cuerpo
+# se recibe por partes en un archivo temporal que pasa a disco si es grande.
+# Las cabeceras se normalizan con limpiar_texto y el mismo mapeo de columnas
+# que la limpieza, y los valores con limpiar_texto. Cada regla de dominio se
+# evalúa sobre columnas completas (isin, to_numeric, between): solo se recorren
+# en Python las filas rechazadas, para armar sus errores.
+#
+# Las filas aceptadas se agregan en una sola escritura al final del export
+# data/raw/<año>.csv, con la cabecera del export; la recarga incremental
+# (limpieza por anexo) las incorpora al dataset sin bloquear las lecturas.
+# El dataset activo de un worker puede no tener aún los envíos de un lote
+# anterior (la recarga corre en segundo plano y los demás workers la ven
+# hasta SINCRONIZAR_INTERVALO_S después): bajo el lock de la limpieza, los IDs
+# del lote se comparan además con los que ya están escritos en el export.
+#
+# Variables de entorno:
+#   INGESTA_TOKEN    secreto de los socios de campo; se envía en X-Ingesta-Token
+#                    (sin él el endpoint responde 404)
+#   INGESTA_MAX_MB   tamaño máximo del cuerpo de un lote (por defecto 50)
+
+TOKEN = os.getenv("INGESTA_TOKEN", "")
+MAXIMO_BYTES = float(os.getenv("INGESTA_MAX_MB", "50")) * 2**20
+
+# El cuerpo se mantiene en memoria hasta este tamaño; luego pasa a disco
+EN_MEMORIA = 8 * 2**20
+
+TIPOS_CONTENIDO = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+ID = "ID del envio"
+OBLIGATORIAS = [ID, "Puntuacion"]
+
+# Preguntas de competencias: entre CIIU y Edad
+COLUMNAS_SI_NO = COLUMNAS_DESEADAS[COLUMNAS_DESEADAS.index("CIIU") + 1:COLUMNAS_DESEADAS.index("Edad")]
+
+EDAD_MIN, EDAD_MAX = 10, 100
+# "Máxima Puntuación" del formulario
+PUNTUACION_MIN, PUNTUACION_MAX = 0, 326
+
+# Dominios ya normalizados con limpiar_texto
+DOMINIOS = {
+    "Registre su tipo de empresa organizacion ciudadano": {
+        "Artesanos", "Ciudadano", "Gobierno", "Grandes empresas e industria", "Microempresarios",
+        "Organizacion de Economia Popular y Solidaria", "Pyme",
+    },
+    "Provincia": {
+        "Azuay", "Bolivar", "Canar", "Carchi", "Chimborazo", "Cotopaxi", "El Oro", "Esmeraldas", "Galapagos",
+        "Guayas", "Imbabura", "Loja", "Los Rios", "Manabi", "Morona-Santiago", "Napo", "Orellana", "Pastaza",
+        "Pichincha", "Santa Elena", "Santo Domingo de los Tsachilas", "Sucumbios", "Tungurahua",
+        "Zamora-Chinchipe",
+    },
+    "Genero": {"Femenino", "Masculino", "Otro", "Prefiero no decir"},
+    # Secciones de la CIIU 4.0 tal como aparecen en la encuesta
+    "CIIU": {
+        "Agricultura, ganaderia y pesca.",
+        "Explotacion de minas y canteras.",
+        "Industrias manufactureras.",
+        "Suministro de electricidad, gas, vapor y aire acondicionado.",
+        "Distribucion de agua; alcantarillado, gestion de desechos y actividades de saneamiento.",
+        "Construccion.",
+        "Comercio al por mayor y al por menor; reparacion de vehiculos automotores y motocicletas.",
+        "Transporte y almacenamiento.",
+        "Actividades de alojamiento y de servicio de comida.",
+        "Informacion y comunicacion.",
+        "Actividades financieras y de seguros.",
+        "Actividades inmobiliarias.",
+        "Actividades profesionales, cientificas y tecnicas.",
+        "Actividades de servicios administrativos y de apoyo.",
+        "Administracion publica y defensa; planes de seguridad social de afiliacion obligatoria.",
+        "Ensenanza.",
+        "Actividades de atencion de la salud humana y de asistencia social.",
+        "Artes, entretenimiento y recreacion.",
+        "Otras actividades de servicios.",
+        "Actividades de los hogares como empleadores; actividades no diferenciadas de los hogares como "
+        "productores de bienes y servicios para uso propio.",
+        "Actividades de organizaciones y organos extraterritoriales.",
+    },
+}
+
+
+class LoteInvalido(Exception):
+    """El lote completo no se puede procesar (formato, columnas obligatorias)"""
+
+
+def verificar(x_ingesta_token: str | None = Header(None)):
+    """Dependencia de FastAPI para POST /envios"""
+    if not TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_ingesta_token or not hmac.compare_digest(x_ingesta_token.encode("utf-8"), TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Token de ingesta inválido")
+
+
+def formato(content_type):
+    """Formato del lote según Content-Type, o None si no se acepta"""
+    return TIPOS_CONTENIDO.get((content_type or "").split(";")[0].strip().lower())
+
+
+async def recibir(stream):
+    """Lee el cuerpo por partes en un archivo temporal; 413 si supera INGESTA_MAX_MB"""
+    archivo = tempfile.SpooledTemporaryFile(max_size=EN_MEMORIA)
+    total = 0
+    async for parte in stream:
+        total += len(parte)
+        if total > MAXIMO_BYTES:
+            archivo.close()
+            raise HTTPException(status_code=413, detail=f"El lote supera {MAXIMO_BYTES / 2**20:g} MB")
+        archivo.write(parte)
+    archivo.seek(0)
+    return archivo
+
+
+def leer_lote(archivo, formato):
+    """DataFrame de texto con una fila por envío y las columnas tal como llegaron"""
+    try:
+        if formato == "csv":
+            # Solo las columnas que conserva la limpieza, con los mismos valores
+            # faltantes (NA, N/A, ...) que al leer el export
+            posiciones = _columnas_conservadas(pd.read_csv(archivo, nrows=0))
+            archivo.seek(0)
+            df = pd.read_csv(archivo, dtype=str, usecols=posiciones)
+        elif formato == "ndjson":
+            df = pd.read_json(archivo, lines=True, dtype=False)
+        else:
+            envios = json.load(archivo)
+            if isinstance(envios, dict):
+                envios = envios.get("envios")
+            if not isinstance(envios, list) or not all(isinstance(e, dict) for e in envios):
+                raise LoteInvalido("Se esperaba una lista de envíos (objetos JSON)")
+            df = pd.DataFrame.from_records(envios)
+    except (ValueError, UnicodeDecodeError, pd.errors.ParserError) as e:
+        raise LoteInvalido(f"No se pudo leer el lote: {e}")
+    # Nulos de JSON a vacío y todo a texto, como en un CSV
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+
+def normalizar(df):
+    """Mismas cabeceras y valores que produce la limpieza: solo quedan las columnas deseadas"""
+    df = estandarizar_cabeceras(limpiar_cabeceras(df))
+    df = df.loc[:, ~df.columns.duplicated()]
+    faltan = [c for c in OBLIGATORIAS if c not in df.columns]
+    if faltan:
+        raise LoteInvalido(f"Faltan columnas obligatorias: {faltan}")
+    df = df.reindex(columns=COLUMNAS_DESEADAS, fill_value="")
+    for c in df.columns:
+        # Las respuestas se repiten mucho: limpiar_texto se aplica una vez por valor distinto
+        codigos, valores = pd.factorize(df[c])
+        df[c] = pd.Index(valores.map(limpiar_texto)).take(codigos) if len(valores) else df[c]
+    # "si", "SI" o "Sí" valen como Si
+    for c in COLUMNAS_SI_NO:
+        df[c] = df[c].str.capitalize()
+    return df.reset_index(drop=True)
+
+
+def _entero(serie):
+    numeros = pd.to_numeric(serie, errors="coerce")
+    return numeros, numeros.notna() & (numeros == numeros.round())
+
+
+def validar(df, existentes):
+    """Separa las filas válidas de las rechazadas
+
+    existentes: IDs del envío ya registrados (índice del dataset activo). Un
+    ID anexado por otro lote que aún no llegó al dataset lo descarta después
+    la limpieza, que conserva el primer envío de cada ID.
+    Retorna (aceptadas, rechazadas) con rechazadas = [{"fila", "id", "errores"}];
+    fila es la posición del envío en el lote, desde 1.
+    """
+    errores = {}
+
+    ids, ids_enteros = _entero(df[ID])
+    errores["ID del envio debe ser un entero positivo"] = ~(ids_enteros & (ids > 0))
+    errores["ID del envio repetido en el lote"] = ids_enteros & ids.duplicated()
+    errores["ID del envio ya registrado"] = ids_enteros & ids.isin(existentes)
+
+    puntuacion, puntuacion_entera = _entero(df["Puntuacion"])
+    errores[f"Puntuacion debe ser un entero entre {PUNTUACION_MIN} y {PUNTUACION_MAX}"] = ~(
+        puntuacion_entera & puntuacion.between(PUNTUACION_MIN, PUNTUACION_MAX))
+
+    edad = pd.to_numeric(df["Edad"], errors="coerce")
+    errores[f"Edad debe estar entre {EDAD_MIN} y {EDAD_MAX}"] = (df["Edad"] != "") & ~edad.between(EDAD_MIN, EDAD_MAX)
+
+    for columna, dominio in DOMINIOS.items():
+        errores[f"{columna}: valor desconocido"] = (df[columna] != "") & ~df[columna].isin(dominio)
+    for columna in COLUMNAS_SI_NO:
+        errores[f"{columna}: se esperaba Si o No"] = (df[columna] != "") & ~df[columna].isin(("Si", "No"))
+
+    mascaras = pd.DataFrame(errores)
+    invalidas = mascaras.any(axis=1)
+    rechazadas = [
+        {"fila": int(i) + 1, "id": df.at[i, ID], "errores": [regla for regla, falla in fila.items() if falla]}
+        for i, fila in mascaras[invalidas].iterrows()
+    ]
+    aceptadas = df[~invalidas].copy()
+    aceptadas[ID] = ids[~invalidas].astype("int64")
+    aceptadas["Puntuacion"] = puntuacion[~invalidas].astype("int64")
+    return aceptadas, rechazadas
+
+
+def _ids_en_export(ids, ruta_raw, posicion_id, processed_dir):
+    """Los ids (texto) que ya están escritos en el export; se llama con el lock de la limpieza
+
+    Las filas que la última limpieza incorporó se buscan en el índice de IDs
+    de la partición; las que se anexaron después (desde bytes_raw del
+    manifiesto), leyendo solo la columna de IDs de ese tramo del export.
+    """
+    anio = PATRON_RAW.match(os.path.basename(ruta_raw)).group(1)
+    previa = leer_manifiesto(processed_dir)["particiones"].get(anio, {})
+    salida = ruta_particion(anio, processed_dir)
+    registrados, desde = set(), 0
+    bytes_previos = previa.get("bytes_raw")
+    if bytes_previos and os.path.exists(salida) and bytes_previos <= os.path.getsize(ruta_raw):
+        with open(ruta_raw, "rb") as f:
+            f.seek(bytes_previos - 1)
+            limpio = f.read(1) == b"\n"
+        bytes_procesado = previa.get("bytes_procesado", os.path.getsize(salida))
+        if limpio and os.path.getsize(salida) == bytes_procesado:
+            indice = _indice_ids(salida, bytes_procesado)
+            try:
+                registrados = _ids_registrados(indice, ids)
+            finally:
+                indice.close()
+            desde = bytes_previos
+    with open(ruta_raw, "rb") as f:
+        f.seek(desde)
+        tramo = f.read()
+    if tramo.strip():
+        columna = pd.read_csv(io.BytesIO(tramo), header=None if desde else 0, usecols=[posicion_id], dtype=str,
+                              keep_default_na=False).iloc[:, 0]
+        registrados |= set(ids) & set(columna.str.strip())
+    return registrados
+
+
+def anexar_raw(aceptadas, ruta_raw, processed_dir=None):
+    """Agrega las filas aceptadas al final del export en una sola escritura
+
+    Las filas se escriben con la cabecera del export (las columnas que la
+    limpieza descarta quedan vacías). Se toma el lock de la limpieza: ninguna
+    limpieza lee el export a medias, y dos lotes con los mismos IDs no se
+    anexan ambos. Retorna el índice de las filas descartadas porque su ID ya
+    estaba en el export.
+    """
+    processed_dir = processed_dir or PROCESSED_DIR
+    cabecera = pd.read_csv(ruta_raw, nrows=0)
+    posiciones = _columnas_conservadas(cabecera)
+    limpias = estandarizar_cabeceras(limpiar_cabeceras(cabecera.iloc[:0].copy())).columns
+    filas = pd.DataFrame("", index=aceptadas.index, columns=range(len(cabecera.columns)))
+    for posicion in posiciones:
+        filas[posicion] = aceptadas[limpias[posicion]]
+    ids = aceptadas[ID].astype(str)
+
+    with _bloqueo(processed_dir):
+        registrados = _ids_en_export(ids.tolist(), ruta_raw, list(limpias).index(ID), processed_dir)
+        repetidas = ids.index[ids.isin(registrados)]
+        texto = filas.drop(repetidas).to_csv(header=False, index=False, lineterminator="\n").encode("utf-8")
+        if len(repetidas) == len(filas):
+            return repetidas
+        with open(ruta_raw, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    texto = b"\n" + texto
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+    return repetidas
+
+
+def ingerir(archivo, formato, ruta_raw, existentes, processed_dir=None):
+    """Lee, normaliza, valida y anexa un lote; corre en un hilo, fuera del event loop"""
+    try:
+        lote = normalizar(leer_lote(archivo, formato))
+    finally:
+        archivo.close()
+    aceptadas, rechazadas = validar(lote, existentes)
+    if len(aceptadas):
+        repetidas = anexar_raw(aceptadas, ruta_raw, processed_dir)
+        if len(repetidas):
+            rechazadas = sorted(rechazadas + [
+                {"fila": int(i) + 1, "id": int(aceptadas.at[i, ID]), "errores": ["ID del envio ya registrado"]}
+                for i in repetidas
+            ], key=lambda r: r["fila"])
+            aceptadas = aceptadas.drop(repetidas)
+    return {"recibidas": len(lote), "aceptadas": len(aceptadas), "rechazadas": rechazadas}
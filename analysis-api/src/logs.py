@@ -0,0 +1,66 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging de la API con niveles y escritura fuera del hilo de la petición.
+#
+# Los módulos usan logging.getLogger(__name__) con formato perezoso
+# (logger.debug("...%s", df)): el mensaje solo se construye si el nivel está
+# activo, así los volcados de DataFrames no cuestan nada por encima de DEBUG.
+# Los registros se encolan con un QueueHandler y un QueueListener en un hilo
+# aparte hace la escritura a stdout.
+#
+# Variables de entorno:
+#   LOG_LEVEL   nivel de los loggers de la API (por defecto "info")
+
+NIVEL = os.getenv("LOG_LEVEL", "info").upper()
+FORMATO = "%(asctime)s %(levelname)-7s [%(process)d] %(name)s: %(message)s"
+
+# Loggers raíz de los módulos de la API (api.py y el paquete src)
+LOGGERS = ("api", "src")
+
+_listener = None
+
+
+def configurar():
+    """Conecta los loggers de la API a la cola y arranca el hilo que escribe"""
+    global _listener
+    if _listener is not None:
+        return
+    cola = queue.SimpleQueue()
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(logging.Formatter(FORMATO))
+    _listener = QueueListener(cola, salida, respect_handler_level=True)
+    for nombre in LOGGERS:
+        logger = logging.getLogger(nombre)
+        logger.handlers[:] = [QueueHandler(cola)]
+        logger.setLevel(NIVEL)
+        logger.propagate = False
+    _listener.start()
+
+
+def detener():
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _reiniciar_en_hijo():
+    # El hilo del listener no sobrevive a fork (workers de gunicorn y del pool):
+    # el hijo crea su propia cola para no acumular registros que nadie escribe
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configurar()
+
+
+# Escribe los registros pendientes al terminar el proceso
+atexit.register(detener)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_en_hijo)
@@ -0,0 +1,157 @@
+import os
+import time
+import weakref
+
+from src import metrics
+
+# Contabilidad de memoria para GET /admin/memoria.
+#
+# Nada se recorre completo en cada consulta:
+#   - el uso profundo por columna de cada DataFrame se mide una vez y se
+#     reutiliza mientras no cambien sus filas, columnas o tipos;
+#   - cada caché mantiene sus propios contadores de entradas y bytes al
+#     insertar y desalojar, y aquí solo se leen (registrar_cache);
+#   - el almacén de gráficos se lee con un scandir del directorio;
+#   - la memoria de los workers del pool se lee de /proc.
+#
+# Cada Dataset activado queda referenciado débilmente: si una versión anterior
+# sigue viva tras una recarga aparece como retenida (fuga de memoria).
+
+_datasets = []
+_liberados = 0
+_medidas = {}
+_caches = {}
+_artefactos = {}
+_pool = None
+
+
+def medir_df(df):
+    """Uso profundo por columna de un DataFrame; se recalcula solo si cambió su forma o sus tipos"""
+    firma = (len(df), tuple(df.columns), tuple(df.dtypes))
+    clave = id(df)
+    medida = _medidas.get(clave)
+    if medida is not None and medida[0] == firma:
+        return medida[1]
+
+    inicio = time.perf_counter()
+    uso = df.memory_usage(deep=True, index=True)
+    resultado = {
+        "filas": len(df),
+        "bytes": int(uso.sum()),
+        "indice_bytes": int(uso["Index"]),
+        "columnas": {str(c): int(b) for c, b in uso.drop("Index").sort_values(ascending=False).items()},
+        "medido_en_s": round(time.perf_counter() - inicio, 6),
+    }
+    if medida is None:
+        # La medida se descarta cuando el DataFrame se libera (y su id puede reutilizarse)
+        weakref.finalize(df, _medidas.pop, clave, None)
+    _medidas[clave] = (firma, resultado)
+    return resultado
+
+
+def registrar_dataset(ds):
+    """Empieza a contabilizar un Dataset; se llama al activarlo"""
+    _datasets.append((ds.version, time.time(), weakref.ref(ds, _liberado)))
+
+
+def _liberado(_):
+    global _liberados
+    _liberados += 1
+
+
+def registrar_cache(nombre, uso):
+    """uso() retorna {"entradas": n, "bytes": b} a partir de contadores que mantiene la caché"""
+    _caches[nombre] = uso
+
+
+def registrar_artefactos(nombre, directorio):
+    _artefactos[nombre] = directorio
+
+
+def registrar_pool(procesos):
+    """procesos() retorna los pids de los workers del pool (vacío en modo hilos)"""
+    global _pool
+    _pool = procesos
+
+
+def _componentes(ds):
+    # Los DataFrames que comparten objeto se cuentan una vez
+    componentes = {}
+    vistos = {}
+    candidatos = [("df", ds.df), ("data.df", ds.data.df)]
+    if ds._graphics is not None:
+        candidatos.append(("graphics.data.df", ds._graphics.data.df))
+    for nombre, df in candidatos:
+        if id(df) in vistos:
+            componentes[nombre] = {"compartido_con": vistos[id(df)], "bytes": 0}
+            continue
+        vistos[id(df)] = nombre
+        componentes[nombre] = medir_df(df)
+    return componentes
+
+
+def _directorio(ruta):
+    archivos, total = 0, 0
+    try:
+        with os.scandir(ruta) as entradas:
+            for entrada in entradas:
+                if entrada.is_file():
+                    archivos += 1
+                    total += entrada.stat().st_size
+    except FileNotFoundError:
+        pass
+    return {"ruta": ruta, "archivos": archivos, "bytes": total}
+
+
+def informe(activo=None, extra=None):
+    """Reparto de la memoria del proceso entre datasets, cachés, artefactos y pool
+
+    extra: DataFrames sueltos {nombre: df} (p. ej. el df global de api.py); los
+    que son el mismo objeto que un DataFrame del dataset activo no suman.
+    """
+    vivos = [(version, fecha, ref()) for version, fecha, ref in _datasets]
+    _datasets[:] = [d for d, (_, _, ds) in zip(_datasets, vivos) if ds is not None]
+
+    datasets = []
+    ids_activo = set()
+    for version, fecha, ds in vivos:
+        if ds is None:
+            continue
+        componentes = _componentes(ds)
+        if ds is activo:
+            ids_activo = {id(ds.df), id(ds.data.df)}
+        datasets.append({
+            "version": version,
+            "activo": ds is activo,
+            "activado": fecha,
+            "bytes": sum(c["bytes"] for c in componentes.values()),
+            "componentes": componentes,
+        })
+
+    sueltos = {}
+    for nombre, df in (extra or {}).items():
+        if df is None:
+            continue
+        if id(df) in ids_activo:
+            sueltos[nombre] = {"compartido_con": "dataset activo", "bytes": 0}
+        else:
+            sueltos[nombre] = medir_df(df)
+
+    caches = {nombre: uso() for nombre, uso in _caches.items()}
+    artefactos = {nombre: _directorio(ruta) for nombre, ruta in _artefactos.items()}
+
+    workers = [{"pid": pid, "rss_bytes": metrics.rss_bytes(pid)} for pid in (_pool() if _pool else [])]
+
+    return {
+        "proceso": {"pid": os.getpid(), "rss_bytes": metrics.rss_bytes()},
+        "datasets": datasets,
+        "datasets_retenidos": sum(1 for d in datasets if not d["activo"]),
+        "datasets_liberados": _liberados,
+        "dataframes_sueltos": sueltos,
+        "caches": caches,
+        "artefactos": artefactos,
+        "render_pool": {
+            "workers": workers,
+            "rss_bytes": sum(w["rss_bytes"] or 0 for w in workers),
+        },
+    }
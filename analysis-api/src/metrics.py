@@ -0,0 +1,236 @@
+import os
+import resource
+import sys
+import time
+from bisect import bisect_left
+
+# Métricas en formato de exposición de Prometheus para GET /metrics.
+#
+# Todas las observaciones ocurren en el hilo del event loop (middleware,
+# callbacks del pool de ejecución, lifespan), así que los contadores son
+# listas de números sin locks. Cada serie se crea la primera vez que aparece
+# su etiqueta; a partir de ahí registrar es una búsqueda en un dict y la
+# suma sobre un elemento de la lista, sin asignar memoria por petición.
+#
+# Con varios workers de gunicorn cada proceso expone sus propias métricas.
+
+BUCKETS_PETICION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BUCKETS_CALCULO = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres, valores):
+    return ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores))
+
+
+class Contador:
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self._series = {}
+
+    def serie(self, *valores):
+        """Lista [valor] de una combinación de etiquetas, creada una sola vez"""
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [0]
+        return serie
+
+    def inc(self, *valores, n=1):
+        self.serie(*valores)[0] += n
+
+    def exponer(self, tipo="counter"):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {tipo}"]
+        for valores, serie in self._series.items():
+            etiquetas = f"{{{_etiquetas(self.etiquetas, valores)}}}" if valores else ""
+            lineas.append(f"{self.nombre}{etiquetas} {serie[0]}")
+        return lineas
+
+
+class Gauge(Contador):
+    def fijar(self, *valores, valor):
+        self.serie(*valores)[0] = valor
+
+    def exponer(self):
+        return super().exponer("gauge")
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, etiquetas, buckets):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self.buckets = buckets
+        self._series = {}
+
+    def serie(self, *valores):
+        """[conteo por bucket..., conteo +Inf, suma] de una combinación de etiquetas"""
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [0] * (len(self.buckets) + 1) + [0.0]
+        return serie
+
+    def observar(self, segundos, *valores):
+        serie = self.serie(*valores)
+        serie[bisect_left(self.buckets, segundos)] += 1
+        serie[-1] += segundos
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, serie in self._series.items():
+            base = _etiquetas(self.etiquetas, valores)
+            sep = "," if base else ""
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, serie):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{{{base}{sep}le="{limite}"}} {acumulado}')
+            acumulado += serie[len(self.buckets)]
+            lineas.append(f'{self.nombre}_bucket{{{base}{sep}le="+Inf"}} {acumulado}')
+            etiquetas = f"{{{base}}}" if base else ""
+            lineas.append(f"{self.nombre}_sum{etiquetas} {serie[-1]}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {acumulado}")
+        return lineas
+
+
+# --- Métricas de la API ---------------------------------------------------
+
+peticiones = Histograma("http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta",
+                        ("route",), BUCKETS_PETICION)
+respuestas = Contador("http_responses_total", "Respuestas HTTP por ruta y clase de código", ("route", "code"))
+en_curso = Gauge("http_requests_in_flight", "Peticiones HTTP en curso")
+
+calculos = Histograma("analysis_compute_seconds", "Duración de los análisis dentro del pool de ejecución",
+                      ("funcion",), BUCKETS_CALCULO)
+renders = Histograma("chart_render_seconds", "Duración del renderizado por método de Graphics",
+                     ("metodo",), BUCKETS_CALCULO)
+cache = Contador("cache_requests_total", "Accesos a caché por caché y resultado (hit/miss)", ("cache", "resultado"))
+
+dataset_etapas = Gauge("dataset_stage_seconds", "Duración de la última carga del dataset por etapa", ("etapa",))
+dataset_filas = Gauge("dataset_rows", "Filas del dataset activo")
+dataset_info = Gauge("dataset_info", "Versión del dataset activo", ("version",))
+
+limpieza_wall = Gauge("cleaning_stage_seconds", "Tiempo real de cada etapa de la última limpieza por año",
+                      ("anio", "etapa"))
+limpieza_cpu = Gauge("cleaning_stage_cpu_seconds", "Tiempo de CPU de cada etapa de la última limpieza por año",
+                     ("anio", "etapa"))
+limpieza_filas = Gauge("cleaning_stage_rows", "Filas de entrada y salida de cada etapa de la última limpieza por año",
+                       ("anio", "etapa", "sentido"))
+limpieza_memoria = Gauge("cleaning_stage_peak_bytes",
+                         "Pico de memoria asignada (tracemalloc) en cada etapa de la última limpieza por año",
+                         ("anio", "etapa"))
+dataset_particiones = Gauge("dataset_partitions", "Particiones anuales del dataset activo")
+recargas = Contador("dataset_reloads_total", "Recargas del dataset por resultado (activada, sin_cambios, error)",
+                    ("resultado",))
+ingesta = Contador("submissions_ingested_total",
+                   "Envíos recibidos en POST /envios por resultado (aceptada, rechazada) y lotes inválidos",
+                   ("resultado",))
+pool_reconstrucciones = Contador("analysis_pool_rebuilds_total",
+                                 "Pools de ejecución recreados porque un worker terminó inesperadamente")
+
+REGISTRO = [peticiones, respuestas, en_curso, calculos, renders, cache, dataset_etapas, dataset_filas, dataset_info,
+            limpieza_wall, limpieza_cpu, limpieza_filas, limpieza_memoria, dataset_particiones, recargas, ingesta,
+            pool_reconstrucciones]
+
+# Resultado de la última limpieza (cleaning.limpiar_particiones), para GET /metrics/limpieza
+informe_limpieza = None
+
+# Valores leídos en el momento del scrape: nombre -> (ayuda, función)
+_funciones = {}
+
+CLASES_CODIGO = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+def funcion(nombre, ayuda, fn):
+    """Gauge cuyo valor se obtiene llamando a fn() en cada scrape"""
+    _funciones[nombre] = (ayuda, fn)
+
+
+def registrar_tarea(funcion_tarea, args, segundos):
+    """Duración de una tarea del pool: render por método de Graphics o cálculo por función"""
+    if funcion_tarea.__name__ == "grafico" and args:
+        renders.observar(segundos, args[0])
+    else:
+        calculos.observar(segundos, funcion_tarea.__name__)
+
+
+def registrar_dataset(version, filas, particiones=1, **etapas):
+    """Versión, filas, particiones y duración de las etapas (limpieza, carga) del dataset activado"""
+    dataset_info._series.clear()
+    dataset_info.fijar(version, valor=1)
+    dataset_filas.fijar(valor=filas)
+    dataset_particiones.fijar(valor=particiones)
+    for etapa, segundos in etapas.items():
+        dataset_etapas.fijar(etapa, valor=round(segundos, 6))
+
+
+def registrar_limpieza(resultado):
+    """Publica el informe por etapa de cada año limpiado en la última limpieza"""
+    global informe_limpieza
+    # De las filas anexadas solo se publican los años: los DataFrames no son JSON
+    informe_limpieza = {**resultado, "anexados": sorted(resultado.get("anexados", {}))}
+    for anio, informe in resultado["limpiados"].items():
+        for etapa in informe["etapas"]:
+            nombre = etapa["etapa"]
+            limpieza_wall.fijar(anio, nombre, valor=etapa["wall_s"])
+            limpieza_cpu.fijar(anio, nombre, valor=etapa["cpu_s"])
+            limpieza_filas.fijar(anio, nombre, "entrada", valor=etapa["filas_entrada"])
+            limpieza_filas.fijar(anio, nombre, "salida", valor=etapa["filas_salida"])
+            if etapa["memoria_pico_mb"] is not None:
+                limpieza_memoria.fijar(anio, nombre, valor=int(etapa["memoria_pico_mb"] * 2**20))
+
+
+def rss_bytes(pid="self"):
+    """Memoria residente actual de un proceso (del propio: máxima alcanzada fuera de Linux)"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if pid != "self":
+            return None
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+funcion("process_resident_memory_bytes", "Memoria residente del proceso", rss_bytes)
+
+
+def exponer():
+    lineas = []
+    for metrica in REGISTRO:
+        lineas.extend(metrica.exponer())
+    for nombre, (ayuda, fn) in _funciones.items():
+        lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge", f"{nombre} {fn()}"]
+    return ("\n".join(lineas) + "\n").encode("utf-8")
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: latencia por plantilla de ruta, clase de código y peticiones en curso"""
+    def __init__(self, app):
+        self.app = app
+        self._en_curso = en_curso.serie()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        codigo = 500
+
+        async def enviar(mensaje):
+            nonlocal codigo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+            await send(mensaje)
+
+        self._en_curso[0] += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self._en_curso[0] -= 1
+            # FastAPI deja la ruta resuelta en el scope: se etiqueta por plantilla
+            # ("/filter/{column}/{value}") para acotar la cardinalidad
+            ruta = scope.get("route")
+            plantilla = ruta.path if ruta is not None else "sin_ruta"
+            peticiones.observar(duracion, plantilla)
+            respuestas.inc(plantilla, CLASES_CODIGO[min(codigo // 100, 5) - 1])
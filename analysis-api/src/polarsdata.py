@@ -0,0 +1,159 @@
+import threading
+
+import pandas as pd
+import polars as pl
+
+from src.processing_data import (COLUMNAS_CORRELACION, COLUMNAS_EMPRESA, COLUMNAS_TECNOLOGICAS, CIIU_DASHBOARD,
+                                 CIIU_PARTICIPACION, ITEMS_RADAR, PREGUNTA_FUNDAMENTOS, PREGUNTA_INNOVACION)
+from src.sqlstore import _data, correlacion_de_cubo, genero_edad_de_cubo, participacion_de_cubo
+
+# Motor Polars para los análisis de Data (ANALISIS_MOTOR=polars).
+#
+# Cada análisis es un plan diferido (LazyFrame) sobre el DataFrame de Polars
+# de la versión: el filtro por año y los filtros de cada análisis se empujan
+# hasta el origen y solo se materializan las columnas que usa el plan; el
+# motor ejecuta los group-by en paralelo con su propio pool de hilos. Los
+# resultados (pequeños) se terminan en pandas con las mismas funciones que el
+# motor SQL, así la salida es la de Data; tools/paridad.py lo verifica.
+#
+# El DataFrame de Polars se arma en la primera consulta de cada proceso: el
+# pool de hilos de Polars no sobrevive a un fork, por eso nunca se arma en el
+# proceso que crea los workers del pool de ejecución.
+#
+# polars es una dependencia opcional: solo se importa con ANALISIS_MOTOR=polars.
+
+GENEROS = ['Femenino', 'Masculino']
+
+
+def _pandas(df):
+    # Sin pyarrow: columnas numéricas con to_numpy y el resto como listas de Python
+    return pd.DataFrame({
+        nombre: serie.to_numpy() if serie.dtype.is_numeric() else serie.to_list()
+        for nombre, serie in zip(df.columns, df.get_columns())
+    })
+
+
+class Marco:
+    """DataFrame de Polars de una versión del dataset, compartido por sus selecciones"""
+    def __init__(self, data):
+        self.data = data
+        self._marco = None
+        self._lock = threading.Lock()
+
+    def obtener(self):
+        with self._lock:
+            if self._marco is None:
+                # Índice (Anio, ID del envio) como columnas; el orden de las filas se conserva
+                self._marco = pl.from_pandas(self.data.df.reset_index())
+            return self._marco
+
+
+class DataPolars:
+    """Los análisis de Data como planes diferidos de Polars"""
+    def __init__(self, marco, anios=None):
+        self.marco = marco
+        self.filtro_anios = tuple(anios) if anios else None
+
+    def seleccionar(self, anios):
+        """Mismos análisis limitados a los años indicados"""
+        return DataPolars(self.marco, anios)
+
+    def _plan(self, *filtros):
+        plan = self.marco.obtener().lazy()
+        if self.filtro_anios:
+            plan = plan.filter(pl.col('Anio').is_in(list(self.filtro_anios)))
+        for filtro in filtros:
+            plan = plan.filter(filtro)
+        return plan
+
+    def _indice(self):
+        return [c for c in ('Anio', 'ID del envio') if c in self.marco.obtener().columns]
+
+    def columnas(self):
+        """Columnas en el orden del DataFrame de Data"""
+        return [c for c in self.marco.obtener().columns if c not in ('Anio', 'ID del envio')]
+
+    def _filas(self, columnas, *filtros):
+        """Filas con solo las columnas pedidas, en el orden original e indexadas como en Data"""
+        indice = self._indice()
+        df = _pandas(self._plan(*filtros).select(indice + columnas).collect())
+        return df.set_index(indice) if indice else df
+
+    def anios(self):
+        if 'Anio' not in self._indice():
+            return []
+        return self._plan().select(pl.col('Anio').unique().sort()).collect()['Anio'].to_list()
+
+    def puntuacion_por_anio(self):
+        # Suma y conteo en Polars, división en pandas: mismo redondeo que la media de Data
+        df = _pandas(self._plan().group_by('Anio').agg(
+            pl.len().cast(pl.Int64).alias('Registros'), pl.col('Puntuacion').sum().alias('suma'),
+        ).sort('Anio').collect())
+        df['Puntuacion'] = (df.pop('suma') / df['Registros']).round(2)
+        return df
+
+    def provincia_puntuacion(self):
+        df = _pandas(self._plan().group_by('Provincia').agg(
+            pl.col('Puntuacion').sum().alias('suma'), pl.len().alias('n'),
+        ).sort('Provincia').collect())
+        df['Puntuacion'] = df.pop('suma') / df.pop('n')
+        return df
+
+    def genero_puntuacion_edad(self):
+        return genero_edad_de_cubo(_pandas(self._plan().group_by('Genero', 'Edad').agg(
+            pl.col('Puntuacion').sum().alias('suma'), pl.len().cast(pl.Int64).alias('n'),
+        ).collect()))
+
+    def empresa_competencia(self):
+        empresa, entorno = COLUMNAS_EMPRESA
+        return _pandas(self._plan().group_by(empresa).agg(
+            (pl.col(entorno) == 'Si').sum().cast(pl.Int64).alias('Si'),
+            (pl.col(entorno) == 'No').sum().cast(pl.Int64).alias('No'),
+        ).sort(empresa).rename({empresa: 'Empresa'}).collect())
+
+    def tecnologias_si_no(self):
+        columnas = [c for c in COLUMNAS_TECNOLOGICAS if c in self.columnas()]
+        if not columnas:
+            return pd.DataFrame([])
+        conteos = self._plan().select([
+            (pl.col(c) == respuesta).sum().cast(pl.Int64).alias(f'{i}_{respuesta}')
+            for i, c in enumerate(columnas) for respuesta in ('Si', 'No')
+        ]).collect().row(0)
+        return pd.DataFrame([
+            {'Pregunta': c, 'Si': conteos[2 * i], 'No': conteos[2 * i + 1]} for i, c in enumerate(columnas)
+        ])
+
+    def participacion_innovacion_ciiu_genero(self):
+        plan = self._plan(pl.col('Genero').is_in(GENEROS), pl.col('CIIU').is_in(list(CIIU_PARTICIPACION)))
+        return participacion_de_cubo(_pandas(plan.group_by(PREGUNTA_INNOVACION, 'CIIU', 'Genero').agg(
+            pl.len().cast(pl.Int64).alias('n'),
+        ).rename({PREGUNTA_INNOVACION: 'respuesta'}).collect()))
+
+    def dashboard_competencia_digital_ciiu(self):
+        df = self._filas(self.columnas(), pl.col('Genero').is_in(GENEROS),
+                         pl.col('CIIU').is_in(list(CIIU_DASHBOARD)))
+        return _data(df).dashboard_competencia_digital_ciiu()
+
+    def correlacion_data(self):
+        banderas = [
+            pl.col(c).str.strip_chars().str.to_lowercase().is_in(['si', 'sí']).cast(pl.Int64).alias(f'c{i}')
+            for i, c in enumerate(COLUMNAS_CORRELACION)
+        ]
+        nombres = [f'c{i}' for i in range(len(banderas))]
+        # Orden fijo de las combinaciones, como en el motor SQL
+        return correlacion_de_cubo(_pandas(self._plan().select(banderas).group_by(nombres).agg(
+            pl.len().cast(pl.Int64).alias('n'),
+        ).sort(nombres).collect()))
+
+    def edad_fundamentos_digitales(self):
+        return _data(self._filas([PREGUNTA_FUNDAMENTOS, "Edad"])).edad_fundamentos_digitales()
+
+    def radar_deficiencias_edad(self):
+        fragmentos = [t.lower() for t in ITEMS_RADAR] + ["edad"]
+        columnas = [c for c in self.columnas() if any(f in c.lower() for f in fragmentos)]
+        return _data(self._filas(columnas)).radar_deficiencias_edad()
+
+
+def motor(data):
+    """DataPolars de la versión completa de un Data"""
+    return DataPolars(Marco(data))
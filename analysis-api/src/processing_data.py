@@ -1,47 +1,178 @@
+import logging
+
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
 from src.cleaning import retornar_dataframe
 
+logger = logging.getLogger(__name__)
+
+# Copy-on-write: self.df[columnas] y los filtros son vistas perezosas que solo
+# copian una columna cuando el método la modifica. Cada método trabaja sobre
+# la proyección de las columnas que usa y nunca escribe en self.df, así que
+# el snapshot es inmutable y seguro entre peticiones concurrentes.
+# La opción es global de pandas: no se activa al importar este módulo sino
+# en cada punto de entrada (api.py, los workers del pool, tools/, benchmarks/).
+def activar_copy_on_write():
+    """Activa copy-on-write en pandas, del que dependen los resultados de Data"""
+    pd.set_option("mode.copy_on_write", True)
+
+
+# Columnas, mapas y rangos de los análisis; los comparten los motores
+# alternativos (src.sqlstore) para producir exactamente el mismo resultado
+RANGOS_EDAD = [0, 12, 18, 30, 60, 100]
+ETIQUETAS_EDAD = ['0-12', '12-18', '18-30', '30-60', '+60']
+
+COLUMNAS_EMPRESA = {
+    'Registre su tipo de empresa organizacion ciudadano': 'Empresa',
+    'Conoce su nivel de competencia digital e identifica claramente sus carencias con respecto a los requisitos de su entorno laboral': 'Entorno'
+}
+
+COLUMNAS_TECNOLOGICAS = [
+    'Conoce las oportunidades que el IOT (Internet de las cosas) puede aportar en su trabajo y empresa',
+    'Conoce las oportunidades que el IA (Inteligencia artificial) puede aportar en su trabajo y empresa',
+    'Conoce o ha utilizado servicios de alojamiento de archivos en la nube',
+    'Ha participado en consultas ciudadanas o encuestas a traves de internet (online) a propuestas de organizaciones publicas o sociales',
+    'Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias'
+]
+
+PREGUNTA_INNOVACION = "Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias"
+
+CIIU_PARTICIPACION = {
+    'Actividades de los hogares como empleadores, actividades no diferenciadas de los hogares': 'Ac0',
+    'Actividades de alojamiento y de servicio de comida.': 'Ac1',
+    'Actividades de atencion de la salud humana y de asistencia social.': 'Ac2',
+    'Como productores de bienes y servicios para uso propio.': 'Ac3',
+    'Actividades de organizaciones y organos extraterritoriales.': 'Ac4',
+    'Actividades de servicios administrativos y de apoyo.': 'Ac5',
+    'Actividades financieras y de seguros.': 'Ac6',
+    'Actividades inmobiliarias.': 'Ac7',
+    'Actividades profesionales, cientificas y tecnicas.': 'Ac8',
+    'Agricultura, ganadería y pesca.': 'Ac9',
+    'Artes, entretenimiento y recreacion.': 'Ac10',
+    'Comercio al por mayor y al por menor, reparacion de vehiculos automotores y motocicletas.': 'Ac11',
+    'Construccion.': 'Ac12',
+    'Ensenanza.': 'Ac13',
+    'Industrias manufactureras.': 'Ac14',
+    'Informacion y comunicacion.': 'Ac15',
+    'Otras actividades de servicios.': 'Ac16',
+    'Suministro de electricidad, gas, vapor y aire acondicionado.': 'Ac17',
+    'Transporte y almacenamiento.': 'Ac18'
+}
+ORDEN_CIIU_PARTICIPACION = ['Ac1', 'Ac2', 'Ac3', 'Ac4', 'Ac5', 'Ac6', 'Ac7', 'Ac8', 'Ac9', 'Ac10',
+                            'Ac11', 'Ac12', 'Ac13', 'Ac14', 'Ac15', 'Ac16', 'Ac17', 'Ac18']
+
+PREGUNTAS_COMPETENCIA = [
+    "Tiene conocimientos de computacion y navegacion en internet",
+    "Conoce las oportunidades que el IOT (Internet de las cosas) puede aportar en su trabajo y empresa",
+    "Conoce las oportunidades que el IA (Inteligencia artificial) puede aportar en su trabajo y empresa",
+    "Conoce como utilizar herramientas de busqueda avanzada en Internet para mejorar los resultados en funcion de sus necesidades",
+    "Identifica parametros que deben cumplir las paginas web y la informacion online para considerar su confiabilidad y calidad",
+    "Clasifica la informacion mediante archivos y carpetas para facilitar su localizacion posterior",
+    "Conoce o ha utilizado servicios de alojamiento de archivos en la nube",
+    "Ha participado en consultas ciudadanas o encuestas a traves de internet (online) a propuestas de organizaciones publicas o sociales",
+    "Usted sabe como generar un perfil publico, personal o profesional en las Redes Sociales, controlando los detalles de la imagen que quiere transmitir",
+    "Es capaz de utilizar los diferentes medios digitales para exponer de manera creativa esquemas graficos, mapas conceptuales, infografias",
+    "Sabe editar y modificar con herramientas digitales, el formato de diferentes tipos de archivo textos, fotografias, videos",
+    "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion",
+    "Conoce y actua con prudencia cuando recibe mensajes cuyo remitente, contenido o archivo adjunto sea desconocido (SPAM)",
+    "Se interesa en conocer las politicas de privacidad de las plataformas que utiliza en Internet, asi como el tratamiento que hacen de sus datos personales",
+    "Se mantiene informado y actualizado sobre habitos saludables y seguros en el uso de la tecnologia, y los fomenta y los difunde",
+    "Es capaz de evaluar y elegir de manera adecuada un dispositivo, software, aplicacion o servicio para realizar sus tareas",
+    "Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias",
+    "Conoce su nivel de competencia digital e identifica claramente sus carencias con respecto a los requisitos de su entorno laboral"
+]
+
+CIIU_DASHBOARD = {
+    'Actividades de alojamiento y de servicio de comida.': 'A1',
+    'Actividades de atencion de la salud humana y de asistencia social.': 'A2',
+    'Actividades profesionales, cientificas y tecnicas.': 'A3',
+    'Agricultura, ganadería y pesca.': 'A4',
+    'Artes, entretenimiento y recreacion.': 'A5',
+    'Comercio al por mayor y al por menor, reparacion de vehiculos automotores y motocicletas.': 'A6',
+    'Construccion.': 'A7',
+    'Ensenanza.': 'A8',
+    'Industrias manufactureras.': 'A9',
+    'Informacion y comunicacion.': 'A10',
+    'Otras actividades de servicios.': 'A11',
+    'Transporte y almacenamiento.': 'A12'
+}
+ORDEN_CIIU_DASHBOARD = [f"A{i}" for i in range(1, 13)]
+
+COLUMNAS_CORRELACION = [
+    'Tiene conocimientos de computacion y navegacion en internet',
+    'Identifica parametros que deben cumplir las paginas web y la informacion online para considerar su confiabilidad y calidad',
+    'Sabe editar y modificar con herramientas digitales, el formato de diferentes tipos de archivo textos, fotografias, videos',
+    'Conoce y actua con prudencia cuando recibe mensajes cuyo remitente, contenido o archivo adjunto sea desconocido (SPAM)',
+    'Se interesa en conocer las politicas de privacidad de las plataformas que utiliza en Internet, asi como el tratamiento que hacen de sus datos personales',
+    'Es capaz de evaluar y elegir de manera adecuada un dispositivo, software, aplicacion o servicio para realizar sus tareas'
+]
+
+PREGUNTA_FUNDAMENTOS = "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion"
+
+# Respuestas que cuentan como Sí / No al normalizar a binario
+RESPUESTAS_SI = ["si", "sí", "true", "1", "de acuerdo", "totalmente de acuerdo"]
+RESPUESTAS_NO = ["no", "false", "0", "en desacuerdo", "totalmente en desacuerdo"]
+
+ITEMS_RADAR = [
+    "Conoce como utilizar herramientas de busqueda avanzada en Internet",
+    "Clasifica la informacion mediante archivos y carpetas",
+    "Usted sabe como generar un perfil publico, personal o profesional en las Redes Sociales",
+    "Es capaz de utilizar los diferentes medios digitales para exponer de manera creativa esquemas graficos",
+    "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion",
+    "Se mantiene informado y actualizado sobre habitos saludables y seguros en el uso de la tecnologia"
+]
+RANGOS_RADAR = [15, 25, 35, 45, 55, 65, 120]
+ETIQUETAS_RADAR = ["15–24", "25–34", "35–44", "45–54", "55–64", "65+"]
+
 class Data:
-    def __init__(self):
-        self.df = retornar_dataframe()
+    def __init__(self, df=None):
+        df = retornar_dataframe() if df is None else df
+        # Puntuación numérica una sola vez al construir el snapshot
+        self.df = df.assign(Puntuacion=pd.to_numeric(df['Puntuacion'], errors='coerce').fillna(0))
 
     def show_dataframe(self):
         print(self.df)
 
-    def provincia_puntuacion(self):
-        self.df['Puntuacion'] = pd.to_numeric(self.df['Puntuacion'], errors='coerce')
-        self.df['Puntuacion'] = self.df['Puntuacion'].fillna(0)
+    def anios(self):
+        """Años de encuesta presentes (nivel 'Anio' del índice de las particiones anuales)"""
+        if 'Anio' not in self.df.index.names:
+            return []
+        return sorted(self.df.index.unique('Anio'))
+
+    def puntuacion_por_anio(self):
+        df_anio = self.df[['Puntuacion']].groupby(level='Anio').agg(
+            Registros=('Puntuacion', 'size'),
+            Puntuacion=('Puntuacion', 'mean')
+        ).reset_index()
+        df_anio['Puntuacion'] = df_anio['Puntuacion'].round(2)
+        logger.debug("Puntuación promedio por año:\n%s", df_anio)
+        return df_anio
 
-        df_promedio_provincia = self.df.groupby('Provincia')['Puntuacion'].mean().reset_index()
-        print(df_promedio_provincia)
+    def provincia_puntuacion(self):
+        df_promedio_provincia = self.df[['Provincia', 'Puntuacion']].groupby('Provincia')['Puntuacion'].mean().reset_index()
+        logger.debug("Puntuación promedio por provincia:\n%s", df_promedio_provincia)
         return df_promedio_provincia
 
     def genero_puntuacion_edad(self):
-        df_edad_genero = self.df.copy()
+        df_edad_genero = self.df[['Genero', 'Edad', 'Puntuacion']]
         df_edad_genero = df_edad_genero.dropna(subset=['Edad', 'Genero'])
         df_edad_genero['Edad'] = pd.to_numeric(df_edad_genero['Edad'], errors='coerce')
         df_edad_genero['Puntuacion'] = pd.to_numeric(df_edad_genero['Puntuacion'], errors='coerce')
 
         df_edad_genero['Puntuacion'] = df_edad_genero['Puntuacion'].fillna(0)
 
-        df_edad_genero['RangoEdad'] = pd.cut(df_edad_genero['Edad'], bins=[0, 12, 18, 30, 60, 100], 
-                                            labels=['0-12', '12-18', '18-30', '30-60', '+60'], right=False)
+        df_edad_genero['RangoEdad'] = pd.cut(df_edad_genero['Edad'], bins=RANGOS_EDAD,
+                                            labels=ETIQUETAS_EDAD, right=False)
         
         df_genero_puntuacion = df_edad_genero.groupby(['Genero', 'RangoEdad'])['Puntuacion'].mean().reset_index()
 
         df_genero_puntuacion['Puntuacion'] = df_genero_puntuacion['Puntuacion'].fillna(0).round(2)
-        print(df_genero_puntuacion)
+        logger.debug("Puntuación por género y edad:\n%s", df_genero_puntuacion)
         return df_genero_puntuacion
 
     def empresa_competencia(self):
-        df_copia = self.df.copy()
-        df_empresa_competencia = df_copia.rename(columns={
-            'Registre su tipo de empresa organizacion ciudadano': 'Empresa',
-            'Conoce su nivel de competencia digital e identifica claramente sus carencias con respecto a los requisitos de su entorno laboral': 'Entorno'
-        })
+        df_empresa_competencia = self.df[list(COLUMNAS_EMPRESA)].rename(columns=COLUMNAS_EMPRESA)
         
         df_empresa_competencia['Si'] = df_empresa_competencia['Entorno'].apply(lambda x: 1 if x == 'Si' else 0)
         df_empresa_competencia['No'] = df_empresa_competencia['Entorno'].apply(lambda x: 1 if x == 'No' else 0)
@@ -51,21 +182,13 @@ class Data:
 
         df_resultado = pd.merge(df_si, df_no, on='Empresa')
 
-        print(df_resultado)
+        logger.debug("Competencia por tipo de empresa:\n%s", df_resultado)
         return df_resultado
 
     def tecnologias_si_no(self):
-        columnas_tecnologicas = [
-            'Conoce las oportunidades que el IOT (Internet de las cosas) puede aportar en su trabajo y empresa',
-            'Conoce las oportunidades que el IA (Inteligencia artificial) puede aportar en su trabajo y empresa',
-            'Conoce o ha utilizado servicios de alojamiento de archivos en la nube',
-            'Ha participado en consultas ciudadanas o encuestas a traves de internet (online) a propuestas de organizaciones publicas o sociales',
-            'Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias'
-        ]
-        
         resultados = []
         
-        for columna in columnas_tecnologicas:
+        for columna in COLUMNAS_TECNOLOGICAS:
             if columna in self.df.columns:
                 conteo = self.df[columna].value_counts()
                 si_count = conteo.get('Si', 0)
@@ -78,122 +201,50 @@ class Data:
                 })
         
         df_resultado = pd.DataFrame(resultados)
-        print(df_resultado)
+        logger.debug("Respuestas Si/No por tecnología:\n%s", df_resultado)
         return df_resultado
 
     def participacion_innovacion_ciiu_genero(self):
         """
         Procesa datos de participación en experiencias innovadoras por CIIU y género
         """
-        col = "Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias"
+        col = PREGUNTA_INNOVACION
         
-        df_copy = self.df.copy()
+        df_copy = self.df[[col, 'CIIU', 'Genero']]
         df_copy[col] = df_copy[col].map({'Si': 1, 'No': 0})
-        
-        ciiu_map = {
-            'Actividades de los hogares como empleadores, actividades no diferenciadas de los hogares': 'Ac0',
-            'Actividades de alojamiento y de servicio de comida.': 'Ac1',
-            'Actividades de atencion de la salud humana y de asistencia social.': 'Ac2',
-            'Como productores de bienes y servicios para uso propio.': 'Ac3',
-            'Actividades de organizaciones y organos extraterritoriales.': 'Ac4',
-            'Actividades de servicios administrativos y de apoyo.': 'Ac5',
-            'Actividades financieras y de seguros.': 'Ac6',
-            'Actividades inmobiliarias.': 'Ac7',
-            'Actividades profesionales, cientificas y tecnicas.': 'Ac8',
-            'Agricultura, ganadería y pesca.': 'Ac9',
-            'Artes, entretenimiento y recreacion.': 'Ac10',
-            'Comercio al por mayor y al por menor, reparacion de vehiculos automotores y motocicletas.': 'Ac11',
-            'Construccion.': 'Ac12',
-            'Ensenanza.': 'Ac13',
-            'Industrias manufactureras.': 'Ac14',
-            'Informacion y comunicacion.': 'Ac15',
-            'Otras actividades de servicios.': 'Ac16',
-            'Suministro de electricidad, gas, vapor y aire acondicionado.': 'Ac17',
-            'Transporte y almacenamiento.': 'Ac18'
-        }
-        
-        df_copy['CIIU'] = df_copy['CIIU'].map(ciiu_map)
+        df_copy['CIIU'] = df_copy['CIIU'].map(CIIU_PARTICIPACION)
         
         df_copy = df_copy[df_copy['Genero'].isin(['Femenino', 'Masculino'])]
-        
-        orden_ciiu = ['Ac1', 'Ac2', 'Ac3', 'Ac4', 'Ac5', 'Ac6', 'Ac7', 'Ac8', 'Ac9', 'Ac10',
-                      'Ac11', 'Ac12', 'Ac13', 'Ac14', 'Ac15', 'Ac16', 'Ac17', 'Ac18']
-        
-        df_copy['CIIU'] = pd.Categorical(df_copy['CIIU'], categories=orden_ciiu, ordered=True)
+        df_copy['CIIU'] = pd.Categorical(df_copy['CIIU'], categories=ORDEN_CIIU_PARTICIPACION, ordered=True)
         
         df_group = df_copy.groupby(['CIIU', 'Genero'], observed=True)[col].mean().unstack(fill_value=0) * 100
         
-        print("Participación en experiencias innovadoras por CIIU y Género (%):")
-        print(df_group)
+        logger.debug("Participación en experiencias innovadoras por CIIU y Género (%%):\n%s", df_group)
         return df_group
 
     def dashboard_competencia_digital_ciiu(self):
         """
         Procesa datos para dashboard de competencia digital por CIIU
         """
-        preguntas_originales = [
-            "Tiene conocimientos de computacion y navegacion en internet",
-            "Conoce las oportunidades que el IOT (Internet de las cosas) puede aportar en su trabajo y empresa",
-            "Conoce las oportunidades que el IA (Inteligencia artificial) puede aportar en su trabajo y empresa",
-            "Conoce como utilizar herramientas de busqueda avanzada en Internet para mejorar los resultados en funcion de sus necesidades",
-            "Identifica parametros que deben cumplir las paginas web y la informacion online para considerar su confiabilidad y calidad",
-            "Clasifica la informacion mediante archivos y carpetas para facilitar su localizacion posterior",
-            "Conoce o ha utilizado servicios de alojamiento de archivos en la nube",
-            "Ha participado en consultas ciudadanas o encuestas a traves de internet (online) a propuestas de organizaciones publicas o sociales",
-            "Usted sabe como generar un perfil publico, personal o profesional en las Redes Sociales, controlando los detalles de la imagen que quiere transmitir",
-            "Es capaz de utilizar los diferentes medios digitales para exponer de manera creativa esquemas graficos, mapas conceptuales, infografias",
-            "Sabe editar y modificar con herramientas digitales, el formato de diferentes tipos de archivo textos, fotografias, videos",
-            "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion",
-            "Conoce y actua con prudencia cuando recibe mensajes cuyo remitente, contenido o archivo adjunto sea desconocido (SPAM)",
-            "Se interesa en conocer las politicas de privacidad de las plataformas que utiliza en Internet, asi como el tratamiento que hacen de sus datos personales",
-            "Se mantiene informado y actualizado sobre habitos saludables y seguros en el uso de la tecnologia, y los fomenta y los difunde",
-            "Es capaz de evaluar y elegir de manera adecuada un dispositivo, software, aplicacion o servicio para realizar sus tareas",
-            "Participa en experiencias innovadoras relacionadas con el uso de nuevas tecnologias",
-            "Conoce su nivel de competencia digital e identifica claramente sus carencias con respecto a los requisitos de su entorno laboral"
-        ]
-        
+        preguntas_originales = list(PREGUNTAS_COMPETENCIA)
         preguntas_cortas = [f"Pregunta {i+1}" for i in range(len(preguntas_originales))]
         mapa_preguntas = dict(zip(preguntas_originales, preguntas_cortas))
         
-        df_copy = self.df[self.df['Genero'].isin(['Femenino', 'Masculino'])].copy()
-        
-        ciiu_map = {
-            'Actividades de alojamiento y de servicio de comida.': 'A1',
-            'Actividades de atencion de la salud humana y de asistencia social.': 'A2',
-            'Actividades profesionales, cientificas y tecnicas.': 'A3',
-            'Agricultura, ganadería y pesca.': 'A4',
-            'Artes, entretenimiento y recreacion.': 'A5',
-            'Comercio al por mayor y al por menor, reparacion de vehiculos automotores y motocicletas.': 'A6',
-            'Construccion.': 'A7',
-            'Ensenanza.': 'A8',
-            'Industrias manufactureras.': 'A9',
-            'Informacion y comunicacion.': 'A10',
-            'Otras actividades de servicios.': 'A11',
-            'Transporte y almacenamiento.': 'A12'
-        }
+        # La respuesta incluye todas las columnas de las filas filtradas
+        df_copy = self.df[self.df['Genero'].isin(['Femenino', 'Masculino'])]
         
-        df_copy['CIIU'] = df_copy['CIIU'].map(ciiu_map)
+        df_copy['CIIU'] = df_copy['CIIU'].map(CIIU_DASHBOARD)
         df_copy = df_copy.dropna(subset=['CIIU'])
+        df_copy['CIIU'] = pd.Categorical(df_copy['CIIU'], categories=ORDEN_CIIU_DASHBOARD, ordered=True)
         
-        orden_ciiu = [f"A{i}" for i in range(1, 13)]
-        df_copy['CIIU'] = pd.Categorical(df_copy['CIIU'], categories=orden_ciiu, ordered=True)
-        
-        print("Dashboard de competencia digital por CIIU preparado")
-        print(f"Total de preguntas: {len(preguntas_originales)}")
-        print(f"Total de registros: {len(df_copy)}")
+        logger.debug("Dashboard de competencia digital por CIIU preparado: %d preguntas, %d registros",
+                     len(preguntas_originales), len(df_copy))
         
         return df_copy, preguntas_originales, mapa_preguntas
 
     def correlacion_data(self):
-        df = self.df.copy()
-        columnas = [
-            'Tiene conocimientos de computacion y navegacion en internet',
-            'Identifica parametros que deben cumplir las paginas web y la informacion online para considerar su confiabilidad y calidad',
-            'Sabe editar y modificar con herramientas digitales, el formato de diferentes tipos de archivo textos, fotografias, videos',
-            'Conoce y actua con prudencia cuando recibe mensajes cuyo remitente, contenido o archivo adjunto sea desconocido (SPAM)',
-            'Se interesa en conocer las politicas de privacidad de las plataformas que utiliza en Internet, asi como el tratamiento que hacen de sus datos personales',
-            'Es capaz de evaluar y elegir de manera adecuada un dispositivo, software, aplicacion o servicio para realizar sus tareas'
-        ]
+        columnas = COLUMNAS_CORRELACION
+        df = self.df[columnas]
 
         for col in columnas:
             df[col] = df[col].str.strip().str.lower().replace({'sí': 1, 'si': 1, 'no': 0})
@@ -208,27 +259,26 @@ class Data:
         """
         import numpy as np
         
-        q_col = "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion"
+        q_col = PREGUNTA_FUNDAMENTOS
         
         def norm_resp_bin(x):
             """Normaliza las respuestas a formato binario"""
             s = str(x).strip().lower()
-            if s in ["si", "sí", "true", "1", "de acuerdo", "totalmente de acuerdo"]:
+            if s in RESPUESTAS_SI:
                 return "Sí"
-            if s in ["no", "false", "0", "en desacuerdo", "totalmente en desacuerdo"]:
+            if s in RESPUESTAS_NO:
                 return "No"
             return np.nan
         
-        data = self.df[[q_col, "Edad"]].copy()
+        data = self.df[[q_col, "Edad"]]
         data["Respuesta"] = data[q_col].apply(norm_resp_bin)
         data["Edad"] = pd.to_numeric(data["Edad"], errors="coerce")
         data = data.dropna(subset=["Respuesta", "Edad"])
         
         stats = data.groupby("Respuesta")["Edad"].agg(['count', 'mean', 'std', 'min', 'max']).round(2)
         
-        print("Estadísticas de edad por respuesta sobre fundamentos digitales:")
-        print(stats)
-        print(f"\nTotal de registros procesados: {len(data)}")
+        logger.debug("Estadísticas de edad por respuesta sobre fundamentos digitales (%d registros):\n%s",
+                     len(data), stats)
         
         return data
 
@@ -249,20 +299,13 @@ class Data:
         def norm_yesno(x):
             """Normaliza respuestas a valores numéricos"""
             s = str(x).strip().lower()
-            if s in ["si", "sí", "true", "1", "de acuerdo", "totalmente de acuerdo"]:
+            if s in RESPUESTAS_SI:
                 return 1.0
-            if s in ["no", "false", "0", "en desacuerdo", "totalmente en desacuerdo"]:
+            if s in RESPUESTAS_NO:
                 return 0.0
             return 0.0  # Cambiado de np.nan a 0 para evitar NaN
 
-        items_text = [
-            "Conoce como utilizar herramientas de busqueda avanzada en Internet",
-            "Clasifica la informacion mediante archivos y carpetas",
-            "Usted sabe como generar un perfil publico, personal o profesional en las Redes Sociales",
-            "Es capaz de utilizar los diferentes medios digitales para exponer de manera creativa esquemas graficos",
-            "Conoce los fundamentos de los procesos digitales y de la creacion de software. Entiendo los principios de la programacion",
-            "Se mantiene informado y actualizado sobre habitos saludables y seguros en el uso de la tecnologia"
-        ]
+        items_text = list(ITEMS_RADAR)
         item_cols = [find_col_contains(t) for t in items_text]
 
         age_col = "Edad" if "Edad" in self.df.columns else find_col_contains("edad")
@@ -272,8 +315,8 @@ class Data:
             if col and col in self.df.columns:
                 work[label] = self.df[col].apply(norm_yesno).fillna(0)  # Limpieza adicional
 
-        bins = [15, 25, 35, 45, 55, 65, 120]
-        labels = ["15–24", "25–34", "35–44", "45–54", "55–64", "65+"]
+        bins = RANGOS_RADAR
+        labels = list(ETIQUETAS_RADAR)
         work["grupo_edad"] = pd.cut(work["Edad"], bins=bins, labels=labels, right=False, include_lowest=True)
 
         # Calcular % de deficiencias (No) por grupo e ítem
@@ -295,10 +338,8 @@ class Data:
                 .astype(int)
         )
 
-        print("Datos procesados para gráfico de radar:")
-        print(f"Grupos de edad: {labels}")
-        print(f"Total de registros: {len(work.dropna(subset=['grupo_edad']))}")
-        print(f"Habilidades analizadas: {len(items_text)}")
-        print(f"Group_stats_no sample: {group_stats_no.head().to_dict()}")  # Depuración
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Datos procesados para gráfico de radar: grupos %s, %d registros, %d habilidades\n%s",
+                         labels, work['grupo_edad'].notna().sum(), len(items_text), group_stats_no.head())
         
         return work, group_stats_no, n_by_group, items_text, labels
\ No newline at end of file
@@ -0,0 +1,247 @@
+import contextvars
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import parse_qs
+
+from src import admin
+
+# Perfilado bajo demanda de una petición con muestreo de pilas.
+#
+# Una petición se perfila si trae la cabecera X-Perfil o el parámetro
+# ?perfil= con el valor de ADMIN_TOKEN. Un hilo muestreador toma las pilas de
+# Python cada PERFIL_INTERVALO_MS mientras dura la petición; el cálculo que la
+# petición envía al pool de ejecución se muestrea dentro del propio worker y
+# sus pilas se agregan bajo "pool;<función>". El resultado está en formato de
+# pilas colapsadas ("marco;marco;marco muestras"), listo para flamegraph.pl o
+# speedscope, y se consulta en /admin/perfiles/{id}; la respuesta perfilada
+# lleva la cabecera X-Perfil-Id.
+#
+# Sin ADMIN_TOKEN el middleware no se instala y el pool solo consulta una
+# ContextVar vacía: perfilar no cuesta nada si no se usa.
+#
+# Variables de entorno:
+#   PERFIL_INTERVALO_MS  intervalo de muestreo (por defecto 5 ms)
+#   PERFIL_MAX           perfiles que se conservan en memoria por proceso (por defecto 20)
+#   PERFIL_DIR           si se define, cada perfil se escribe además como <id>.folded
+
+INTERVALO = float(os.getenv("PERFIL_INTERVALO_MS", "5")) / 1000
+MAXIMO = int(os.getenv("PERFIL_MAX", "20"))
+DIRECTORIO = os.getenv("PERFIL_DIR", "")
+
+# Marcos en los que un hilo está esperando (select del event loop, colas,
+# locks): las muestras de hilos ociosos no se cuentan
+OCIOSOS = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("handlers.py", "dequeue"),
+    ("runners.py", "run"),
+    ("base_events.py", "run_forever"),
+    ("base_events.py", "run_until_complete"),
+}
+
+# Hilos que nunca se muestrean desde la petición: el pool de hilos se
+# muestrea dentro de cada tarea
+PREFIJOS_EXCLUIDOS = ("analisis", "perfil")
+
+_actual = contextvars.ContextVar("perfil", default=None)
+_perfiles = deque(maxlen=MAXIMO)
+# Bytes aproximados de las pilas guardadas, actualizados al agregar y desalojar
+_bytes = 0
+_secuencia = itertools.count(1)
+_etiquetas = {}
+
+
+def _etiqueta(codigo):
+    etiqueta = _etiquetas.get(codigo)
+    if etiqueta is None:
+        archivo = os.path.basename(codigo.co_filename)
+        etiqueta = _etiquetas[codigo] = f"{codigo.co_name} ({archivo}:{codigo.co_firstlineno})"
+    return etiqueta
+
+
+class Muestreador(threading.Thread):
+    """Acumula las pilas colapsadas de los hilos indicados (o de todos los activos)"""
+    def __init__(self, intervalo=INTERVALO, hilos=None):
+        super().__init__(name="perfil-muestreador", daemon=True)
+        self.intervalo = intervalo
+        self.hilos = hilos
+        self.pilas = Counter()
+        self.muestras = 0
+        self._parar = threading.Event()
+
+    def run(self):
+        # Se vuelve a comprobar tras la espera: una muestra tomada mientras
+        # detener() hace join solo mostraría la propia espera
+        while not self._parar.wait(self.intervalo) and not self._parar.is_set():
+            self.muestrear()
+
+    def muestrear(self):
+        nombres = {h.ident: h.name for h in threading.enumerate()}
+        for ident, marco in sys._current_frames().items():
+            nombre = nombres.get(ident, str(ident))
+            if self.hilos is not None:
+                if ident not in self.hilos:
+                    continue
+            elif ident == self.ident or nombre.startswith(PREFIJOS_EXCLUIDOS):
+                continue
+            codigo = marco.f_code
+            if self.hilos is None and (os.path.basename(codigo.co_filename), codigo.co_name) in OCIOSOS:
+                continue
+            pila = []
+            while marco is not None:
+                pila.append(_etiqueta(marco.f_code))
+                marco = marco.f_back
+            pila.append(nombre)
+            self.pilas[";".join(reversed(pila))] += 1
+        self.muestras += 1
+
+    def detener(self):
+        self._parar.set()
+        self.join()
+        return self.pilas
+
+
+def perfilar(intervalo, funcion, *args):
+    """Ejecuta funcion(*args) muestreando el hilo actual; retorna (resultado, pilas)
+
+    Se usa dentro de los workers del pool, por eso es una función de módulo
+    (serializable con pickle) y retorna un dict simple.
+    """
+    muestreador = Muestreador(intervalo, hilos={threading.get_ident()})
+    muestreador.start()
+    try:
+        resultado = funcion(*args)
+    finally:
+        pilas = muestreador.detener()
+    return resultado, dict(pilas)
+
+
+class Perfil:
+    """Perfil de una petición: metadatos y pilas colapsadas"""
+    def __init__(self, metodo, ruta):
+        self.id = f"{os.getpid()}-{next(_secuencia)}"
+        self.metodo, self.ruta = metodo, ruta
+        self.fecha = time.time()
+        self.duracion = None
+        self.muestras = 0
+        self.pilas = Counter()
+        self._muestreador = Muestreador()
+
+    def iniciar(self):
+        self._inicio = time.perf_counter()
+        self._muestreador.start()
+
+    def agregar(self, pilas, prefijo):
+        """Suma pilas tomadas en otro hilo o proceso bajo un marco raíz"""
+        for pila, muestras in pilas.items():
+            self.pilas[f"{prefijo};{pila}"] += muestras
+
+    def terminar(self):
+        self.pilas.update(self._muestreador.detener())
+        self.muestras = self._muestreador.muestras
+        self.duracion = time.perf_counter() - self._inicio
+        self.bytes = sum(sys.getsizeof(pila) + 64 for pila in self.pilas)
+        _almacenar(self)
+        if DIRECTORIO:
+            _guardar(self)
+
+    def colapsado(self):
+        return "".join(f"{pila} {muestras}\n" for pila, muestras in self.pilas.most_common())
+
+    def resumen(self):
+        return {
+            "id": self.id,
+            "metodo": self.metodo,
+            "ruta": self.ruta,
+            "fecha": self.fecha,
+            "duracion_s": round(self.duracion, 6) if self.duracion is not None else None,
+            "muestras": self.muestras,
+            "pilas": len(self.pilas),
+        }
+
+
+def _almacenar(perfil):
+    global _bytes
+    if len(_perfiles) == _perfiles.maxlen:
+        _bytes -= _perfiles[0].bytes
+    _perfiles.append(perfil)
+    _bytes += perfil.bytes
+
+
+def uso():
+    """Entradas y bytes aproximados de los perfiles en memoria"""
+    return {"entradas": len(_perfiles), "bytes": _bytes}
+
+
+def _guardar(perfil):
+    # Escritura atómica: otros workers pueden estar leyendo el directorio
+    os.makedirs(DIRECTORIO, exist_ok=True)
+    destino = os.path.join(DIRECTORIO, f"{perfil.id}.folded")
+    temporal = f"{destino}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(perfil.colapsado())
+    os.replace(temporal, destino)
+
+
+def actual():
+    """Perfil de la petición en curso, o None"""
+    return _actual.get()
+
+
+def listar():
+    return [p.resumen() for p in reversed(_perfiles)]
+
+
+def colapsado(perfil_id):
+    """Pilas colapsadas de un perfil de este proceso o, con PERFIL_DIR, de cualquier worker"""
+    for perfil in _perfiles:
+        if perfil.id == perfil_id:
+            return perfil.colapsado()
+    if DIRECTORIO and perfil_id.replace("-", "").isdigit():
+        ruta = os.path.join(DIRECTORIO, f"{perfil_id}.folded")
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                return f.read()
+    return None
+
+
+def _solicitado(scope):
+    for nombre, valor in scope["headers"]:
+        if nombre == b"x-perfil":
+            return admin.autorizado(valor.decode("latin-1"))
+    consulta = scope.get("query_string", b"")
+    if b"perfil=" in consulta:
+        valores = parse_qs(consulta.decode("latin-1")).get("perfil")
+        return bool(valores) and admin.autorizado(valores[0])
+    return False
+
+
+class MiddlewarePerfil:
+    """Middleware ASGI: perfila las peticiones que traen el token en X-Perfil o ?perfil="""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _solicitado(scope):
+            return await self.app(scope, receive, send)
+
+        perfil = Perfil(scope["method"], scope["path"])
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [(b"x-perfil-id", perfil.id.encode())]
+            await send(mensaje)
+
+        token = _actual.set(perfil)
+        perfil.iniciar()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            perfil.terminar()
+            _actual.reset(token)
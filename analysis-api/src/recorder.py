@@ -0,0 +1,164 @@
+import contextvars
+import heapq
+import itertools
+import os
+import sys
+import time
+from urllib.parse import parse_qsl
+
+from src import dataset
+
+# Registro de las peticiones más lentas ("flight recorder").
+#
+# Cada petición lleva una Traza en una ContextVar; las capas que hacen trabajo
+# anotan en ella tramos con su duración (espera en la cola del pool, cálculo,
+# serialización, render de un gráfico, envío de la respuesta) y el estado de
+# caché. Al terminar, la traza entra en un heap de tamaño LENTAS_MAX solo si
+# es más lenta que la más rápida guardada: el coste por petición es constante
+# (un objeto pequeño y, como mucho, un heapreplace de log N).
+#
+# "Recientes" se resuelve por ventanas: se conservan las LENTAS_MAX más lentas
+# de la ventana actual y de la anterior, cada una de LENTAS_VENTANA_S segundos.
+#
+# Variables de entorno:
+#   LENTAS_MAX        peticiones guardadas por ventana (por defecto 50)
+#   LENTAS_VENTANA_S  duración de cada ventana (por defecto 3600)
+
+MAXIMO = int(os.getenv("LENTAS_MAX", "50"))
+VENTANA = float(os.getenv("LENTAS_VENTANA_S", "3600"))
+
+# Parámetros que nunca se guardan (tokens de administración)
+PARAMETROS_OCULTOS = {"token", "perfil"}
+
+_actual = contextvars.ContextVar("traza", default=None)
+_desempate = itertools.count()
+
+
+class Traza:
+    """Tramos y atributos de una petición"""
+    __slots__ = ("metodo", "ruta", "plantilla", "consulta", "version", "cache",
+                 "estado", "fecha", "duracion", "tramos")
+
+    def __init__(self, metodo, ruta, consulta, version):
+        self.metodo, self.ruta, self.consulta, self.version = metodo, ruta, consulta, version
+        self.plantilla = None
+        self.cache = None
+        self.estado = None
+        self.fecha = time.time()
+        self.duracion = 0.0
+        self.tramos = {}
+
+    def tramo(self, nombre, segundos):
+        self.tramos[nombre] = self.tramos.get(nombre, 0.0) + segundos
+
+    def tamano(self):
+        """Bytes aproximados de la traza (objeto, tramos y textos)"""
+        return (sys.getsizeof(self) + sys.getsizeof(self.tramos) + sys.getsizeof(self.ruta)
+                + sys.getsizeof(self.consulta) + 32 * len(self.tramos))
+
+    def exportar(self):
+        tramos = {nombre: round(segundos, 6) for nombre, segundos in self.tramos.items()}
+        # Lo que no cubre ningún tramo: el handler en el event loop o en el threadpool
+        # (incluida la serialización de los endpoints síncronos), enrutado y middlewares
+        tramos["handler"] = round(max(0.0, self.duracion - sum(self.tramos.values())), 6)
+        parametros = {k: v for k, v in parse_qsl(self.consulta) if k not in PARAMETROS_OCULTOS}
+        return {
+            "metodo": self.metodo,
+            "ruta": self.ruta,
+            "plantilla": self.plantilla,
+            "parametros": parametros,
+            "estado": self.estado,
+            "fecha": self.fecha,
+            "duracion_s": round(self.duracion, 6),
+            "dataset_version": self.version,
+            "cache": self.cache,
+            "tramos": tramos,
+        }
+
+
+class Registro:
+    """Las MAXIMO peticiones más lentas de la ventana actual y de la anterior"""
+    def __init__(self, maximo=MAXIMO, ventana=VENTANA):
+        self.maximo, self.ventana = maximo, ventana
+        self._actual = []
+        self._anterior = []
+        # Bytes aproximados de cada ventana, actualizados al insertar y desalojar
+        self._bytes_actual = 0
+        self._bytes_anterior = 0
+        self._inicio_ventana = time.monotonic()
+
+    def agregar(self, traza):
+        ahora = time.monotonic()
+        if ahora - self._inicio_ventana >= self.ventana:
+            # Si pasó más de una ventana sin rotar, la anterior también es vieja
+            recientes = ahora - self._inicio_ventana < 2 * self.ventana
+            self._anterior = self._actual if recientes else []
+            self._bytes_anterior = self._bytes_actual if recientes else 0
+            self._actual = []
+            self._bytes_actual = 0
+            self._inicio_ventana = ahora
+        if len(self._actual) < self.maximo:
+            heapq.heappush(self._actual, (traza.duracion, next(_desempate), traza))
+            self._bytes_actual += traza.tamano()
+        elif traza.duracion > self._actual[0][0]:
+            _, _, desalojada = heapq.heapreplace(self._actual, (traza.duracion, next(_desempate), traza))
+            self._bytes_actual += traza.tamano() - desalojada.tamano()
+
+    def uso(self):
+        return {"entradas": len(self._actual) + len(self._anterior),
+                "bytes": self._bytes_actual + self._bytes_anterior}
+
+    def listar(self):
+        elementos = sorted(self._actual + self._anterior, reverse=True, key=lambda e: e[0])
+        return [traza.exportar() for _, _, traza in elementos[:self.maximo]]
+
+
+registro = Registro()
+
+
+def actual():
+    """Traza de la petición en curso, o None fuera de una petición"""
+    return _actual.get()
+
+
+def anotar_cache(estado, si_vacio=False):
+    """Estado de caché de la petición; con si_vacio no reemplaza uno más específico ya anotado"""
+    traza = _actual.get()
+    if traza is not None and not (si_vacio and traza.cache is not None):
+        traza.cache = estado
+
+
+class MiddlewareRegistro:
+    """Middleware ASGI: crea la traza de cada petición y guarda las más lentas"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        ds = dataset.activo()
+        traza = Traza(scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"),
+                      ds.version if ds is not None else None)
+        inicio_respuesta = None
+
+        async def enviar(mensaje):
+            nonlocal inicio_respuesta
+            if mensaje["type"] == "http.response.start":
+                traza.estado = mensaje["status"]
+                inicio_respuesta = time.perf_counter()
+            await send(mensaje)
+
+        token = _actual.set(traza)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            fin = time.perf_counter()
+            _actual.reset(token)
+            if inicio_respuesta is not None:
+                traza.tramo("envio_respuesta", fin - inicio_respuesta)
+            traza.duracion = fin - inicio
+            ruta = scope.get("route")
+            traza.plantilla = ruta.path if ruta is not None else None
+            registro.agregar(traza)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+# Caché persistente de resultados de /analysis/* en disco local (SQLite).
+#
+# Cada resultado ya serializado se guarda con la clave (versión del dataset,
+# endpoint, parámetros), la misma del single-flight, más una firma del código
+# de src/: un despliegue con otros análisis no recibe resultados viejos. El
+# archivo lo comparten todos los workers web de la máquina y sobrevive a los
+# reinicios, así un worker nuevo arranca con la caché caliente y N workers no
+# repiten N veces el mismo cálculo.
+#
+# SQLite en modo WAL serializa las escrituras entre procesos y cada escritura
+# es una transacción: un lector nunca ve un resultado a medias. Al superar
+# RESULTADOS_MAX_MB se desalojan en la misma transacción los resultados usados
+# hace más tiempo; los de versiones anteriores salen así solos.
+#
+# Variables de entorno:
+#   RESULTADOS_RUTA     archivo SQLite (por defecto data/processed/resultados.sqlite)
+#   RESULTADOS_MAX_MB   tamaño máximo de los resultados guardados; 0 desactiva la caché (por defecto 256)
+
+RUTA = os.getenv("RESULTADOS_RUTA") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "processed", "resultados.sqlite")
+MAX_BYTES = int(float(os.getenv("RESULTADOS_MAX_MB", "256")) * 1024 * 1024)
+# El último uso de una entrada se actualiza como mucho una vez por intervalo
+INTERVALO_USO = 60
+
+
+def firma_codigo():
+    """Huella de los módulos de src/: cambia con cualquier cambio en los análisis"""
+    sha = hashlib.sha1()
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.endswith(".py"):
+            with open(os.path.join(directorio, nombre), "rb") as f:
+                sha.update(nombre.encode("utf-8"))
+                sha.update(f.read())
+    return sha.hexdigest()[:12]
+
+
+class CacheResultados:
+    """Resultados serializados por clave en un archivo SQLite compartido entre procesos"""
+    def __init__(self, ruta, max_bytes=MAX_BYTES):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.codigo = firma_codigo()
+        self._local = threading.local()
+        self._aciertos = metrics.cache.serie("resultados", "hit")
+        self._fallos = metrics.cache.serie("resultados", "miss")
+
+    def habilitada(self):
+        return self.max_bytes > 0
+
+    def _conexion(self):
+        # Una conexión por hilo y por proceso: tras un fork el hijo abre la suya
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                "clave TEXT PRIMARY KEY, version TEXT, ruta TEXT, contenido BLOB NOT NULL, "
+                "bytes INTEGER NOT NULL, creado REAL NOT NULL, usado REAL NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS resultados_usado ON resultados (usado)")
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    def clave(self, clave):
+        """Clave de texto a partir de la clave de coalescencia (versión, endpoint, parámetros)"""
+        return json.dumps([self.codigo, *clave], default=list, separators=(",", ":"))
+
+    def leer(self, clave):
+        """Resultado guardado para la clave o None; un error de la caché cuenta como fallo"""
+        try:
+            conexion = self._conexion()
+            texto = self.clave(clave)
+            fila = conexion.execute("SELECT contenido FROM resultados WHERE clave = ?", (texto,)).fetchone()
+            if fila is not None:
+                ahora = time.time()
+                conexion.execute("UPDATE resultados SET usado = ? WHERE clave = ? AND usado < ?",
+                                 (ahora, texto, ahora - INTERVALO_USO))
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("⚠️ Caché de resultados no disponible: %s", e)
+            fila = None
+        if fila is None:
+            self._fallos[0] += 1
+            return None
+        self._aciertos[0] += 1
+        return fila[0]
+
+    def guardar(self, clave, contenido):
+        """Guarda el resultado y desaloja los menos usados si se supera el tamaño máximo"""
+        if len(contenido) > self.max_bytes:
+            return False
+        version, ruta = clave[0], clave[1]
+        ahora = time.time()
+        try:
+            conexion = self._conexion()
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                conexion.execute(
+                    "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.clave(clave), version, ruta, contenido, len(contenido), ahora, ahora)
+                )
+                # Se conservan los más recientes cuyo tamaño acumulado cabe en el máximo
+                desalojados = conexion.execute(
+                    "DELETE FROM resultados WHERE clave IN (SELECT clave FROM ("
+                    "SELECT clave, SUM(bytes) OVER (ORDER BY usado DESC, creado DESC) AS acumulado "
+                    "FROM resultados) WHERE acumulado > ?)",
+                    (self.max_bytes,)
+                ).rowcount
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("⚠️ No se pudo guardar %s en la caché de resultados: %s", ruta, e)
+            return False
+        if desalojados:
+            logger.debug("Caché de resultados: %s entradas desalojadas", desalojados)
+        return True
+
+    def uso(self):
+        """Entradas y bytes guardados en el archivo (de todos los procesos)"""
+        try:
+            entradas, total = self._conexion().execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM resultados").fetchone()
+        except (sqlite3.Error, OSError):
+            return {"entradas": None, "bytes": None}
+        return {"entradas": entradas, "bytes": total}
+
+
+resultados = CacheResultados(RUTA)
@@ -0,0 +1,66 @@
+import asyncio
+
+from src import dataset, metrics, profiler, recorder
+
+# Coalescencia de peticiones (single-flight): mientras un cálculo con la misma
+# clave está en curso, las peticiones idénticas esperan su resultado en lugar
+# de lanzar otro cálculo. La clave incluye la versión del dataset, por lo que
+# un dataset nuevo nunca recibe resultados del anterior.
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución"""
+    def __init__(self):
+        self._vuelos = {}
+        self.ejecutados = 0
+        self.coalescidos = 0
+        # Una petición coalescida cuenta como acierto en /metrics
+        self._aciertos = metrics.cache.serie("singleflight", "hit")
+        self._fallos = metrics.cache.serie("singleflight", "miss")
+
+    async def hacer(self, clave, fabrica):
+        """Ejecuta fabrica() una vez por clave y comparte el resultado con los que esperan"""
+        if profiler.actual() is not None:
+            # Una petición perfilada siempre ejecuta su propio cálculo
+            return await fabrica()
+        tarea = self._vuelos.get(clave)
+        if tarea is None:
+            self.ejecutados += 1
+            self._fallos[0] += 1
+            recorder.anotar_cache("calculado", si_vacio=True)
+            # La tarea es independiente de la petición que la creó: si ese cliente
+            # se desconecta, el cálculo continúa para el resto de peticiones
+            tarea = asyncio.ensure_future(fabrica())
+            self._vuelos[clave] = tarea
+            tarea.add_done_callback(lambda t: self._terminar(clave, t))
+        else:
+            self.coalescidos += 1
+            self._aciertos[0] += 1
+            recorder.anotar_cache("coalescido")
+        return await asyncio.shield(tarea)
+
+    def _terminar(self, clave, tarea):
+        self._vuelos.pop(clave, None)
+        # Marca la excepción como recuperada aunque todos los clientes se hayan ido
+        if not tarea.cancelled():
+            tarea.exception()
+
+    def en_curso(self):
+        return len(self._vuelos)
+
+    def uso(self):
+        # Los resultados viven en las tareas en curso y se sueltan al terminar
+        return {"entradas": len(self._vuelos), "bytes": None}
+
+
+coalescedor = SingleFlight()
+
+
+def clave(ruta, *params, anios=None):
+    """Clave de coalescencia: (versión del dataset, endpoint, parámetros)
+
+    Con anios la versión es la de esos años: el resultado sigue valiendo
+    cuando se anexan envíos a otro año.
+    """
+    ds = dataset.activo()
+    return (ds.version_de(anios) if ds is not None else None, ruta, params)
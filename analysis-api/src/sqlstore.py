@@ -0,0 +1,374 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.processing_data import (COLUMNAS_CORRELACION, COLUMNAS_EMPRESA, COLUMNAS_TECNOLOGICAS, CIIU_DASHBOARD,
+                                 CIIU_PARTICIPACION, ETIQUETAS_EDAD, ITEMS_RADAR, ORDEN_CIIU_PARTICIPACION,
+                                 PREGUNTA_FUNDAMENTOS, PREGUNTA_INNOVACION, RANGOS_EDAD, Data)
+
+logger = logging.getLogger(__name__)
+
+# Motor SQL embebido para los análisis de Data.
+#
+# Cada versión del dataset se publica una vez en un archivo de base de datos
+# (data/processed/sql/<versión>.sqlite o .duckdb) con la tabla "envios": las
+# columnas de texto de la limpieza, Puntuacion numérica, el año y el orden
+# original de las filas. Consultas expone los mismos métodos que Data y
+# retorna los mismos DataFrames, pero cada agregación se resuelve en la base
+# (GROUP BY, SUM, COUNT) y solo viaja el resultado; ?year= se traduce a un
+# filtro por año. Los métodos que devuelven filas (dashboard, boxplot, radar)
+# leen solo las columnas y filas que usan y terminan con el código de Data.
+#
+# Con ANALISIS_MOTOR=almacen las mismas consultas corren sobre la tabla de la
+# versión en el almacén relacional compartido (src/almacen.py).
+#
+# Data (pandas) sigue siendo la implementación de referencia: tools/paridad.py
+# compara cada método de un motor con ella.
+#
+# El motor no reemplaza al DataFrame en memoria: los workers lo siguen
+# cargando para /data, los análisis profundos y los gráficos. Lo que evita es
+# recorrerlo en cada agregación.
+#
+# Variables de entorno:
+#   ANALISIS_MOTOR   "pandas" (por defecto), "sqlite", "duckdb" (requiere el paquete duckdb)
+#                    o "almacen" (requiere ALMACEN_URL)
+
+MOTOR = os.getenv("ANALISIS_MOTOR", "pandas")
+MOTORES_SQL = ("sqlite", "duckdb")
+
+TABLA = "envios"
+ORDEN = "_orden"
+
+# Conexiones de solo lectura por hilo; se conservan las de las últimas versiones
+MAX_CONEXIONES = 2
+_locales = threading.local()
+
+
+def _q(nombre):
+    """Identificador entre comillas (los nombres de columna son preguntas completas)"""
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def _literal(valor):
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def _lista(valores):
+    return ", ".join(_literal(v) for v in valores)
+
+
+def habilitado():
+    return MOTOR in MOTORES_SQL
+
+
+def ruta(directorio, version, motor=None):
+    return os.path.join(directorio, "sql", f"{version}.{motor or MOTOR}")
+
+
+def _conectar(ruta_base, motor, escritura=False):
+    if motor == "duckdb":
+        import duckdb
+        return duckdb.connect(ruta_base, read_only=not escritura)
+    if escritura:
+        return sqlite3.connect(ruta_base)
+    return sqlite3.connect(f"file:{ruta_base}?mode=ro", uri=True)
+
+
+def bloques(ds, filas=10000):
+    """Filas de la tabla de una versión, de a filas: columnas de Data, año, ID del envío y orden original
+
+    Solo se copia un bloque a la vez: publicar una versión no duplica el
+    dataset entero en memoria. Un dataset vacío da un bloque vacío (la tabla
+    se crea igual).
+    """
+    df = ds.data.df
+    for desde in range(0, max(len(df), 1), filas):
+        bloque = df.iloc[desde:desde + filas].reset_index()
+        bloque[ORDEN] = np.arange(desde, desde + len(bloque), dtype="int64")
+        yield bloque
+
+
+def publicar(ds, directorio, motor=None):
+    """Escribe el archivo SQL de la versión del dataset si aún no existe; retorna su ruta
+
+    La base se escribe en un temporal y se renombra: los workers que la abren
+    nunca ven un archivo a medias.
+    """
+    motor = motor or MOTOR
+    destino = ruta(directorio, ds.version, motor)
+    if not os.path.exists(destino):
+        inicio = time.perf_counter()
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporal = f"{destino}.{os.getpid()}.tmp"
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        conexion = _conectar(temporal, motor, escritura=True)
+        try:
+            for numero, bloque in enumerate(bloques(ds)):
+                if motor == "duckdb":
+                    conexion.register("bloque", bloque)
+                    conexion.execute(f"CREATE TABLE {TABLA} AS SELECT * FROM bloque" if numero == 0
+                                     else f"INSERT INTO {TABLA} SELECT * FROM bloque")
+                    conexion.unregister("bloque")
+                else:
+                    bloque.to_sql(TABLA, conexion, index=False, if_exists="append")
+            if motor != "duckdb":
+                if "Anio" in bloque.columns:
+                    conexion.execute(f"CREATE INDEX anio ON {TABLA} ({_q('Anio')})")
+                conexion.commit()
+        finally:
+            conexion.close()
+        os.replace(temporal, destino)
+        logger.info("🗄️ Dataset %s publicado en %s (%s filas) en %.2f s", ds.version, motor, len(ds.data.df),
+                    time.perf_counter() - inicio)
+    return destino
+
+
+def depurar(directorio, versiones, motor=None):
+    """Borra los archivos SQL de las versiones que no están en versiones
+
+    Una conexión ya abierta sigue leyendo el archivo borrado; si otro proceso
+    aún lo necesita, Consultas lo vuelve a publicar desde su dataset.
+    """
+    motor = motor or MOTOR
+    carpeta = os.path.join(directorio, "sql")
+    conservar = {f"{v}.{motor}" for v in versiones}
+    try:
+        nombres = os.listdir(carpeta)
+    except FileNotFoundError:
+        return
+    for nombre in nombres:
+        if nombre.endswith(f".{motor}") and nombre not in conservar:
+            try:
+                os.remove(os.path.join(carpeta, nombre))
+            except FileNotFoundError:
+                pass
+
+
+def _conexion(asegurar, motor):
+    # Una conexión por proceso e hilo: no se comparten tras un fork ni entre hilos
+    conexiones = getattr(_locales, "conexiones", None)
+    if conexiones is None or _locales.pid != os.getpid():
+        conexiones = _locales.conexiones = {}
+        _locales.pid = os.getpid()
+    conexion = conexiones.pop(asegurar, None)
+    if conexion is None:
+        conexion = _conectar(asegurar(), motor)
+    conexiones[asegurar] = conexion
+    while len(conexiones) > MAX_CONEXIONES:
+        conexiones.pop(next(iter(conexiones))).close()
+    return conexion
+
+
+# Los motores agregan a un grano pequeño ("cubo"); estas funciones terminan el
+# cálculo con la misma semántica que Data. Las usan Consultas y DataPolars.
+
+def genero_edad_de_cubo(cubo):
+    """Puntuación media por género y rango de edad desde (Genero, Edad, suma, n)"""
+    cubo['RangoEdad'] = pd.cut(pd.to_numeric(cubo['Edad'], errors='coerce'), bins=RANGOS_EDAD,
+                               labels=ETIQUETAS_EDAD, right=False)
+    grupos = cubo.groupby(['Genero', 'RangoEdad'], observed=False)[['suma', 'n']].sum()
+    df = (grupos['suma'] / grupos['n']).rename('Puntuacion').reset_index()
+    df['Puntuacion'] = df['Puntuacion'].fillna(0).round(2)
+    return df
+
+
+def participacion_de_cubo(cubo):
+    """Porcentaje de Si por CIIU y género desde (respuesta, CIIU, Genero, n)"""
+    valor = cubo['respuesta'].map({'Si': 1, 'No': 0})
+    cubo['suma'] = valor * cubo['n']
+    cubo['contadas'] = cubo['n'].where(valor.notna(), 0)
+    cubo['CIIU'] = pd.Categorical(cubo['CIIU'].map(CIIU_PARTICIPACION), categories=ORDEN_CIIU_PARTICIPACION,
+                                  ordered=True)
+    grupos = cubo.groupby(['CIIU', 'Genero'], observed=True)[['suma', 'contadas']].sum()
+    return (grupos['suma'] / grupos['contadas']).rename(PREGUNTA_INNOVACION).unstack(fill_value=0) * 100
+
+
+def correlacion_de_cubo(cubo):
+    """Correlación de Pearson desde cada combinación de respuestas binarias (c0..cN) y su conteo n"""
+    pesos = cubo['n'].to_numpy(dtype=float)
+    valores = cubo.drop(columns='n').to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centrados = valores - (pesos[:, None] * valores).sum(axis=0) / pesos.sum()
+        covarianza = (centrados * pesos[:, None]).T @ centrados
+        desvio = np.sqrt(np.diag(covarianza))
+        correlacion = covarianza / np.outer(desvio, desvio)
+    return pd.DataFrame(correlacion, index=COLUMNAS_CORRELACION, columns=COLUMNAS_CORRELACION)
+
+
+def _ordenar(df, columna):
+    # Grupos de texto en el orden de pandas (por punto de código): el ORDER BY
+    # de PostgreSQL usaría la colación del servidor (p. ej. 'nan' entre las provincias)
+    return df.sort_values(columna, kind='stable', ignore_index=True)
+
+
+def _data(df):
+    # Data sobre una proyección ya leída de la base: Puntuacion ya es numérica
+    data = Data.__new__(Data)
+    data.df = df
+    return data
+
+
+class Archivo:
+    """Fuente de Consultas: el archivo SQLite/DuckDB de una versión
+
+    asegurar() publica el archivo (si falta) y retorna su ruta; se llama antes
+    de abrir cada conexión nueva. Las columnas se llaman como en el DataFrame.
+    """
+    tabla = TABLA
+
+    def __init__(self, asegurar, motor=None):
+        self.asegurar = asegurar
+        self.motor = motor or MOTOR
+        self._columnas = None
+
+    def leer(self, sql):
+        cursor = _conexion(self.asegurar, self.motor).cursor()
+        try:
+            cursor.execute(sql)
+            columnas = [d[0] for d in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columnas)
+        finally:
+            cursor.close()
+
+    def columnas(self):
+        if self._columnas is None:
+            self._columnas = list(self.leer(f"SELECT * FROM {self.tabla} LIMIT 0").columns)
+        return self._columnas
+
+    def columna(self, nombre):
+        return _q(nombre)
+
+
+class Consultas:
+    """Los análisis de Data como consultas sobre la tabla de una versión del dataset
+
+    fuente da la tabla, sus columnas (con los nombres del DataFrame), el
+    identificador SQL de cada columna y leer(sql) -> DataFrame: Archivo o
+    almacen.Fuente.
+    """
+    def __init__(self, fuente, anios=None):
+        self.fuente = fuente
+        self.filtro_anios = tuple(anios) if anios else None
+
+    def seleccionar(self, anios):
+        """Mismas consultas limitadas a los años indicados"""
+        return Consultas(self.fuente, anios)
+
+    def _leer(self, sql):
+        return self.fuente.leer(sql)
+
+    def _c(self, nombre):
+        return self.fuente.columna(nombre)
+
+    @property
+    def _tabla(self):
+        return self.fuente.tabla
+
+    def _donde(self, *condiciones):
+        """Cláusula WHERE con el filtro de años y las condiciones dadas"""
+        condiciones = list(condiciones)
+        if self.filtro_anios:
+            # Años enteros como literales: la misma consulta sirve con cualquier driver
+            condiciones.insert(0, f"{self._c('Anio')} IN ({', '.join(str(int(a)) for a in self.filtro_anios)})")
+        return (" WHERE " + " AND ".join(condiciones)) if condiciones else ""
+
+    def columnas(self):
+        """Columnas de la tabla en el orden del DataFrame de Data"""
+        return [c for c in self.fuente.columnas() if c not in ("Anio", "ID del envio", ORDEN)]
+
+    def _filas(self, columnas, *condiciones):
+        """Filas con solo las columnas pedidas, en el orden original e indexadas como en Data"""
+        indice = [c for c in ("Anio", "ID del envio") if c in self.fuente.columnas()]
+        df = self._leer(f"SELECT {', '.join(self._c(c) for c in indice + columnas)} FROM {self._tabla}"
+                        f"{self._donde(*condiciones)} ORDER BY {self._c(ORDEN)}")
+        df.columns = indice + columnas
+        return df.set_index(indice) if indice else df
+
+    def anios(self):
+        if 'Anio' not in self.fuente.columnas():
+            return []
+        df = self._leer(f"SELECT DISTINCT {self._c('Anio')} AS anio FROM {self._tabla}{self._donde()} ORDER BY 1")
+        return [int(a) for a in df['anio']]
+
+    def puntuacion_por_anio(self):
+        anio = self._c('Anio')
+        df = self._leer(f"SELECT {anio} AS {_q('Anio')}, COUNT(*) AS {_q('Registros')}, "
+                        f"SUM({self._c('Puntuacion')}) AS suma "
+                        f"FROM {self._tabla}{self._donde()} GROUP BY {anio} ORDER BY {anio}")
+        df['Puntuacion'] = (df.pop('suma') / df['Registros']).round(2)
+        return df
+
+    def provincia_puntuacion(self):
+        provincia = self._c('Provincia')
+        df = _ordenar(self._leer(
+            f"SELECT {provincia} AS {_q('Provincia')}, SUM({self._c('Puntuacion')}) AS suma, COUNT(*) AS n "
+            f"FROM {self._tabla}{self._donde()} GROUP BY {provincia}"), 'Provincia')
+        df['Puntuacion'] = df.pop('suma') / df.pop('n')
+        return df
+
+    def genero_puntuacion_edad(self):
+        # La base agrupa por género y edad exacta (pocas combinaciones); los
+        # rangos de edad se arman con pd.cut igual que en Data
+        genero, edad = self._c('Genero'), self._c('Edad')
+        return genero_edad_de_cubo(self._leer(
+            f"SELECT {genero} AS {_q('Genero')}, {edad} AS {_q('Edad')}, "
+            f"SUM({self._c('Puntuacion')}) AS suma, COUNT(*) AS n "
+            f"FROM {self._tabla}{self._donde()} GROUP BY {genero}, {edad}"))
+
+    def empresa_competencia(self):
+        empresa, entorno = (self._c(c) for c in COLUMNAS_EMPRESA)
+        return _ordenar(self._leer(
+            f"SELECT {empresa} AS {_q('Empresa')}, "
+            f"SUM(CASE WHEN {entorno} = 'Si' THEN 1 ELSE 0 END) AS {_q('Si')}, "
+            f"SUM(CASE WHEN {entorno} = 'No' THEN 1 ELSE 0 END) AS {_q('No')} "
+            f"FROM {self._tabla}{self._donde()} GROUP BY {empresa}"), 'Empresa')
+
+    def tecnologias_si_no(self):
+        columnas = [c for c in COLUMNAS_TECNOLOGICAS if c in self.columnas()]
+        if not columnas:
+            return pd.DataFrame([])
+        sumas = ", ".join(
+            f"COALESCE(SUM(CASE WHEN {self._c(c)} = {_literal(respuesta)} THEN 1 ELSE 0 END), 0)"
+            for c in columnas for respuesta in ('Si', 'No'))
+        conteos = self._leer(f"SELECT {sumas} FROM {self._tabla}{self._donde()}").iloc[0].tolist()
+        return pd.DataFrame([
+            {'Pregunta': c, 'Si': conteos[2 * i], 'No': conteos[2 * i + 1]} for i, c in enumerate(columnas)
+        ])
+
+    def participacion_innovacion_ciiu_genero(self):
+        col = PREGUNTA_INNOVACION
+        genero, ciiu = self._c('Genero'), self._c('CIIU')
+        donde = self._donde(f"{genero} IN ('Femenino', 'Masculino')", f"{ciiu} IN ({_lista(CIIU_PARTICIPACION)})")
+        return participacion_de_cubo(self._leer(
+            f"SELECT {self._c(col)} AS respuesta, {ciiu} AS {_q('CIIU')}, {genero} AS {_q('Genero')}, "
+            f"COUNT(*) AS n FROM {self._tabla}{donde} GROUP BY 1, 2, 3"))
+
+    def dashboard_competencia_digital_ciiu(self):
+        df = self._filas(self.columnas(), f"{self._c('Genero')} IN ('Femenino', 'Masculino')",
+                         f"{self._c('CIIU')} IN ({_lista(CIIU_DASHBOARD)})")
+        return _data(df).dashboard_competencia_digital_ciiu()
+
+    def correlacion_data(self):
+        # Respuestas binarias: la base cuenta cada combinación de las columnas
+        # y la correlación de Pearson se calcula con esos conteos como pesos
+        banderas = [f"CASE WHEN lower(trim({self._c(c)})) IN ('si', 'sí') THEN 1 ELSE 0 END"
+                    for c in COLUMNAS_CORRELACION]
+        # Orden fijo de las combinaciones: la suma en coma flotante no varía entre motores ni ejecuciones
+        posiciones = ", ".join(str(i + 1) for i in range(len(banderas)))
+        return correlacion_de_cubo(self._leer(
+            f"SELECT {', '.join(f'{b} AS c{i}' for i, b in enumerate(banderas))}, COUNT(*) AS n "
+            f"FROM {self._tabla}{self._donde()} GROUP BY {posiciones} ORDER BY {posiciones}"))
+
+    def edad_fundamentos_digitales(self):
+        return _data(self._filas([PREGUNTA_FUNDAMENTOS, "Edad"])).edad_fundamentos_digitales()
+
+    def radar_deficiencias_edad(self):
+        fragmentos = [t.lower() for t in ITEMS_RADAR] + ["edad"]
+        columnas = [c for c in self.columnas() if any(f in c.lower() for f in fragmentos)]
+        return _data(self._filas(columnas)).radar_deficiencias_edad()
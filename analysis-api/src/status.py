@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+
+# Estado de la API para las sondas /health y /ready.
+# Los cuerpos de respuesta se serializan solo cuando el estado cambia,
+# de modo que cada sonda devuelve bytes ya construidos en tiempo constante.
+
+_estado = {
+    "status": "starting",
+    "dataset_version": None,
+    "dataset_years": [],
+    "data_count": 0,
+    "cache": {
+        "calentado": False,
+        "graficos_generados": 0,
+        "graficos_total": 0
+    },
+    "render_pool": {
+        "modo": "inline",
+        "workers": 0,
+        "activos": 0
+    },
+    "recarga": {
+        "estado": "inactiva",
+        "fecha": None,
+        "duracion_s": None,
+        "error": None
+    }
+}
+
+_CUERPO_HEALTH = json.dumps({
+    "status": "healthy",
+    "message": "API funcionando correctamente",
+    "cors": "enabled"
+}).encode("utf-8")
+
+_cuerpo_ready = json.dumps(_estado).encode("utf-8")
+
+
+def huella_archivo(ruta, limite=None, desde=0):
+    """Calcula una versión corta del dataset a partir del contenido del archivo
+
+    Con limite solo se leen limite bytes a partir del byte desde (para
+    reconocer un prefijo o la huella de lo anexado al final).
+    """
+    if not ruta or not os.path.exists(ruta):
+        return None
+    sha = hashlib.sha1()
+    restante = limite
+    with open(ruta, 'rb') as f:
+        f.seek(desde)
+        while restante is None or restante > 0:
+            bloque = f.read(1 << 20 if restante is None else min(1 << 20, restante))
+            if not bloque:
+                break
+            sha.update(bloque)
+            if restante is not None:
+                restante -= len(bloque)
+    return sha.hexdigest()[:12]
+
+
+def version_particiones(huellas):
+    """Versión de un dataset particionado a partir de la huella de cada partición {año: huella}"""
+    if len(huellas) == 1:
+        return next(iter(huellas.values()))
+    sha = hashlib.sha1()
+    for anio, huella in sorted(huellas.items()):
+        sha.update(f"{anio}:{huella};".encode())
+    return sha.hexdigest()[:12]
+
+
+def actualizar(**cambios):
+    """Actualiza el estado y vuelve a serializar el cuerpo de /ready"""
+    global _cuerpo_ready
+    for clave, valor in cambios.items():
+        if isinstance(valor, dict) and isinstance(_estado.get(clave), dict):
+            _estado[clave].update(valor)
+        else:
+            _estado[clave] = valor
+    _cuerpo_ready = json.dumps(_estado).encode("utf-8")
+
+
+def listo():
+    return _estado["status"] == "ready"
+
+
+def cuerpo_health():
+    return _CUERPO_HEALTH
+
+
+def cuerpo_ready():
+    return _cuerpo_ready
@@ -2,12 +2,32 @@
 """
 Script para iniciar el servidor FastAPI correctamente
 """
+import argparse
 import uvicorn
 import os
 import sys
 
+def iniciar_produccion(workers):
+    """Inicia gunicorn con precarga del dataset y workers de uvicorn"""
+    os.environ["WEB_WORKERS"] = str(workers)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    if sys.platform == "win32":
+        # gunicorn no funciona en Windows: varios workers de uvicorn sin precarga
+        uvicorn.run("api:app", host="0.0.0.0", port=8000, workers=workers,
+                    reload=False, loop="auto", http="auto", log_level="info")
+        return
+    config = os.path.join(base_dir, "gunicorn.conf.py")
+    os.execvp(sys.executable, [sys.executable, "-m", "gunicorn", "-c", config, "api:app"])
+
 def main():
     """Inicia el servidor FastAPI usando uvicorn"""
+    parser = argparse.ArgumentParser(description="Servidor de la API de análisis")
+    parser.add_argument("--produccion", action="store_true",
+                        help="Modo producción: precarga en el proceso maestro y varios workers, sin recarga automática")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", os.cpu_count() or 1)),
+                        help="Número de workers en modo producción")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("🚀 INICIANDO SERVIDOR API")
     print("=" * 50)
@@ -20,6 +40,11 @@ def main():
     print("=" * 50)
     
     try:
+        if args.produccion:
+            print(f"🏭 Modo producción: {args.workers} workers")
+            iniciar_produccion(args.workers)
+            return
+        
         # Ejecutar uvicorn con la configuración adecuada
         uvicorn.run(
             "api:app",  # Módulo:aplicación
@@ -0,0 +1,54 @@
+import io
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from src import cleaning, dataset, ingestion
+
+RAW = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "2023.csv")
+ID_NUEVO = "9999991"
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    """API sobre una copia del export 2023 limpiada en tmp_path, sin recargas tras la ingesta"""
+    raw_dir, processed_dir = tmp_path / "raw", tmp_path / "processed"
+    raw_dir.mkdir()
+    shutil.copy(RAW, raw_dir / "2023.csv")
+    cleaning.limpiar_particiones(str(raw_dir), str(processed_dir))
+    monkeypatch.setattr(cleaning, "RAW_DIR", str(raw_dir))
+    monkeypatch.setattr(api, "processed_dir", str(processed_dir))
+    monkeypatch.setattr(ingestion, "TOKEN", "t")
+    # La recarga en segundo plano no termina entre los dos envíos
+    monkeypatch.setattr(api, "solicitar_recarga", lambda: "pendiente")
+    monkeypatch.setattr(dataset, "_activo", dataset.cargar_particiones(str(processed_dir)))
+    return TestClient(api.app), raw_dir / "2023.csv"
+
+
+def _lote(ruta_raw):
+    """Un envío del export que pasa la validación, con un ID nuevo, como CSV con la cabecera del export"""
+    export = pd.read_csv(ruta_raw, dtype=str, nrows=500)
+    lote = ingestion.normalizar(ingestion.leer_lote(io.BytesIO(export.to_csv(index=False).encode()), "csv"))
+    aceptadas, _ = ingestion.validar(lote, [])
+    fila = export.loc[[aceptadas.index[0]]].copy()
+    fila.iloc[0, 0] = ID_NUEVO
+    return fila.to_csv(index=False).encode()
+
+
+def test_lote_repetido_antes_de_la_recarga(cliente):
+    cliente, ruta_raw = cliente
+    cuerpo = _lote(ruta_raw)
+    cabeceras = {"Content-Type": "text/csv", "X-Ingesta-Token": "t"}
+
+    primera = cliente.post("/envios?year=2023", content=cuerpo, headers=cabeceras).json()
+    segunda = cliente.post("/envios?year=2023", content=cuerpo, headers=cabeceras).json()
+
+    assert primera["aceptadas"] == 1 and primera["rechazadas"] == []
+    assert segunda["aceptadas"] == 0
+    assert segunda["rechazadas"] == [{"fila": 1, "id": int(ID_NUEVO), "errores": ["ID del envio ya registrado"]}]
+    ids = pd.read_csv(ruta_raw, usecols=[0], dtype=str).iloc[:, 0]
+    assert (ids == ID_NUEVO).sum() == 1
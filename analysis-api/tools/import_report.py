@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Reporte de tiempo de importación y memoria de la API.
+
+Compara el arranque de un worker que solo sirve JSON (matplotlib y seaborn
+se cargan de forma diferida) con uno que además importa el módulo de
+gráficos, usando `python -X importtime` en procesos limpios.
+
+Uso:
+    python tools/import_report.py [--repeticiones 3] [--top 10] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ESCENARIOS = {
+    "solo_json": "import api",
+    "con_graficos": "import api, src.graphics",
+}
+
+# Se ejecuta en un proceso hijo: mide la importación y la memoria residente
+CODIGO_MEDICION = """
+import time, sys, resource
+inicio = time.perf_counter()
+{importacion}
+duracion = time.perf_counter() - inicio
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024
+print('__REPORTE__', duracion, rss * 1024, 'matplotlib' in sys.modules, 'seaborn' in sys.modules)
+"""
+
+
+def medir(importacion):
+    """Importa en un proceso limpio y retorna (segundos, bytes RSS, módulos pesados, tiempos por módulo)"""
+    entorno = dict(os.environ, API_MODO="json")
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODIGO_MEDICION.format(importacion=importacion)],
+        cwd=base_dir, env=entorno, capture_output=True, text=True, check=True
+    )
+    linea = next(l for l in proceso.stdout.splitlines() if l.startswith('__REPORTE__'))
+    _, duracion, rss, matplotlib, seaborn = linea.split()
+
+    # Formato de -X importtime: "import time: self [us] | cumulative | imported package"
+    acumulados = {}
+    for l in proceso.stderr.splitlines():
+        if not l.startswith('import time:') or 'cumulative' in l:
+            continue
+        _, acumulado, modulo = l[len('import time:'):].split('|')
+        nombre = modulo.strip()
+        # Paquetes de primer nivel; api y src ya contienen a todos los demás
+        if '.' not in nombre and nombre not in ('api', 'src'):
+            acumulados[nombre] = acumulados.get(nombre, 0) + int(acumulado)
+    return float(duracion), int(rss), matplotlib == 'True', seaborn == 'True', acumulados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Paquetes más costosos a mostrar")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    reporte = {}
+    for nombre, importacion in ESCENARIOS.items():
+        mediciones = [medir(importacion) for _ in range(args.repeticiones)]
+        mejor = min(mediciones, key=lambda m: m[0])
+        reporte[nombre] = {
+            "importacion_s": round(mejor[0], 3),
+            "rss_mb": round(mejor[1] / 2**20, 1),
+            "matplotlib": mejor[2],
+            "seaborn": mejor[3],
+            "paquetes_ms": {
+                paquete: round(us / 1000, 1)
+                for paquete, us in sorted(mejor[4].items(), key=lambda x: -x[1])[:args.top]
+            }
+        }
+
+    if args.json:
+        print(json.dumps(reporte, indent=2, ensure_ascii=False))
+        return
+
+    print("=" * 60)
+    print("⏱️ REPORTE DE IMPORTACIÓN DE LA API")
+    print("=" * 60)
+    for nombre, r in reporte.items():
+        print(f"\n{nombre}: {r['importacion_s']:.3f} s, RSS {r['rss_mb']} MB "
+              f"(matplotlib={r['matplotlib']}, seaborn={r['seaborn']})")
+        for paquete, ms in r["paquetes_ms"].items():
+            print(f"   {paquete:<30} {ms:>8.1f} ms")
+
+    base, lazy = reporte["con_graficos"], reporte["solo_json"]
+    print("\n" + "=" * 60)
+    print(f"Ahorro del worker solo JSON: {base['importacion_s'] - lazy['importacion_s']:.3f} s "
+          f"y {base['rss_mb'] - lazy['rss_mb']:.1f} MB de RSS")
+
+
+if __name__ == "__main__":
+    main()
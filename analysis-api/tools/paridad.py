@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Paridad de un motor de análisis con Data (pandas).
+
+Carga las particiones procesadas, publica la versión para el motor indicado
+y compara el resultado de cada método de Data con el del motor: mismos
+valores, columnas, índice y orden (los flotantes con tolerancia relativa).
+Con --year se compara además cada selección de años. Con --motor almacen la
+versión se carga en ALMACEN_URL (o --url) y se comprueba también que el
+dataset leído de vuelta del almacén sea igual al de las particiones.
+
+Uso:
+    python tools/paridad.py [--motor sqlite] [--year 2023 --year 2024] [--json]
+    python tools/paridad.py --motor almacen --url sqlite:////tmp/almacen.db
+    python tools/paridad.py --motor polars --year 2023
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, base_dir)
+
+from src import almacen, dataset, sqlstore  # noqa: E402
+from src.processing_data import activar_copy_on_write  # noqa: E402
+
+# Los avisos de pandas de los métodos de Data no aportan a la comparación
+warnings.simplefilter("ignore", FutureWarning)
+
+METODOS = [
+    "anios",
+    "puntuacion_por_anio",
+    "provincia_puntuacion",
+    "genero_puntuacion_edad",
+    "empresa_competencia",
+    "tecnologias_si_no",
+    "participacion_innovacion_ciiu_genero",
+    "dashboard_competencia_digital_ciiu",
+    "correlacion_data",
+    "edad_fundamentos_digitales",
+    "radar_deficiencias_edad",
+]
+
+TOLERANCIA = 1e-9
+
+
+def comparar(esperado, obtenido, ruta="resultado"):
+    """Lanza AssertionError con la ruta del primer valor que difiere"""
+    if isinstance(esperado, pd.DataFrame):
+        pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False, check_exact=False, rtol=TOLERANCIA,
+                                      obj=ruta)
+    elif isinstance(esperado, pd.Series):
+        pd.testing.assert_series_equal(obtenido, esperado, check_dtype=False, check_exact=False, rtol=TOLERANCIA,
+                                       obj=ruta)
+    elif isinstance(esperado, (tuple, list)):
+        assert isinstance(obtenido, (tuple, list)) and len(obtenido) == len(esperado), f"{ruta}: longitud distinta"
+        for i, (a, b) in enumerate(zip(esperado, obtenido)):
+            comparar(a, b, f"{ruta}[{i}]")
+    elif isinstance(esperado, dict):
+        assert list(obtenido) == list(esperado), f"{ruta}: claves distintas"
+        for clave in esperado:
+            comparar(esperado[clave], obtenido[clave], f"{ruta}[{clave!r}]")
+    else:
+        assert obtenido == esperado, f"{ruta}: {obtenido!r} != {esperado!r}"
+
+
+def _ejecutar(motor, metodo):
+    inicio = time.perf_counter()
+    try:
+        return getattr(motor, metodo)(), None, time.perf_counter() - inicio
+    except Exception as e:
+        return None, e, time.perf_counter() - inicio
+
+
+def verificar(referencia, motor):
+    """Compara cada método; retorna una fila por método con el estado y los tiempos"""
+    filas = []
+    for metodo in METODOS:
+        esperado, error_esperado, t_referencia = _ejecutar(referencia, metodo)
+        obtenido, error_obtenido, t_motor = _ejecutar(motor, metodo)
+        if error_esperado is not None or error_obtenido is not None:
+            # Un método que falla en pandas debe fallar igual en el motor
+            igual = type(error_esperado) is type(error_obtenido)
+            detalle = f"{type(error_esperado).__name__} / {type(error_obtenido).__name__}"
+        else:
+            try:
+                comparar(esperado, obtenido)
+                igual, detalle = True, ""
+            except AssertionError as e:
+                igual, detalle = False, str(e).strip().splitlines()[0]
+        filas.append({"metodo": metodo, "igual": igual, "pandas_s": round(t_referencia, 4),
+                      "motor_s": round(t_motor, 4), "detalle": detalle})
+    return filas
+
+
+def main():
+    activar_copy_on_write()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--motor", default=os.getenv("ANALISIS_MOTOR") or "sqlite",
+                        choices=sqlstore.MOTORES_SQL + ("almacen", "polars"))
+    parser.add_argument("--url", default=almacen.URL, help="URL del almacén (por defecto ALMACEN_URL)")
+    parser.add_argument("--year", type=int, action="append", default=[], help="selección de años a comparar")
+    parser.add_argument("--dir", default=os.path.join(base_dir, "data", "processed"))
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    ds = dataset.cargar_particiones(args.dir)
+    informe = {"motor": args.motor, "version": ds.version, "casos": {}}
+    if args.motor == "almacen":
+        almacen.URL = args.url
+        almacen.cargar(ds)
+        consultas = almacen.consultas(ds.version)
+        cargado = dataset.cargar_almacen(ds.version)
+        filas = []
+        for nombre, esperado, obtenido in (("df", ds.df, cargado.df), ("data.df", ds.data.df, cargado.data.df)):
+            try:
+                pd.testing.assert_frame_equal(obtenido, esperado, obj=nombre)
+                filas.append({"metodo": nombre, "igual": True, "pandas_s": 0.0, "motor_s": 0.0, "detalle": ""})
+            except AssertionError as e:
+                filas.append({"metodo": nombre, "igual": False, "pandas_s": 0.0, "motor_s": 0.0,
+                              "detalle": str(e).strip().splitlines()[0]})
+        informe["casos"]["dataset"] = filas
+    elif args.motor == "polars":
+        from src import polarsdata
+        consultas = polarsdata.motor(ds.data)
+    else:
+        ruta_base = sqlstore.publicar(ds, args.dir, args.motor)
+        consultas = sqlstore.Consultas(sqlstore.Archivo(lambda: ruta_base, args.motor))
+
+    informe["casos"]["todos"] = verificar(ds.data, consultas)
+    if args.year:
+        seleccion = ds.seleccionar(args.year)
+        informe["casos"][",".join(map(str, args.year))] = verificar(seleccion.data, consultas.seleccionar(args.year))
+
+    fallidos = sum(not f["igual"] for filas in informe["casos"].values() for f in filas)
+    if args.json:
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    else:
+        print(f"Motor {args.motor} contra pandas (versión {ds.version})")
+        for caso, filas in informe["casos"].items():
+            print(f"\n[{caso}]")
+            for f in filas:
+                estado = "ok" if f["igual"] else "DIFIERE"
+                print(f"  {f['metodo']:<40} {estado:<8} pandas {f['pandas_s']:>8.4f} s  "
+                      f"{args.motor} {f['motor_s']:>8.4f} s  {f['detalle']}")
+        print(f"\n{'Sin diferencias' if not fallidos else f'{fallidos} métodos con diferencias'}")
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
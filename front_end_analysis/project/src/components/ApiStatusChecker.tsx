@@ -7,10 +7,18 @@ interface ApiStatusProps {
 
 interface ApiHealth {
   status: string;
-  message: string;
-  cors: string;
+  dataset_version: string | null;
   data_count: number;
-  timestamp: string;
+  cache: {
+    calentado: boolean;
+    graficos_generados: number;
+    graficos_total: number;
+  };
+  render_pool: {
+    modo: string;
+    workers: number;
+    activos: number;
+  };
 }
 
 const ApiStatusChecker: React.FC<ApiStatusProps> = ({ 
@@ -26,14 +34,15 @@ const ApiStatusChecker: React.FC<ApiStatusProps> = ({
     setError(null);
     
     try {
-      const response = await fetch(`${apiUrl}/health`, {
+      const response = await fetch(`${apiUrl}/ready`, {
         method: 'GET',
         headers: {
           'Content-Type': 'application/json',
         },
       });
 
-      if (!response.ok) {
+      // 503 mientras la API termina de arrancar: el cuerpo trae el estado ("starting")
+      if (!response.ok && response.status !== 503) {
         throw new Error(`HTTP ${response.status}: ${response.statusText}`);
       }
 
@@ -66,17 +75,21 @@ const ApiStatusChecker: React.FC<ApiStatusProps> = ({
     return () => clearInterval(interval);
   }, [apiUrl]);
 
+  const iniciando = !error && health !== null && health.status !== 'ready';
+
   const getStatusColor = () => {
     if (loading) return 'bg-yellow-100 border-yellow-300 text-yellow-800';
     if (error) return 'bg-red-100 border-red-300 text-red-800';
-    if (health?.status === 'healthy') return 'bg-green-100 border-green-300 text-green-800';
+    if (health?.status === 'ready') return 'bg-green-100 border-green-300 text-green-800';
+    if (iniciando) return 'bg-blue-100 border-blue-300 text-blue-800';
     return 'bg-gray-100 border-gray-300 text-gray-800';
   };
 
   const getStatusIcon = () => {
     if (loading) return '⏳';
     if (error) return '❌';
-    if (health?.status === 'healthy') return '✅';
+    if (health?.status === 'ready') return '✅';
+    if (iniciando) return '🔄';
     return '❓';
   };
 
@@ -115,12 +128,17 @@ const ApiStatusChecker: React.FC<ApiStatusProps> = ({
         </div>
       )}
 
+      {iniciando && (
+        <p className="text-sm mb-1">La API está iniciando (cargando datos y gráficos); se volverá a verificar automáticamente.</p>
+      )}
+
       {health && (
         <div className="text-sm space-y-1">
-          <p><strong>Estado:</strong> {health.status}</p>
-          <p><strong>Mensaje:</strong> {health.message}</p>
-          <p><strong>CORS:</strong> {health.cors}</p>
+          <p><strong>Estado:</strong> {iniciando ? 'iniciando' : health.status}</p>
+          <p><strong>Versión del dataset:</strong> {health.dataset_version ?? 'N/A'}</p>
           <p><strong>Registros:</strong> {health.data_count.toLocaleString()}</p>
+          <p><strong>Gráficos en caché:</strong> {health.cache.graficos_generados}/{health.cache.graficos_total}</p>
+          <p><strong>Render pool:</strong> {health.render_pool.modo} ({health.render_pool.activos}/{health.render_pool.workers} ocupados)</p>
           {lastCheck && (
             <p><strong>Última verificación:</strong> {lastCheck.toLocaleTimeString()}</p>
           )}
@@ -25,6 +25,8 @@ export const API_ENDPOINTS = {
   // Datos básicos
   data: '/data',
   summary: '/summary',
+  health: '/health',
+  ready: '/ready',
   filter: (column: string, value: string) => `/filter/${column}/${value}`,
   
   // Análisis de datos
@@ -126,7 +128,8 @@ export class ApiService {
   // Verificar estado de conexión con la API
   async checkConnection(): Promise<boolean> {
     try {
-      await apiClient.get('/data', { timeout: 5000 });
+      // Sonda de liveness: no serializa el dataset
+      await apiClient.get(API_ENDPOINTS.health, { timeout: 5000 });
       return true;
     } catch (error) {
       return false;
@@ -136,14 +139,14 @@ export class ApiService {
   // Obtener estadísticas de la API
   async getApiStats() {
     try {
-      const [summary, dataCount] = await Promise.all([
+      const [summary, ready] = await Promise.all([
         this.get(API_ENDPOINTS.summary),
-        this.get(API_ENDPOINTS.data)
+        this.get(API_ENDPOINTS.ready)
       ]);
 
       return {
         connected: true,
-        dataCount: Array.isArray(dataCount) ? dataCount.length : 0,
+        dataCount: ready?.data_count ?? 0,
         lastUpdate: new Date().toISOString(),
         summaryKeys: Object.keys(summary || {}).length
       };